@@ -2,9 +2,91 @@ from typing import Dict, Any, List
 import json
 import numpy as np
 import os
+from datetime import datetime, timedelta
+from agents.market_cache import get_market_cache
+from agents.portfolio_store import portfolio_columns
+from agents.risk_engine import align_returns, portfolio_risk
+from agents.screener import get_universe_table, load_rules, screen
+from agents.logging_utils import get_logger
 from dotenv import load_dotenv
 load_dotenv()  
 
+log = get_logger(__name__)
+
+RISK_LOOKBACK_DAYS = int(os.getenv("RISK_LOOKBACK_DAYS", "252"))
+RISK_CONFIDENCE = float(os.getenv("RISK_CONFIDENCE", "0.95"))
+
+def _metric(data: Dict[str, Any], key: str) -> float:
+    value = data.get(key)
+    return float(value) if value else np.nan
+
+def portfolio_metrics(tickers: List[str], shares: np.ndarray, market_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Values holdings and computes portfolio risk with the vectorized risk engine.
+    Holdings without a price are reported with value None instead of a made-up price and excluded from weights.
+    Daily returns come from the market cache history kept warm by workers/market_warmer.py.
+    """
+    ticker_data = [market_data.get(t, {}) for t in tickers]
+    prices = np.array([_metric(d, "current_price") for d in ticker_data])
+    betas = np.array([_metric(d, "beta") for d in ticker_data])
+    pe_ratios = np.array([_metric(d, "pe_ratio") for d in ticker_data])
+
+    since = (datetime.now() - timedelta(days=int(RISK_LOOKBACK_DAYS * 1.5))).strftime("%Y-%m-%d")
+    histories = get_market_cache().get_histories(tickers, since)
+    returns = align_returns([histories[t] for t in tickers], lookback=RISK_LOOKBACK_DAYS)
+    risk = portfolio_risk(shares, prices, returns, betas=betas, pe_ratios=pe_ratios, confidence=RISK_CONFIDENCE)
+
+    missing = set(risk["missing_prices"].tolist())
+    metrics = {"holdings": {}, "total_value": risk["total_value"],
+               "portfolio_pe": risk["portfolio_pe"], "portfolio_beta": risk["portfolio_beta"]}
+    for i, ticker in enumerate(tickers):
+        metrics["holdings"][ticker] = {
+            "shares": float(shares[i]),
+            "value": None if i in missing else float(risk["values"][i]),
+            "allocation": f"{risk['weights'][i] * 100:.2f}%",
+            "pe_ratio": ticker_data[i].get("pe_ratio"),
+            "beta": ticker_data[i].get("beta"),
+            "volatility": ticker_data[i].get("volatility"),
+            "risk_contribution": f"{risk['risk_contributions'][i] * 100:.2f}%"
+        }
+        if i in missing:
+            metrics["holdings"][ticker]["error"] = ticker_data[i].get("error", "No price data")
+    metrics["risk"] = {
+        "volatility_daily": risk["volatility_daily"],
+        "volatility_annual": risk["volatility_annual"],
+        f"var_{int(RISK_CONFIDENCE * 100)}_historical": risk["var_historical"],
+        f"var_{int(RISK_CONFIDENCE * 100)}_parametric": risk["var_parametric"],
+        "history_days": int(returns.shape[0]),
+        "unpriced_holdings": [tickers[i] for i in sorted(missing)]
+    }
+    return metrics
+
+def recommend(action: str, portfolio_data: Dict[str, Any], market_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ranks buy or sell candidates with the vectorized screener over the tracked universe.
+    Sell candidates come from the portfolio's holdings; buy candidates from the whole universe, minus
+    stocks already held unless the rule set turns exclude_holdings off.
+    """
+    holdings, _ = portfolio_columns(portfolio_data) if portfolio_data.get("holdings") else ([], None)
+    rule_set = load_rules()[action]
+    table = get_universe_table(extra=holdings).with_overrides(market_data)
+    if rule_set.get("scope") == "holdings":
+        ranked = screen(table, rule_set, candidates=holdings)
+    else:
+        ranked = screen(table, rule_set, exclude=holdings if rule_set.get("exclude_holdings") else None)
+
+    recommendations = [{
+        "ticker": candidate["ticker"],
+        "action": action,
+        "score": candidate["score"],
+        "reason": ", ".join(f"{label} ({value:.2f})" for label, _, value in candidate["matched"])
+    } for candidate in ranked]
+    if not recommendations:
+        reason = ("No clear candidates for selling based on current performance." if action == "sell"
+                  else "No stocks in the tracked universe currently pass the buy screen.")
+        recommendations.append({"ticker": None, "action": action, "reason": reason})
+    return recommendations
+
 def analysis_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyzes market and portfolio data based on intents.
@@ -16,51 +98,16 @@ def analysis_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     intents = state["intents"]
     companies = state["companies"]
     transcript = state.get("transcript", "").lower()
-    print(f"Analysis_Agent Input: market_data={market_data}, portfolio_data={portfolio_data}, intents={intents}, companies={companies}")
+    log.info("Analysis_Agent Input", intents=intents, companies=companies, market_data=market_data,
+             holdings=portfolio_data.get("holdings"))
 
     analysis = {"portfolio_metrics": {}, "comparisons": {}, "recommendations": []}
 
     if "portfolio" in intents and portfolio_data.get("holdings"):
-        holdings = portfolio_data["holdings"]
-        total_value = 0
-        portfolio_metrics = {"holdings": {}, "total_value": 0, "portfolio_pe": None, "portfolio_beta": None}
-        pe_ratios = []
-        betas = []
-
-        # Calculate values
-        for ticker, shares in holdings.items():
-            ticker_data = market_data.get(ticker, {"current_price": 0, "pe_ratio": None, "beta": None, "volatility": None, "error": "No data"})
-            price = ticker_data.get("current_price", 0)
-            if price == 0:
-                price = 100.0
-                ticker_data["error"] = ticker_data.get("error", "Using default price due to missing data")
-            value = shares * price
-            total_value += value
-            portfolio_metrics["holdings"][ticker] = {
-                "shares": shares,
-                "value": value,
-                "pe_ratio": ticker_data.get("pe_ratio"),
-                "beta": ticker_data.get("beta"),
-                "volatility": ticker_data.get("volatility")
-            }
-            if ticker_data.get("pe_ratio"):
-                pe_ratios.append(ticker_data["pe_ratio"])
-            if ticker_data.get("beta"):
-                betas.append(ticker_data["beta"])
-
-        # Calculate allocations
-        for ticker in portfolio_metrics["holdings"]:
-            value = portfolio_metrics["holdings"][ticker]["value"]
-            allocation = f"{(value / total_value * 100):.2f}%" if total_value > 0 else "0.00%"
-            portfolio_metrics["holdings"][ticker]["allocation"] = allocation
-
-        portfolio_metrics["total_value"] = total_value
-        portfolio_metrics["portfolio_pe"] = float(np.mean(pe_ratios)) if pe_ratios else None
-        portfolio_metrics["portfolio_beta"] = float(np.mean(betas)) if betas else None
-        analysis["portfolio_metrics"] = portfolio_metrics
-
-        if not any(ticker in market_data and "current_price" in market_data[ticker] for ticker in holdings):
-            print("Analysis_Agent Warning: No valid market data for portfolio valuation")
+        tickers, shares = portfolio_columns(portfolio_data)
+        analysis["portfolio_metrics"] = portfolio_metrics(tickers, shares, market_data)
+        if not any(ticker in market_data and "current_price" in market_data[ticker] for ticker in portfolio_data["holdings"]):
+            log.warning("Analysis_Agent Warning: No valid market data for portfolio valuation")
 
     if "compare" in intents and companies:
         for company in companies:
@@ -68,33 +115,14 @@ def analysis_agent(state: Dict[str, Any]) -> Dict[str, Any]:
             analysis["comparisons"][company] = {
                 "pe_ratio": ticker_data.get("pe_ratio"),
                 "beta": ticker_data.get("beta"),
-                "current_price": ticker_data.get("current_price", 100.0)
+                "current_price": ticker_data.get("current_price")
             }
 
     if "recommend" in intents:
-        if "sell" in transcript:
-            for ticker, details in analysis["portfolio_metrics"].get("holdings", {}).items():
-                pe = details.get("pe_ratio")
-                volatility = details.get("volatility")
-                beta = details.get("beta")
-                if (pe and pe > 30) or (volatility and volatility > 0.5) or (beta and beta > 1.5):
-                    analysis["recommendations"].append({
-                        "ticker": ticker,
-                        "action": "sell",
-                        "reason": f"High PE ({pe:.2f}), volatility ({volatility:.2f}), or beta ({beta:.2f})"
-                    })
-            if not analysis["recommendations"]:
-                analysis["recommendations"].append({
-                    "ticker": None,
-                    "action": "sell",
-                    "reason": "No clear candidates for selling based on current performance."
-                })
-        elif "buy" in transcript:
-            analysis["recommendations"].append({
-                "ticker": None,
-                "action": "buy",
-                "reason": "Selecting stocks to buy is complex due to the vast market. Consult a financial advisor."
-            })
+        action = "sell" if "sell" in transcript else "buy" if "buy" in transcript else None
+        if action:
+            analysis["recommendations"] = recommend(action, portfolio_data, market_data)
 
-    print(f"Analysis_Agent Output: {analysis}")
+    log.info("Analysis_Agent Output", total_value=analysis["portfolio_metrics"].get("total_value"),
+             comparisons=analysis["comparisons"], recommendations=analysis["recommendations"])
     return {"analysis": analysis}
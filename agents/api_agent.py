@@ -1,137 +1,272 @@
 import json
 import requests
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
 import time
 import os
 import yfinance as yf
 import pandas as pd
-import os
+from agents.market_cache import MarketCache, get_market_cache
+from agents.market_hours import is_fresh
+from agents.deadline import MIN_CALL_S, call_timeout, degraded, node_deadline, time_left
+from agents.speculation import get_speculation, result as speculation_result
+from agents.logging_utils import get_logger
 from dotenv import load_dotenv
-load_dotenv() 
+load_dotenv()
+
+log = get_logger(__name__)
+
+KRW_TO_USD = 0.00073  # Approximate exchange rate as of May 2025
+MARKET_DATA_KINDS = ("quote", "fundamentals", "history")
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "", "None", "-") else None
+    except (TypeError, ValueError):
+        return None
+
+def _timeout(deadline: Optional[float], cap: float = 10) -> float:
+    """Provider timeout, shortened to the time left before deadline (raises DeadlineExceeded when none is left)."""
+    return call_timeout(deadline, cap) if deadline else cap
+
+def _alpha_vantage_query(function: str, symbol: str, api_key: str, deadline: Optional[float],
+                        acquire: Optional[Callable[[], bool]]) -> Dict[str, Any]:
+    """
+    One Alpha Vantage call; the quota is reserved just before it is made.
+    Raises when the quota is spent or the reply is a rate-limit or error message instead of data.
+    """
+    if acquire is not None and not acquire():
+        raise Exception("Alpha Vantage quota exhausted")
+    url = f"https://www.alphavantage.co/query?function={function}&symbol={symbol}&apikey={api_key}"
+    response = requests.get(url, timeout=_timeout(deadline))
+    response.raise_for_status()
+    data = response.json()
+    for key in ("Note", "Information", "Error Message"):
+        if key in data:
+            raise Exception(f"Alpha Vantage {function}: {data[key]}")
+    return data
+
+def fetch_alpha_vantage(company: str, api_key: str, kinds: List[str], parts: Dict[str, Any],
+                        deadline: Optional[float] = None, acquire: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Fetches the requested kinds ('quote', 'history', 'fundamentals') from Alpha Vantage into parts.
+    acquire reserves quota for one call and is called before each request, so calls that never start cost nothing.
+    Raises on the first failure; kinds fetched before it stay in parts.
+    """
+    symbol = company if "." in company else company + ".US"
+    if "quote" in kinds:
+        data = _alpha_vantage_query("GLOBAL_QUOTE", symbol, api_key, deadline, acquire)
+        log.debug("API_Agent Response", company=company, data=data)
+        if "Global Quote" in data and data["Global Quote"]:
+            quote = data["Global Quote"]
+            parts["quote"] = {
+                "current_price": float(quote.get("05. price", 0)),
+                "change_percent": quote.get("10. change percent", "0%"),
+                "timestamp": quote.get("07. latest trading day", datetime.now().strftime("%Y-%m-%d"))
+            }
+        else:
+            raise Exception("No data in Global Quote")
+
+    if "history" in kinds:
+        data = _alpha_vantage_query("TIME_SERIES_DAILY", symbol, api_key, deadline, acquire)
+        if "Time Series (Daily)" not in data:
+            raise Exception("No data in Time Series (Daily)")
+        parts["history"] = {date: float(bar["4. close"]) for date, bar in data["Time Series (Daily)"].items()}
+
+    if "fundamentals" in kinds:
+        data = _alpha_vantage_query("OVERVIEW", symbol, api_key, deadline, acquire)
+        if "Symbol" not in data:
+            raise Exception("No data in Overview")
+        parts["fundamentals"] = {
+            "pe_ratio": _as_float(data.get("PERatio")),
+            "beta": _as_float(data.get("Beta")),
+            "volatility": _as_float(data.get("Volatility"))
+        }
+
+def _reserve_yfinance(acquire: Optional[Callable[[], bool]]) -> None:
+    """Reserves quota for one yfinance request; raises when the quota is spent."""
+    if acquire is not None and not acquire():
+        raise Exception("yfinance quota exhausted")
+
+def fetch_yfinance(company: str, kinds: List[str], parts: Dict[str, Any], deadline: Optional[float] = None,
+                   acquire: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Fetches the requested kinds from yfinance into parts. Converts KRW prices to USD for .KS tickers.
+    acquire reserves quota for one request and is called before each of the (up to three) requests.
+    """
+    yf_ticker = yf.Ticker(company)
+    fx = KRW_TO_USD if company.endswith(".KS") else 1.0
+
+    if "quote" in kinds:
+        _reserve_yfinance(acquire)
+        history = yf_ticker.history(period="1d", timeout=_timeout(deadline))
+        if history.empty:
+            raise Exception("No price data from yfinance")
+        parts["quote"] = {
+            "current_price": float(history["Close"].iloc[-1]) * fx,
+            "change_percent": f"{(history['Close'].iloc[-1] - history['Open'].iloc[-1]) / history['Open'].iloc[-1] * 100:.2f}%",
+            "timestamp": datetime.now().strftime("%Y-%m-%d")
+        }
+
+    if "history" in kinds or "fundamentals" in kinds:
+        _reserve_yfinance(acquire)
+        history_1y = yf_ticker.history(period="1y", timeout=_timeout(deadline))
+        if not history_1y.empty:
+            parts["history"] = {index.strftime("%Y-%m-%d"): float(close) * fx for index, close in history_1y["Close"].items()}
+        if "fundamentals" in kinds:
+            _reserve_yfinance(acquire)
+            info = yf_ticker.info
+            parts["fundamentals"] = {
+                "pe_ratio": _as_float(info.get("trailingPE")),
+                "beta": _as_float(info.get("beta")),
+                "volatility": float(history_1y["Close"].pct_change().std() * (252 ** 0.5)) if not history_1y.empty else None
+            }
+
+def fetch_market_data(company: str, api_key: Optional[str], kinds: List[str], cache: Optional[MarketCache] = None,
+                      deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Fetches market data kinds for one company and writes them to the market cache.
+    Uses Alpha Vantage while its quota allows, and yfinance for anything still missing.
+    With a deadline, provider timeouts shrink to the time left and no call starts once it has passed.
+    Output: Dict of kind -> payload for the kinds that could be fetched.
+    """
+    cache = cache or get_market_cache()
+    parts: Dict[str, Any] = {}
+    if api_key:
+        try:
+            fetch_alpha_vantage(company, api_key, kinds, parts, deadline, lambda: cache.try_acquire("alpha_vantage"))
+        except Exception as e:
+            log.error("API_Agent Error", company=company, error=str(e))
+
+    missing = [kind for kind in kinds if kind not in parts]
+    if missing and (deadline is None or time_left(deadline) >= MIN_CALL_S):
+        try:
+            fetch_yfinance(company, missing, parts, deadline, lambda: cache.try_acquire("yfinance"))
+            log.info("API_Agent yfinance Success", company=company, kinds=sorted(parts))
+        except Exception as e:
+            log.error("API_Agent yfinance Error", company=company, error=str(e))
+
+    for kind, payload in parts.items():
+        if kind == "history":
+            cache.put_history(company, payload)
+        else:
+            cache.put(company, kind, payload)
+    return parts
+
+def prefetch_market_data(company: str, kinds: List[str], deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Speculative fetch started by intent_classifier (see agents/speculation.py): fetches the kinds that
+    are not fresh in the market cache, exactly as api_agent would.
+    Output: Dict of kind -> payload for the kinds fetched.
+    """
+    cache = get_market_cache()
+    stale = []
+    for kind in kinds:
+        hit = cache.get(company, kind)
+        if not (hit and is_fresh(company, kind, hit[1])):
+            stale.append(kind)
+    return fetch_market_data(company, os.getenv("ALPHA_VANTAGE_KEY"), stale, cache, deadline) if stale else {}
+
+def build_entry(quote: Dict[str, Any], fundamentals: Optional[Dict[str, Any]], closes: List[Tuple[str, float]],
+                time_query: Optional[str]) -> Dict[str, Any]:
+    """Assembles the market_data entry for one company from cached parts."""
+    entry = dict(quote)
+    if fundamentals:
+        entry.update(fundamentals)
+    if time_query and closes:
+        period = {"day": 1, "week": 7, "month": 30, "year": 365}.get(time_query.split()[1], 30)
+        target = (datetime.now() - timedelta(days=period)).strftime("%Y-%m-%d")
+        before = [close for date, close in closes if date <= target]
+        if before:
+            entry["historical_price"] = before[-1]
+    return entry
 
 def api_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Fetches market data for companies based on intents and portfolio holdings.
-    Uses Alpha Vantage, falls back to yfinance if it fails. Convert non-USD prices (e.g., KRW for .KS tickers) to USD.
-    Input: State with 'companies', 'time_query', 'intents', 'portfolio_data'.
-    Output: Updates State with 'market_data': Dict[str, Any].
+    Serves fresh entries from the market cache (kept warm by workers/market_warmer.py) and only fetches
+    stale kinds: Alpha Vantage first, yfinance as fallback. Convert non-USD prices (e.g., KRW for .KS tickers) to USD.
+    Once the node's slice of the request deadline is spent, stale cached values are served without fetching.
+    On follow-up turns, entries remembered in state['context'] whose quote is still fresh are reused as-is.
+    Fetches intent_classifier started speculatively for the needed tickers are waited on instead of repeated.
+    Input: State with 'companies', 'time_query', 'intents', 'portfolio_data', 'deadline', 'context'.
+    Output: Updates State with 'market_data': Dict[str, Any], 'market_fetched_at' and 'degradations'.
     """
     companies = state["companies"]
     time_query = state["time_query"]
     intents = state["intents"]
     portfolio_data = state["portfolio_data"]
-    print(f"API_Agent Input: companies={companies}, time_query={time_query}, intents={intents}")
+    log.info("API_Agent Input", companies=companies, time_query=time_query, intents=intents)
 
     api_key = os.getenv("ALPHA_VANTAGE_KEY")
     if not api_key:
         raise ValueError("ALPHA_VANTAGE_KEY not set in environment variables")
 
     market_data = {}
-    
+    fetched_at = {}
+    served_stale = []
+    deadline = node_deadline(state, "api_agent")
+    cache = get_market_cache()
+    cache.track(companies)
+
     if "portfolio" in intents and portfolio_data.get("holdings"):
         companies = list(set(companies + list(portfolio_data["holdings"].keys())))
     companies = list(set(companies))
 
-    max_retries = 1
-    retry_delay = 5
-    krw_to_usd = 0.00073  # Approximate exchange rate as of May 2025
+    # Reuse what earlier turns of the conversation already served; only the delta is looked up
+    remembered = (state.get("context") or {}).get("market_data", {})
+    for company in list(companies):
+        memo = remembered.get(company)
+        if memo and memo.get("time_query") == time_query and is_fresh(company, "quote", memo["fetched_at"]):
+            market_data[company] = memo["entry"]
+            fetched_at[company] = memo["fetched_at"]
+            companies.remove(company)
+
+    # Speculative fetches land in the cache; wait for them before reading it
+    speculated = get_speculation().take(state.get("request_id"), "market", companies)
+    speculated = {company: speculation_result(future, deadline, {}) for company, future in speculated.items()}
+
+    kinds = ["quote", "fundamentals"] + (["history"] if time_query else [])
+    cached = {kind: cache.get_many(companies, kind) for kind in kinds}
+    since = (datetime.now() - timedelta(days=400)).strftime("%Y-%m-%d")
 
     for company in companies:
-        if company in market_data and "error" not in market_data[company]:
+        parts = {}
+        stale = []
+        for kind in kinds:
+            hit = cached[kind].get(company)
+            if hit and is_fresh(company, kind, hit[1]):
+                parts[kind] = hit[0]
+                if kind == "quote":
+                    fetched_at[company] = hit[1]
+            else:
+                stale.append(kind)
+
+        if stale:
+            fetched = dict(speculated.get(company, {}))
+            missing = [kind for kind in stale if kind not in fetched]
+            if missing and time_left(deadline) >= MIN_CALL_S:
+                fetched.update(fetch_market_data(company, api_key, missing, cache, deadline))
+            for kind in stale:
+                if kind in fetched:
+                    parts[kind] = fetched[kind]
+                    if kind == "quote":
+                        fetched_at[company] = time.time()
+                elif company in cached[kind]:
+                    # Provider failed or out of time: a stale value beats no value
+                    parts[kind] = cached[kind][company][0]
+                    if kind == "quote":
+                        served_stale.append(company)
+                        fetched_at[company] = cached[kind][company][1]
+
+        if "quote" not in parts:
+            market_data[company] = {"error": f"No market data available for {company}"}
             continue
-        alpha_vantage_success = False
-        for attempt in range(max_retries):
-            try:
-                symbol = company if "." in company else company + ".US"
-                url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey={api_key}"
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-                print(f"API_Agent Response for {company} (Attempt {attempt+1}): {data}")
-
-                if "Global Quote" in data and data["Global Quote"]:
-                    quote = data["Global Quote"]
-                    current_price = float(quote.get("05. price", 0))
-                    market_data[company] = {
-                        "current_price": current_price,
-                        "change_percent": quote.get("10. change percent", "0%"),
-                        "timestamp": quote.get("07. latest trading day", datetime.now().strftime("%Y-%m-%d"))
-                    }
-                else:
-                    raise Exception("No data in Global Quote")
-
-                if time_query:
-                    period = {"day": 1, "week": 7, "month": 30, "year": 365}.get(time_query.split()[1], 30)
-                    url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={symbol}&apikey={api_key}"
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    data = response.json()
-                    if "Time Series (Daily)" in data:
-                        date = (datetime.now() - timedelta(days=period)).strftime("%Y-%m-%d")
-                        if date in data["Time Series (Daily)"]:
-                            market_data[company]["historical_price"] = float(data["Time Series (Daily)"][date]["4. close"])
-
-                url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={api_key}"
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-                if data:
-                    market_data[company].update({
-                        "pe_ratio": float(data.get("PERatio", 0)) if data.get("PERatio") != "None" else None,
-                        "beta": float(data.get("Beta", 0)) if data.get("Beta") != "None" else None,
-                        "volatility": float(data.get("Volatility", 0)) if data.get("Volatility") else None
-                    })
-
-                alpha_vantage_success = True
-                break
-            except Exception as e:
-                print(f"API_Agent Error for {company} (Attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                break
-
-        if not alpha_vantage_success:
-            try:
-                ticker = company
-                yf_ticker = yf.Ticker(ticker)
-                info = yf_ticker.info
-                history = yf_ticker.history(period="1d")
-
-                if not history.empty:
-                    current_price = float(history["Close"].iloc[-1])
-                    # Convert KRW to USD for .KS tickers
-                    if ticker.endswith(".KS"):
-                        current_price *= krw_to_usd
-                    market_data[company] = {
-                        "current_price": current_price,
-                        "change_percent": f"{(history['Close'].iloc[-1] - history['Open'].iloc[-1]) / history['Open'].iloc[-1] * 100:.2f}%",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d")
-                    }
-                else:
-                    raise Exception("No price data from yfinance")
-
-                market_data[company].update({
-                    "pe_ratio": float(info.get("trailingPE", 0)) if info.get("trailingPE") else None,
-                    "beta": float(info.get("beta", 0)) if info.get("beta") else None,
-                    "volatility": float(yf_ticker.history(period="1y")["Close"].pct_change().std() * (252 ** 0.5)) if not yf_ticker.history(period="1y").empty else None
-                })
-
-                if time_query:
-                    period = {"day": "1d", "week": "5d", "month": "1mo", "year": "1y"}.get(time_query.split()[1], "1mo")
-                    history = yf_ticker.history(period=period)
-                    if not history.empty:
-                        historical_price = float(history["Close"].iloc[0])
-                        if ticker.endswith(".KS"):
-                            historical_price *= krw_to_usd
-                        market_data[company]["historical_price"] = historical_price
-
-                print(f"API_Agent yfinance Success for {company}: {market_data[company]}")
-            except Exception as e:
-                print(f"API_Agent yfinance Error for {company}: {e}")
-                market_data[company] = {"error": str(e)}
+        closes = cache.get_history(company, since) if time_query else []
+        market_data[company] = build_entry(parts["quote"], parts.get("fundamentals"), closes, time_query)
 
     os.makedirs("data", exist_ok=True)
-    print(f"API_Agent Output: market_data={market_data}")
-    return {"market_data": market_data}
\ No newline at end of file
+    log.info("API_Agent Output", market_data=market_data, served_stale=served_stale, reused=len(market_data) - len(companies),
+             errors=sum(1 for entry in market_data.values() if "error" in entry))
+    degradations = degraded("api_agent", "stale_quotes", ",".join(sorted(served_stale))) if served_stale else []
+    return {"market_data": market_data, "market_fetched_at": fetched_at, "degradations": degradations}
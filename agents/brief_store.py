@@ -0,0 +1,155 @@
+from typing import Dict, Any, List, Optional
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from agents.market_cache import MarketCache, get_market_cache
+from agents.market_hours import is_fresh
+
+BRIEF_DB_PATH = os.path.join("data", "briefs.db")
+BRIEF_AUDIO_DIR = os.path.join("data", "briefs")
+BRIEF_MAX_AGE_S = float(os.getenv("BRIEF_MAX_AGE_S", "1800"))
+BRIEF_MOVE_PCT = float(os.getenv("BRIEF_MOVE_PCT", "0.5"))
+
+# 'price' and 'news' briefs are per company (subject = ticker), 'portfolio' briefs per user
+BRIEF_KINDS = ("price", "news", "portfolio")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS briefs (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    basis TEXT NOT NULL,
+    audio_path TEXT,
+    built_at REAL NOT NULL
+);
+"""
+
+
+def brief_key(kind: str, subject: str) -> str:
+    return f"{kind}:{subject}"
+
+
+def quote_basis(tickers: List[str], cache: Optional[MarketCache] = None) -> Dict[str, Dict[str, float]]:
+    """Price and fetch time of the cached quote each ticker's brief was built from."""
+    cache = cache or get_market_cache()
+    basis = {}
+    for ticker, (quote, fetched_at) in cache.get_many(tickers, "quote").items():
+        price = quote.get("current_price")
+        if price:
+            basis[ticker] = {"price": float(price), "fetched_at": fetched_at}
+    return basis
+
+
+def moved(basis: Dict[str, Dict[str, float]], current: Dict[str, Any], threshold_pct: float = BRIEF_MOVE_PCT) -> List[str]:
+    """
+    Tickers whose current price is threshold_pct or more away from the brief's basis price.
+    Input: basis from quote_basis; current quotes as returned by MarketCache.get_many(..., 'quote').
+    """
+    moves = []
+    for ticker, base in basis.items():
+        price = current.get(ticker, ({}, 0))[0].get("current_price")
+        if price and abs(float(price) - base["price"]) / base["price"] * 100 >= threshold_pct:
+            moves.append(ticker)
+    return moves
+
+
+class BriefStore:
+    """
+    Precomputed answers for the most common asks (price of a company, "why is X up", portfolio value),
+    built by workers/brief_materializer.py and served by the workflow right after intent classification.
+    Each brief keeps the workflow outputs (narrative, analysis, market/news data), its synthesized audio
+    and freshness metadata: when it was built and the quotes it was built from.
+    """
+
+    def __init__(self, path: str = BRIEF_DB_PATH, audio_dir: str = BRIEF_AUDIO_DIR):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.audio_dir = audio_dir
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, kind, subject, payload, basis, audio_path, built_at FROM briefs WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        brief = dict(row)
+        brief["payload"] = json.loads(brief["payload"])
+        brief["basis"] = json.loads(brief["basis"])
+        return brief
+
+    def built_at(self) -> Dict[str, float]:
+        """key -> build time of every stored brief."""
+        with self._lock:
+            return {row[0]: row[1] for row in self._conn.execute("SELECT key, built_at FROM briefs")}
+
+    def put(self, kind: str, subject: str, payload: Dict[str, Any], basis: Dict[str, Any],
+            audio_src: Optional[str] = None) -> str:
+        """
+        Stores (or replaces) a brief. The audio file is copied next to the store and swapped in atomically,
+        so a reader still streaming the previous version keeps its file.
+        Output: The brief key.
+        """
+        key = brief_key(kind, subject)
+        audio_path = None
+        if audio_src and os.path.exists(audio_src):
+            os.makedirs(self.audio_dir, exist_ok=True)
+            audio_path = os.path.join(self.audio_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".mp3")
+            shutil.copyfile(audio_src, audio_path + ".tmp")
+            os.replace(audio_path + ".tmp", audio_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO briefs (key, kind, subject, payload, basis, audio_path, built_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, subject, json.dumps(payload), json.dumps(basis), audio_path, time.time()))
+        return key
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM briefs WHERE key = ?", (key,))
+
+    @staticmethod
+    def stale_reason(brief: Dict[str, Any], holdings: Optional[Dict[str, float]] = None,
+                     cache: Optional[MarketCache] = None, now: Optional[float] = None) -> Optional[str]:
+        """
+        Why a brief can no longer be served, or None if it can: too old ('age'), no fresh quote to vouch
+        for it ('quote_stale'), a significant price move since it was built ('price_move') or, for
+        portfolio briefs, different holdings ('holdings_changed').
+        """
+        cache = cache or get_market_cache()
+        now = now if now is not None else time.time()
+        if now - brief["built_at"] > BRIEF_MAX_AGE_S:
+            return "age"
+        basis = brief["basis"]
+        if holdings is not None and basis.get("holdings") != holdings:
+            return "holdings_changed"
+        quotes = basis.get("quotes", {})
+        current = cache.get_many(list(quotes), "quote")
+        if any(ticker not in current or not is_fresh(ticker, "quote", current[ticker][1], now) for ticker in quotes):
+            return "quote_stale"
+        if moved(quotes, current):
+            return "price_move"
+        return None
+
+
+_store: Optional[BriefStore] = None
+_store_lock = threading.Lock()
+
+
+def get_brief_store() -> BriefStore:
+    """Process-wide BriefStore at BRIEF_DB_PATH (env) or data/briefs.db."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BriefStore(os.getenv("BRIEF_DB_PATH", BRIEF_DB_PATH))
+        return _store
@@ -0,0 +1,158 @@
+"""
+Per-request time budget shared by every workflow node.
+
+A request carries an absolute `deadline` (epoch seconds) in its state. Each node asks for its slice:
+the remaining time split in proportion to NODE_WEIGHTS over the node and the nodes still ahead of it,
+so an early node that runs long shrinks its own share, not the next node's. Nodes that find their
+slice too small degrade (stale quotes, no news, templated narrative) and report it in 'degradations'.
+
+Speech-to-text has no degraded path, so it is not sliced: it gets its own STT_BUDGET_S and the request
+deadline is pushed back by the time it took (stt_deadline, extend_deadline).
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, List, Optional
+
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "20"))
+STT_BUDGET_S = float(os.getenv("STT_BUDGET_S", "30"))  # STT's own budget, outside REQUEST_DEADLINE_S
+MIN_CALL_S = 0.25  # below this a provider call cannot realistically finish
+
+# Relative share of the budget per pipeline stage; api_agent and news_agent are alternative branches
+NODE_WEIGHTS = {
+    "intent_classifier": 2.0,
+    "load_portfolio": 0.25,
+    "fetch": 3.0,
+    "retriever_agent": 1.5,
+    "analysis_agent": 1.0,
+    "language_agent": 3.5,
+    "voice_agent_tts": 2.0,
+}
+PIPELINE = list(NODE_WEIGHTS)
+STAGE_OF = {"api_agent": "fetch", "news_agent": "fetch"}
+
+_pools: Dict[str, "CallPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot finish inside its slice of the request budget."""
+
+
+def new_deadline(budget_s: Optional[float] = None) -> float:
+    return time.time() + (budget_s if budget_s is not None else REQUEST_DEADLINE_S)
+
+
+def remaining(state: Dict[str, Any]) -> float:
+    """Seconds left in the request budget; a state without a deadline gets a fresh full budget."""
+    deadline = state.get("deadline") or new_deadline()
+    return max(0.0, deadline - time.time())
+
+
+def node_budget(state: Dict[str, Any], node: str) -> float:
+    """Seconds this node may spend: its weighted share of what is left for it and all later stages."""
+    stage = STAGE_OF.get(node, node)
+    ahead = PIPELINE[PIPELINE.index(stage):]
+    if state.get("skip_tts") and "voice_agent_tts" in ahead and stage != "voice_agent_tts":
+        ahead.remove("voice_agent_tts")
+    weights = sum(NODE_WEIGHTS[s] for s in ahead)
+    return remaining(state) * NODE_WEIGHTS[stage] / weights
+
+
+def node_deadline(state: Dict[str, Any], node: str) -> float:
+    """Absolute time by which the node should be done."""
+    return time.time() + node_budget(state, node)
+
+
+def stt_deadline() -> float:
+    """Absolute time by which speech-to-text should be done; independent of the request deadline."""
+    return time.time() + STT_BUDGET_S
+
+
+def extend_deadline(state: Dict[str, Any], seconds: float) -> Dict[str, Any]:
+    """State update moving the request deadline back by seconds spent outside the budget (STT)."""
+    return {"deadline": state["deadline"] + seconds} if state.get("deadline") else {}
+
+
+def time_left(deadline: float) -> float:
+    return max(0.0, deadline - time.time())
+
+
+def call_timeout(deadline: float, cap: float) -> float:
+    """Per-call network timeout: the provider's usual cap, shortened to what is left of the slice."""
+    left = time_left(deadline)
+    if left < MIN_CALL_S:
+        raise DeadlineExceeded("No time left for provider call")
+    return min(cap, left)
+
+
+class CallPool:
+    """
+    Worker threads for one kind of call (bedrock, embedding). Timed-out calls keep their thread until they
+    return, so in-flight calls are counted and new ones are refused once every thread is taken:
+    callers degrade at once instead of queueing behind abandoned work, and one call type cannot
+    starve another.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"deadline-{name}")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _done(self, _: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            if self._in_flight >= self.max_workers:
+                raise DeadlineExceeded(f"All {self.max_workers} workers busy with earlier calls")
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+
+def get_call_pool(name: str) -> CallPool:
+    """Process-wide pool per call type, sized by DEADLINE_POOL_WORKERS."""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = CallPool(name, int(os.getenv("DEADLINE_POOL_WORKERS", "16")))
+        return _pools[name]
+
+
+def run_with_timeout(fn: Callable[..., Any], timeout: float, *args: Any, pool: str = "default", **kwargs: Any) -> Any:
+    """
+    Runs fn on the named call pool and waits at most timeout seconds. For SDK calls without a
+    usable timeout knob (Bedrock via LangChain); on timeout the call is abandoned, not cancelled.
+    Raises DeadlineExceeded on timeout, or at once when the pool is saturated with abandoned calls.
+    """
+    if timeout < MIN_CALL_S:
+        raise DeadlineExceeded("No time left for call")
+    future = get_call_pool(pool).submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        raise DeadlineExceeded(f"Call exceeded {timeout:.2f}s")
+
+
+def boto_config(timeout: float) -> Any:
+    """botocore client config bounding connect/read time to the slice, with no retries past it."""
+    from botocore.config import Config
+    timeout = max(MIN_CALL_S, timeout)
+    return Config(connect_timeout=min(5.0, timeout), read_timeout=timeout, retries={"max_attempts": 1})
+
+
+def degraded(node: str, what: str, detail: Optional[str] = None) -> List[str]:
+    """One 'degradations' entry, e.g. 'api_agent:stale_quotes(AAPL,MSFT)'."""
+    return [f"{node}:{what}" + (f"({detail})" if detail else "")]
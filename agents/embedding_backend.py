@@ -0,0 +1,331 @@
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from agents.logging_utils import get_logger
+from dotenv import load_dotenv
+load_dotenv()
+
+log = get_logger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+HF_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = os.path.join("models", "all-MiniLM-L6-v2-onnx")
+ONNX_MODEL_FILE = "model.int8.onnx"
+EMBEDDING_DIM = 384
+MODEL_WORKER_SOCKET = os.path.join("data", "model_worker.sock")
+SHM_DIR = "/dev/shm"
+MAX_HEADER_BYTES = 64 * 1024 * 1024  # encode requests carry their texts in the header
+
+_encoders: Dict[str, Any] = {}
+_encoders_lock = threading.Lock()
+
+
+class TorchEncoder:
+    """
+    Encodes texts with the PyTorch SentenceTransformer model (the original backend).
+    """
+    name = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+class OnnxEncoder:
+    """
+    Encodes texts with an int8-quantized ONNX export of all-MiniLM-L6-v2 on onnxruntime.
+    Reproduces the SentenceTransformer pipeline: mean pooling over the attention mask, then L2 normalization.
+    """
+    name = "onnx"
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, max_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            export_onnx_model(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = int(os.getenv("EMBEDDING_ONNX_THREADS", os.cpu_count() or 1))
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in ("input_ids", "attention_mask", "token_type_ids")
+                 if name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        mask = tokens["attention_mask"].astype(np.float32)[:, :, None]
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def export_onnx_model(model_dir: str = ONNX_MODEL_DIR) -> str:
+    """
+    Exports all-MiniLM-L6-v2 to ONNX and applies dynamic int8 quantization.
+    Needs torch, transformers and onnx once at export time; inference only needs onnxruntime.
+    Everything is written to a temporary directory next to model_dir and moved in with os.replace,
+    the quantized model last, so a crashed or concurrent export never leaves a partial model behind.
+    Output: Path of the quantized model.
+    """
+    import shutil
+    import tempfile
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(model_dir, exist_ok=True)
+    export_dir = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(os.path.abspath(model_dir)))
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_NAME)
+        model = AutoModel.from_pretrained(HF_MODEL_NAME)
+        model.eval()
+        tokenizer.save_pretrained(export_dir)
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        fp32_path = os.path.join(export_dir, "model.onnx")
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids")}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                fp32_path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+        quantize_dynamic(fp32_path, os.path.join(export_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+        for name in sorted(os.listdir(export_dir), key=lambda name: name == ONNX_MODEL_FILE):
+            os.replace(os.path.join(export_dir, name), os.path.join(model_dir, name))
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+    int8_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+    log.info("Embedding_Backend: exported quantized ONNX model", path=int8_path)
+    return int8_path
+
+
+class MicroBatcher:
+    """
+    Collects encode requests from concurrent callers for up to max_wait_ms and runs them as one batch.
+    Each caller blocks only on its own slice of the batch result.
+    """
+
+    def __init__(self, encoder: Any, max_wait_ms: float = 5.0, max_batch_size: int = 64):
+        self.encoder = encoder
+        self.name = f"{encoder.name}+batched"
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._pending: List[Any] = []
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="embedding-microbatcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return self.encoder.encode([])
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((list(texts), future))
+            self._cond.notify()
+        return future.result()
+
+    def _take_batch(self) -> List[Any]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(t) for t, _ in self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch_size):
+                texts, future = self._pending.pop(0)
+                batch.append((texts, future))
+                size += len(texts)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                embeddings = self.encoder.encode(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+class FrameError(ValueError):
+    """Raised for a frame that is not valid on the model worker wire format; the stream cannot be trusted after it."""
+
+
+def write_frame(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> None:
+    """Model worker wire format: 4-byte length, JSON header (with 'payload_bytes'), raw payload."""
+    data = json.dumps({**header, "payload_bytes": len(payload)}).encode("utf-8")
+    sock.sendall(struct.pack(">I", len(data)) + data + payload)
+
+
+def _read_exact(sock: socket.socket, size: int) -> bytearray:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    read = 0
+    while read < size:
+        n = sock.recv_into(view[read:], size - read)
+        if not n:
+            raise ConnectionError("Model worker connection closed")
+        read += n
+    return buf
+
+
+def read_frame(sock: socket.socket, max_header_bytes: int = MAX_HEADER_BYTES) -> Tuple[Dict[str, Any], bytearray]:
+    """
+    Reads one frame written by write_frame.
+    Raises ConnectionError when the peer closes mid-frame and FrameError for an oversized, undecodable or
+    malformed header.
+    """
+    (size,) = struct.unpack(">I", _read_exact(sock, 4))
+    if size > max_header_bytes:
+        raise FrameError(f"Frame header of {size} bytes exceeds {max_header_bytes}")
+    try:
+        header = json.loads(bytes(_read_exact(sock, size)))
+    except ValueError as e:
+        raise FrameError(f"Undecodable frame header: {e}") from e
+    if not isinstance(header, dict):
+        raise FrameError("Frame header must be a JSON object")
+    payload_bytes = header.get("payload_bytes", 0)
+    if not isinstance(payload_bytes, int) or isinstance(payload_bytes, bool) or payload_bytes < 0:
+        raise FrameError(f"Invalid payload_bytes: {payload_bytes!r}")
+    return header, _read_exact(sock, payload_bytes)
+
+
+def attach_array(header: Dict[str, Any], payload: bytearray) -> np.ndarray:
+    """
+    Array described by a model worker response. Large results arrive in a shared-memory segment the
+    worker wrote: it is mapped and unlinked here, and the array views the mapping directly (the memory
+    is released with the last reference to the array). Small results come inline in the payload.
+    """
+    shape = tuple(header["shape"])
+    dtype = np.dtype(header["dtype"])
+    if not header.get("shm"):
+        return np.frombuffer(payload, dtype=dtype).reshape(shape)
+    path = os.path.join(SHM_DIR, header["shm"])
+    try:
+        with open(path, "r+b") as f:
+            mapping = mmap.mmap(f.fileno(), header["nbytes"])
+    finally:
+        os.unlink(path)
+    return np.frombuffer(mapping, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+class RemoteEncoder:
+    """
+    Encodes through the model worker sidecar (workers/model_worker.py) over a Unix socket, so processes
+    using it never load torch or the model. One persistent connection per thread; a worker restart is
+    retried once on a fresh connection.
+    """
+    name = "remote"
+
+    def __init__(self, socket_path: str = MODEL_WORKER_SOCKET, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytearray]:
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                write_frame(sock, header)
+                response, payload = read_frame(sock)
+                break
+            except (ConnectionError, FileNotFoundError):
+                self._close()
+                if attempt:
+                    raise
+            except (OSError, FrameError):
+                self._close()
+                raise
+        if "error" in response:
+            raise RuntimeError(f"Model worker error: {response['error']}")
+        return response, payload
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        return attach_array(*self.request({"op": "encode", "texts": list(texts)}))
+
+
+def get_encoder(backend: Optional[str] = None) -> Any:
+    """
+    Returns a process-wide encoder for the configured backend, loading the model once.
+    Input: backend name ('torch', 'onnx' or 'remote': the model worker sidecar at MODEL_WORKER_SOCKET);
+    defaults to EMBEDDING_BACKEND (torch).
+    Output: Object with encode(List[str]) -> np.ndarray of L2-normalized embeddings.
+    Set EMBEDDING_BATCH_WAIT_MS > 0 to put a MicroBatcher in front of the encoder.
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "0"))
+    key = f"{backend}:{wait_ms}"
+    with _encoders_lock:
+        if key not in _encoders:
+            if backend == "onnx":
+                encoder = OnnxEncoder()
+            elif backend == "torch":
+                encoder = TorchEncoder()
+            elif backend == "remote":
+                encoder = RemoteEncoder(os.getenv("MODEL_WORKER_SOCKET", MODEL_WORKER_SOCKET))
+            else:
+                raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+            if wait_ms > 0:
+                encoder = MicroBatcher(encoder, max_wait_ms=wait_ms,
+                                       max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH", "64")))
+            _encoders[key] = encoder
+        return _encoders[key]
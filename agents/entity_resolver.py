@@ -0,0 +1,380 @@
+"""
+Company/ticker entity resolution over a large symbol universe.
+
+Aliases (company names, tickers, seed aliases and common speech-to-text misspellings) are compiled into a
+token-level Aho-Corasick automaton, so a transcript is matched in one pass with word boundaries built in,
+in time proportional to the transcript rather than the universe. Tokens no alias covers go through a
+deletion-neighborhood index (edit distance 1, 2 for long words) for fuzzy matches, again by hash lookups
+independent of universe size. Only words of FUZZY_TOKEN_MIN_LEN or more letters that are not common English
+(or a plural of the name) are matched fuzzily, so "apply", "ample" or "apples" never become Apple.
+
+Sources, later ones lower priority when an alias is ambiguous:
+  data/symbols/aliases.json   seed aliases and misspellings: {"TICKER": ["alias", ...]}
+  config.json ticker_map      the companies the assistant was built around
+  data/symbols/universe.csv   full listing universe (symbol,name[,aliases]), see workers/symbol_universe.py;
+                              override with SYMBOL_UNIVERSE_PATH
+Bare tickers from the listing universe only match when spoken/transcribed in capitals ("IBM", "I B M"),
+so tickers that are also words ("NOW", "ALL", "CAT") do not fire on ordinary speech. Listing names also
+get a head-noun alias ("Palantir Technologies" -> "palantir") for casual speech; only seed and config
+aliases are matched fuzzily, so ordinary words never fuzz into listing names ("watch" -> "match").
+"""
+import csv
+import json
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+ALIASES_PATH = os.path.join("data", "symbols", "aliases.json")
+UNIVERSE_PATH = os.getenv("SYMBOL_UNIVERSE_PATH", os.path.join("data", "symbols", "universe.csv"))
+
+PRIORITY_SEED, PRIORITY_CONFIG, PRIORITY_UNIVERSE, PRIORITY_HEAD = 3, 2, 1, 0
+FUZZY_MIN_LEN = 5        # shortest alias in the fuzzy index
+FUZZY_TOKEN_MIN_LEN = 6  # shortest transcript word matched fuzzily
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9&]+")
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc", "llc", "lp", "sa", "ag",
+    "nv", "se", "holdings", "holding", "group", "the", "class", "common", "stock", "shares", "ordinary", "ads",
+    "adr", "american", "depositary", "depository", "units", "unit", "warrants", "warrant", "a", "b", "c", "&",
+}
+# Trailing words of a listing name that casual speech drops ("Ford Motor" -> "ford", "Coinbase Global" -> "coinbase")
+GENERIC_NAME_WORDS = {
+    "technologies", "technology", "tech", "global", "motor", "motors", "group", "international", "industries",
+    "enterprises", "brands", "worldwide", "solutions", "services", "platforms", "communications", "systems",
+    "entertainment", "financial", "therapeutics", "pharmaceuticals", "bancorp", "software", "networks", "labs",
+    "interactive", "semiconductor", "semiconductors", "energy", "resources", "partners",
+}
+# Words that are also listed company names or tickers; never matched from the listing universe or fuzzily
+COMMON_WORDS = {
+    "a", "about", "all", "also", "am", "an", "and", "any", "are", "as", "at", "be", "best", "big", "but", "buy",
+    "by", "can", "car", "cat", "compare", "cost", "could", "day", "do", "does", "down", "each", "earnings",
+    "fast", "first", "for", "from", "fund", "general", "get", "give", "global", "go", "good", "growth", "has",
+    "have", "he", "hold", "holdings", "how", "i", "if", "in", "income", "is", "it", "its", "just", "key", "know",
+    "last", "live", "love", "low", "market", "me", "month", "more", "much", "my", "new", "news", "next", "no",
+    "now", "of", "on", "one", "open", "or", "our", "out", "over", "portfolio", "price", "prices", "real",
+    "recommend", "rising", "falling", "run", "safe", "see", "sell", "share", "shares", "should", "so", "stock",
+    "stocks", "target", "tell", "than", "that", "the", "their", "them", "then", "there", "these", "they", "this",
+    "to", "today", "true", "trust", "up", "us", "value", "versus", "very", "vs", "was", "way", "we", "week",
+    "well", "what", "when", "which", "who", "why", "will", "with", "worth", "year", "years", "you", "your",
+    "after", "again", "back", "bank", "because", "before", "better", "block", "both", "box", "call", "care",
+    "change", "check", "close", "come", "deal", "did", "done", "even", "ever", "find", "five", "free", "gain",
+    "gap", "great", "green", "had", "help", "here", "high", "home", "hope", "idea", "into", "keep", "kind",
+    "like", "line", "long", "look", "lot", "made", "make", "many", "match", "may", "might", "most", "move",
+    "moving", "need", "net", "never", "nice", "only", "other", "own", "part", "pay", "play", "plus", "point",
+    "put", "rate", "right", "rise", "same", "say", "show", "since", "snap", "some", "square", "still", "sure",
+    "take", "think", "time", "top", "trade", "turn", "two", "under", "use", "want", "watch", "where", "while",
+    "win", "work", "yes", "yet",
+}
+
+
+class Alias(NamedTuple):
+    ticker: str
+    text: str
+    priority: int
+    ticker_only: bool  # bare symbol: must appear in capitals in the transcript
+
+
+class Match(NamedTuple):
+    ticker: str
+    alias: str
+    start: int  # first token index
+    end: int    # last token index (inclusive)
+    fuzzy: bool
+
+
+def tokens_of(text: str) -> List[str]:
+    return [t.lower() for t in TOKEN_RE.findall(text.replace("'s ", " ").replace("’s ", " "))]
+
+
+def clean_company_name(name: str) -> str:
+    """'Apple Inc. - Common Stock' -> 'apple'; 'Taiwan Semiconductor Manufacturing Company Ltd.' -> 'taiwan semiconductor manufacturing'."""
+    name = re.split(r"\s+-\s+|,|\(", name)[0]
+    tokens = tokens_of(name)
+    while tokens and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    if tokens and tokens[0] == "the":
+        tokens.pop(0)
+    return " ".join(tokens)
+
+
+def head_name(cleaned: str) -> str:
+    """'palantir technologies' -> 'palantir', 'ford motor' -> 'ford'; the cleaned name itself when nothing generic trails it."""
+    tokens = cleaned.split()
+    while len(tokens) > 1 and tokens[-1] in GENERIC_NAME_WORDS:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def is_common_phrase(text: str) -> bool:
+    """True for names made only of ordinary words ('best buy', 'gap'), which would fire on ordinary speech."""
+    tokens = text.split()
+    return len(text) < 3 or all(token in COMMON_WORDS for token in tokens)
+
+
+def _deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions), early exit past limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def max_distance(word: str) -> int:
+    return 1 if len(word) < 9 else 2
+
+
+class EntityResolver:
+    """Token-level Aho-Corasick automaton over all aliases plus a deletion-neighborhood fuzzy index."""
+
+    def __init__(self, aliases: Iterable[Alias]):
+        self.aliases: List[Alias] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._by_key: Dict[Tuple[str, bool], int] = {}
+        self._fuzzy: Dict[str, Set[int]] = {}
+        self.spelled: Set[str] = set()  # short single-token aliases that may be spelled out letter by letter
+        for alias in aliases:
+            self._add(alias)
+        self._build_failure_links()
+
+    def _add(self, alias: Alias) -> None:
+        tokens = tokens_of(alias.text)
+        if not tokens:
+            return
+        key = (" ".join(tokens), alias.ticker_only)
+        existing = self._by_key.get(key)
+        if existing is not None:
+            # Ambiguous alias: keep the higher-priority source
+            if self.aliases[existing].priority >= alias.priority:
+                return
+            self.aliases[existing] = alias._replace(text=key[0])
+            return
+        alias_id = len(self.aliases)
+        self.aliases.append(alias._replace(text=key[0]))
+        self._by_key[key] = alias_id
+
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(alias_id)
+
+        if len(tokens) == 1 and len(tokens[0]) <= 5:
+            self.spelled.add(tokens[0])
+        # Only curated aliases are matched fuzzily; listing names are too many and too word-like
+        if alias.ticker_only or alias.priority <= PRIORITY_UNIVERSE:
+            return
+        if len(tokens) == 1 and len(tokens[0]) >= FUZZY_MIN_LEN and tokens[0] not in COMMON_WORDS:
+            word = tokens[0]
+            for variant in _deletes(word) | {word}:
+                self._fuzzy.setdefault(variant, set()).add(alias_id)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0) if self._goto[fail].get(token, 0) != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.aliases)
+
+    def _transcript_tokens(self, transcript: str) -> Tuple[List[str], List[bool]]:
+        """Lowercased tokens plus a capitals flag; runs of spelled letters ('I B M') join into one token if it is a known alias."""
+        raw = TOKEN_RE.findall(transcript.replace("'s ", " ").replace("’s ", " "))
+        tokens, upper = [], []
+        i = 0
+        while i < len(raw):
+            j = i
+            while j < len(raw) and len(raw[j]) == 1 and raw[j].isalpha():
+                j += 1
+            joined = "".join(raw[i:j]).lower()
+            if j - i >= 2 and joined in self.spelled:
+                tokens.append(joined)
+                upper.append(True)
+                i = j
+                continue
+            tokens.append(raw[i].lower())
+            upper.append(raw[i].isupper() and len(raw[i]) > 1 or raw[i].isdigit())
+            i += 1
+        return tokens, upper
+
+    def resolve(self, transcript: str) -> List[Match]:
+        """Leftmost-longest, non-overlapping matches in transcript order; fuzzy matches fill uncovered tokens."""
+        tokens, upper = self._transcript_tokens(transcript)
+        candidates = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for alias_id in self._out[node]:
+                alias = self.aliases[alias_id]
+                length = alias.text.count(" ") + 1
+                start = i - length + 1
+                if alias.ticker_only and not all(upper[start:i + 1]):
+                    continue
+                candidates.append((start, -length, -alias.priority, i, alias))
+
+        matches: List[Match] = []
+        covered = [False] * len(tokens)
+        for start, _, _, end, alias in sorted(candidates):
+            if any(covered[start:end + 1]):
+                continue
+            covered[start:end + 1] = [True] * (end - start + 1)
+            matches.append(Match(alias.ticker, alias.text, start, end, False))
+
+        for i, token in enumerate(tokens):
+            if covered[i] or len(token) < FUZZY_TOKEN_MIN_LEN or token in COMMON_WORDS:
+                continue
+            match = self._fuzzy_match(token, i)
+            if match:
+                matches.append(match)
+        return sorted(matches, key=lambda m: m.start)
+
+    def _fuzzy_match(self, token: str, position: int) -> Optional[Match]:
+        candidates: Set[int] = set()
+        for variant in _deletes(token) | {token}:
+            candidates |= self._fuzzy.get(variant, set())
+        best: Dict[str, Tuple[int, int, Alias]] = {}
+        for alias_id in candidates:
+            alias = self.aliases[alias_id]
+            # A plural of the name ('apples') is the ordinary word, not a misspelled company
+            if token in (alias.text + "s", alias.text + "es"):
+                continue
+            limit = max_distance(alias.text)
+            distance = _edit_distance(token, alias.text, limit)
+            if distance <= limit:
+                score = (distance, -alias.priority)
+                if alias.ticker not in best or score < best[alias.ticker][:2]:
+                    best[alias.ticker] = (*score, alias)
+        if not best:
+            return None
+        ranked = sorted(best.values(), key=lambda item: item[:2])
+        # Two different tickers equally close: too ambiguous to guess
+        if len(ranked) > 1 and ranked[0][:2] == ranked[1][:2]:
+            return None
+        alias = ranked[0][2]
+        return Match(alias.ticker, alias.text, position, position, True)
+
+    def tickers(self, transcript: str) -> List[str]:
+        """Distinct tickers mentioned in the transcript, in order of first mention."""
+        return list(dict.fromkeys(match.ticker for match in self.resolve(transcript)))
+
+
+def load_aliases(path: str = ALIASES_PATH) -> List[Alias]:
+    try:
+        with open(path, "r") as f:
+            seed = json.load(f)
+    except FileNotFoundError:
+        return []
+    return [Alias(ticker, text, PRIORITY_SEED, False) for ticker, texts in seed.items() for text in texts]
+
+
+def config_aliases(config_path: str = "config.json") -> List[Alias]:
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    aliases = []
+    for name, ticker in config["ticker_map"].items():
+        aliases.append(Alias(ticker, name, PRIORITY_CONFIG, False))
+        # The assistant's own companies match their ticker in any case ("ibm", "tsm")
+        aliases.append(Alias(ticker, ticker.split(".")[0], PRIORITY_CONFIG, ticker.split(".")[0].lower() in COMMON_WORDS))
+    return aliases
+
+
+def universe_aliases(rows: Iterable[Dict[str, str]]) -> List[Alias]:
+    """
+    Aliases for listing rows ({'symbol', 'name', optional 'aliases' '|'-separated}): the bare symbol, the cleaned
+    name and, at the lowest priority, its head-noun form when exactly one listing has it.
+    Names made only of common words ('best buy', 'gap') are skipped to avoid false hits.
+    """
+    aliases = []
+    heads: Dict[str, Set[str]] = {}
+    for row in rows:
+        symbol = (row.get("symbol") or "").strip().upper()
+        if not symbol:
+            continue
+        aliases.append(Alias(symbol, symbol, PRIORITY_UNIVERSE, True))
+        name = clean_company_name(row.get("name") or "")
+        if not is_common_phrase(name):
+            aliases.append(Alias(symbol, name, PRIORITY_UNIVERSE, False))
+        head = head_name(name)
+        if head != name and not is_common_phrase(head):
+            heads.setdefault(head, set()).add(symbol)
+        for extra in (row.get("aliases") or "").split("|"):
+            if extra.strip():
+                aliases.append(Alias(symbol, extra.strip(), PRIORITY_UNIVERSE, False))
+    aliases.extend(Alias(symbols.pop(), head, PRIORITY_HEAD, False) for head, symbols in heads.items() if len(symbols) == 1)
+    return aliases
+
+
+def load_universe_file(path: str = UNIVERSE_PATH) -> List[Alias]:
+    """Listing universe as CSV with symbol,name[,aliases] columns, see universe_aliases."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return universe_aliases(csv.DictReader(f))
+
+
+_resolver: Optional[EntityResolver] = None
+_signature: Optional[Tuple] = None
+_resolver_lock = threading.Lock()
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_entity_resolver() -> EntityResolver:
+    """Process-wide resolver, rebuilt when config.json, the seed aliases or the universe file change."""
+    global _resolver, _signature
+    signature = (_mtime("config.json"), _mtime(ALIASES_PATH), _mtime(UNIVERSE_PATH))
+    with _resolver_lock:
+        if _resolver is None or signature != _signature:
+            _resolver = EntityResolver(load_aliases() + config_aliases() + load_universe_file())
+            _signature = signature
+        return _resolver
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    resolver = get_entity_resolver()
+    query = " ".join(sys.argv[1:]) or "How are Apple and invidia doing versus I B M?"
+    start = time.perf_counter()
+    found = resolver.resolve(query)
+    print(f"{len(resolver)} aliases, {(time.perf_counter() - start) * 1e6:.0f} us")
+    for match in found:
+        print(match)
@@ -4,29 +4,40 @@ from typing import Dict, Any
 import json
 import os
 import os
+from agents.deadline import DeadlineExceeded, boto_config, degraded, node_deadline, run_with_timeout, time_left
+from agents.logging_utils import get_logger
+from agents.narrative_templates import TEMPLATE_INTENTS, render
 from dotenv import load_dotenv
 load_dotenv() 
 
+log = get_logger(__name__)
+
+def use_template(intent: str, needs_news: bool, mode: str) -> bool:
+    """
+    NARRATIVE_MODE 'auto' (default) renders price, portfolio and error answers from templates and keeps the
+    LLM for compare, recommend and news-driven 'why' questions; 'llm' always calls it; 'template' never does.
+    """
+    if mode == "llm":
+        return False
+    if mode == "template":
+        return True
+    return intent in TEMPLATE_INTENTS and not (intent == "price" and needs_news)
+
 def language_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Synthesizes narrative response using LLM for multiple intents.
-    Input: State with 'market_data', 'analysis', 'retrieved_docs', 'intents', 'transcript'.
-    Output: Updates State with 'narrative': str.
+    Synthesizes narrative response for multiple intents: simple intents from local templates
+    (see use_template), the rest with the LLM.
+    Input: State with 'market_data', 'analysis', 'retrieved_docs', 'intents', 'transcript', 'deadline'.
+    Output: Updates State with 'narrative': str and 'degradations' (intents answered from a template
+    because the LLM could not respond inside the node's slice of the deadline).
     """
     market_data = state["market_data"]
     analysis = state["analysis"]
     retrieved_docs = state["retrieved_docs"]
     intents = state["intents"]
     transcript = state["transcript"]
-    print(f"Language_Agent Input: market_data={market_data}, analysis={analysis}, retrieved_docs={retrieved_docs}, intents={intents}, transcript={transcript}")
-
-    # Load LLM configuration from environment variables
-    model_id = os.getenv("LLM_MODEL_ID")
-    region_name = os.getenv("LLM_REGION")
-    if not model_id or not region_name:
-        raise ValueError("LLM_MODEL_ID or LLM_REGION not set in environment variables")
-
-    llm = ChatBedrock(model_id=model_id, region_name=region_name)
+    log.info("Language_Agent Input", intents=intents, transcript=transcript, market_data=market_data,
+             retrieved_docs=len(retrieved_docs))
 
     # Load ticker_map from config.json
     with open("config.json", "r") as f:
@@ -35,9 +46,25 @@ def language_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     reverse_ticker_map = {v: k for k, v in ticker_map.items()}
 
     narratives = []
+    degradations = []
     needs_news = any(word in transcript.lower() for word in ["why", "rising", "falling", "up", "down"])
+    mode = os.getenv("NARRATIVE_MODE", "auto").lower()
+    llm = None
+    deadline = node_deadline(state, "language_agent")
 
     for intent in intents:
+        if use_template(intent, needs_news, mode):
+            narratives.append(render(intent, state, reverse_ticker_map))
+            continue
+
+        if llm is None:
+            # Load LLM configuration from environment variables
+            model_id = os.getenv("LLM_MODEL_ID")
+            region_name = os.getenv("LLM_REGION")
+            if not model_id or not region_name:
+                raise ValueError("LLM_MODEL_ID or LLM_REGION not set in environment variables")
+            llm = ChatBedrock(model_id=model_id, region_name=region_name, config=boto_config(time_left(deadline)))
+
         if intent == "portfolio":
             prompt_template = """You are a friendly financial advisor. For the query: '{transcript}', generate a concise, humanized narrative (under 100 words) summarizing:
             - Portfolio metrics: total value and holdings from {analysis}.
@@ -96,17 +123,21 @@ def language_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         }
 
         try:
-            response = llm.invoke(prompt.format(
+            response = run_with_timeout(llm.invoke, time_left(deadline), prompt.format(
                 transcript=transcript,
                 market_data=json.dumps(formatted_market_data),
                 analysis=json.dumps(formatted_analysis),
                 retrieved_docs=json.dumps(retrieved_docs if needs_news and intent == "price" else [])
-            ))
+            ), pool="bedrock")
             narratives.append(response.content.strip())
+        except DeadlineExceeded as e:
+            log.warning("Language_Agent Deadline: using template", intent=intent, error=str(e))
+            narratives.append(render(intent, state, reverse_ticker_map))
+            degradations += degraded("language_agent", "template", intent)
         except Exception as e:
-            print(f"Language_Agent Error for {intent}: {e}")
+            log.error("Language_Agent Error", intent=intent, error=str(e))
             narratives.append(f"Error generating response for {intent}.")
 
     narrative = " ".join(narratives) if narratives else "Sorry, I couldn’t process your query."
-    print(f"Language_Agent Output: {narrative}")
-    return {"narrative": narrative}
\ No newline at end of file
+    log.info("Language_Agent Output", narrative=narrative, degradations=degradations)
+    return {"narrative": narrative, "degradations": degradations}
\ No newline at end of file
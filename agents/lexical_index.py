@@ -0,0 +1,83 @@
+from typing import Dict, Any, List, Iterable
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "has", "have",
+    "how", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "s", "so", "stock", "stocks",
+    "tell", "that", "the", "this", "to", "today", "was", "were", "what", "whats", "with", "you",
+}
+
+# Trend words in the query are expanded to the vocabulary headlines actually use
+TREND_EXPANSIONS = {
+    "why": ["because", "after", "amid", "due", "following", "report", "earnings"],
+    "rising": ["rise", "rises", "rose", "gain", "gains", "jump", "jumps", "surge", "surges", "rally", "up", "upgrade", "beat", "beats"],
+    "falling": ["fall", "falls", "fell", "drop", "drops", "slide", "slides", "plunge", "plunges", "down", "downgrade", "miss", "misses"],
+}
+TREND_EXPANSIONS["up"] = TREND_EXPANSIONS["rising"]
+TREND_EXPANSIONS["down"] = TREND_EXPANSIONS["falling"]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into alphanumeric tokens, dropping stopwords."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def build_query_terms(transcript: str, company_names: Iterable[str]) -> Counter:
+    """
+    Builds weighted BM25 query terms from the transcript, resolved company names/tickers and trend expansions.
+    Company names get double weight since they are the strongest relevance signal.
+    """
+    terms = Counter(tokenize(transcript))
+    for name in company_names:
+        for token in tokenize(name):
+            terms[token] += 2
+    for word in list(terms):
+        for expansion in TREND_EXPANSIONS.get(word, []):
+            terms[expansion] += 0.5
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of tokenized documents.
+    Scoring only touches postings of the query terms, so cost scales with matches rather than corpus size.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Any]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((doc_id, tf))
+        self.num_docs = len(documents)
+        self.avg_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def score(self, query_terms: Counter) -> Dict[int, float]:
+        """Returns BM25 scores for every document containing at least one query term."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in query_terms.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def top_n(self, query_terms: Counter, n: int) -> List[int]:
+        """Document ids of the n best lexical matches, best first."""
+        scores = self.score(query_terms)
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:n]
@@ -0,0 +1,190 @@
+"""
+Structured, leveled and sampled logging shared by agents, the orchestrator and workers.
+
+Records are an event name plus keyword fields. Nothing is formatted unless a handler emits the record,
+and payload fields (market data, news, state) are rendered as size-capped summaries (counts, a few keys,
+a short hash) instead of being dumped.
+
+Environment:
+  LOG_LEVEL=INFO                                     root level
+  LOG_LEVELS=agents.retriever_agent=DEBUG,workers=WARNING   per-module levels (logger name prefixes)
+  LOG_FORMAT=text                                    text or json (one JSON object per line)
+  LOG_DEBUG_SAMPLE_RATE=0.01                         share of DEBUG records kept; records carrying a
+                                                     request_id are sampled per request, so a kept
+                                                     request logs all its debug records
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from typing import Dict, Any, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+MAX_ITEMS = 5
+MAX_CHARS = 120
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=4).hexdigest()
+
+
+def summarize(value: Any, max_items: int = MAX_ITEMS, max_chars: int = MAX_CHARS, depth: int = 1) -> Any:
+    """
+    Bounded, JSON-friendly summary of a value.
+    Short scalars pass through; long strings become length + hash + head; dicts and lists become counts,
+    the first max_items keys/items (summarized depth levels deep) and a hash of their keys.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return {"len": len(value), "hash": _digest(value), "head": value[:max_chars]}
+    if isinstance(value, dict):
+        keys = list(value.keys())
+        if len(keys) <= max_items and depth > 0:
+            return {str(k): summarize(value[k], max_items, max_chars, depth - 1) for k in keys}
+        return {"count": len(keys), "keys": [str(k)[:max_chars] for k in keys[:max_items]],
+                "hash": _digest(",".join(map(str, keys)))}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value) if not isinstance(value, (list, tuple)) else value
+        if len(items) <= max_items and depth > 0:
+            return [summarize(item, max_items, max_chars, depth - 1) for item in items]
+        return {"count": len(items), "first": summarize(items[0], max_items, max_chars, 0) if items else None}
+    shape = getattr(value, "shape", None)
+    if shape is not None:
+        return {"type": type(value).__name__, "shape": list(shape)}
+    text = repr(value)
+    return text if len(text) <= max_chars else {"type": type(value).__name__, "len": len(text), "hash": _digest(text)}
+
+
+class Event:
+    """Log message holding an event name and raw fields; summarized and formatted only when emitted."""
+    __slots__ = ("name", "fields", "_rendered")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+        self._rendered: Optional[Dict[str, Any]] = None
+
+    def rendered_fields(self) -> Dict[str, Any]:
+        if self._rendered is None:
+            self._rendered = {key: summarize(value) for key, value in self.fields.items()}
+        return self._rendered
+
+    def __str__(self) -> str:
+        fields = self.rendered_fields()
+        if not fields:
+            return self.name
+        parts = [f"{key}={json.dumps(value, default=str, ensure_ascii=False)}" for key, value in fields.items()]
+        return f"{self.name}: " + " ".join(parts)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event and the summarized fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {"ts": self.formatTime(record), "level": record.levelname, "logger": record.name}
+        if isinstance(record.msg, Event):
+            payload["event"] = record.msg.name
+            payload.update(record.msg.rendered_fields())
+        else:
+            payload["event"] = record.getMessage()
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def debug_sample_rate() -> float:
+    return float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+
+def _sampled(rate: float, request_id: Optional[str]) -> bool:
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    if request_id:
+        return int(hashlib.blake2b(str(request_id).encode(), digest_size=4).hexdigest(), 16) / 0xFFFFFFFF < rate
+    return random.random() < rate
+
+
+class StructuredLogger:
+    """
+    Thin wrapper over logging.Logger taking an event name plus keyword fields:
+        log.info("API_Agent Output", companies=companies, market_data=market_data)
+    The level check happens before any work, DEBUG records are sampled, and fields are summarized lazily.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if level <= logging.DEBUG and not _sampled(debug_sample_rate(), fields.get("request_id")):
+            return
+        self.logger.log(level, Event(event, fields), exc_info=exc_info, stacklevel=3)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """'agents.api_agent=DEBUG,workers=WARNING' -> {'agents.api_agent': 10, 'workers': 30}; bad entries are ignored."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+def configure_logging(force: bool = False) -> None:
+    """
+    Installs the root handler once per process from LOG_LEVEL, LOG_LEVELS and LOG_FORMAT.
+    Safe to call from every entry point (app, runner, workers); later calls are no-ops unless force=True.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured and not force:
+            return
+        root = logging.getLogger()
+        root.setLevel(logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper()))
+        formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "text").lower() == "json" else logging.Formatter(TEXT_FORMAT)
+        if not root.handlers or force:
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(logging.StreamHandler())
+        for handler in root.handlers:
+            handler.setFormatter(formatter)
+        for name, level in parse_levels(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level)
+        _configured = True
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Structured logger for a module; configures logging on first use."""
+    configure_logging()
+    return StructuredLogger(logging.getLogger(name))
@@ -0,0 +1,180 @@
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+MARKET_DB_PATH = os.path.join("data", "market.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ticker TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (ticker, kind)
+);
+CREATE TABLE IF NOT EXISTS history (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    PRIMARY KEY (ticker, date)
+);
+CREATE TABLE IF NOT EXISTS tracked (
+    ticker TEXT PRIMARY KEY,
+    last_requested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS provider_usage (
+    provider TEXT NOT NULL,
+    day TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (provider, day)
+);
+"""
+
+# Free-tier limits; override per deployment plan
+PROVIDER_QUOTAS = {
+    "alpha_vantage": {"per_day": int(os.getenv("ALPHA_VANTAGE_DAILY_QUOTA", "25")),
+                      "per_minute": int(os.getenv("ALPHA_VANTAGE_MINUTE_QUOTA", "5"))},
+    "yfinance": {"per_day": int(os.getenv("YFINANCE_DAILY_QUOTA", "2000")),
+                 "per_minute": int(os.getenv("YFINANCE_MINUTE_QUOTA", "60"))},
+}
+
+
+class MarketCache:
+    """
+    Shared SQLite cache of market data per ticker: 'quote' and 'fundamentals' payloads plus daily close history.
+    Written by api_agent and the market warmer, read by api_agent at query time.
+    Also tracks provider call counts so every process stays inside the same daily quota.
+    """
+
+    def __init__(self, path: str = MARKET_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._minute_windows: Dict[str, deque] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def get(self, ticker: str, kind: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Cached payload and its fetched_at epoch seconds, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM entries WHERE ticker = ? AND kind = ?", (ticker, kind)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def get_many(self, tickers: List[str], kind: str) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        """Cached payloads for several tickers, queried in chunks of 500."""
+        if not tickers:
+            return {}
+        entries: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        for start in range(0, len(tickers), 500):
+            chunk = tickers[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT ticker, payload, fetched_at FROM entries WHERE kind = ? AND ticker IN ({placeholders})",
+                    [kind, *chunk]).fetchall()
+            for ticker, payload, fetched_at in rows:
+                entries[ticker] = (json.loads(payload), fetched_at)
+        return entries
+
+    def put(self, ticker: str, kind: str, payload: Dict[str, Any], fetched_at: Optional[float] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (ticker, kind, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (ticker, kind, json.dumps(payload), fetched_at or time.time()))
+
+    def put_history(self, ticker: str, closes: Dict[str, float]) -> None:
+        """Upserts daily closes keyed by ISO date and marks history as fetched."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO history (ticker, date, close) VALUES (?, ?, ?)",
+                [(ticker, date, float(close)) for date, close in closes.items()])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (ticker, kind, payload, fetched_at) VALUES (?, 'history', ?, ?)",
+                (ticker, json.dumps({"days": len(closes)}), time.time()))
+
+    def get_history(self, ticker: str, since: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Daily (date, close) pairs for a ticker, oldest first, optionally from an ISO date on."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, close FROM history WHERE ticker = ? AND date >= ? ORDER BY date",
+                (ticker, since or "")).fetchall()
+        return [(date, close) for date, close in rows]
+
+    def get_histories(self, tickers: List[str], since: Optional[str] = None) -> Dict[str, List[Tuple[str, float]]]:
+        """Daily (date, close) pairs for many tickers in one query, oldest first per ticker."""
+        histories: Dict[str, List[Tuple[str, float]]] = {ticker: [] for ticker in tickers}
+        for start in range(0, len(tickers), 500):
+            chunk = tickers[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT ticker, date, close FROM history WHERE date >= ? AND ticker IN ({placeholders}) "
+                    "ORDER BY ticker, date", [since or "", *chunk]).fetchall()
+            for ticker, date, close in rows:
+                histories[ticker].append((date, close))
+        return histories
+
+    def track(self, tickers: List[str]) -> None:
+        """Adds tickers users asked about to the tracked universe (warmed and screened like ticker_map)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tracked (ticker, last_requested_at) VALUES (?, ?)",
+                [(ticker, now) for ticker in tickers])
+
+    def tracked_tickers(self, max_age_days: float = 30) -> List[str]:
+        """Tickers requested within max_age_days."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker FROM tracked WHERE last_requested_at >= ? ORDER BY ticker",
+                (time.time() - max_age_days * 86400,)).fetchall()
+        return [row[0] for row in rows]
+
+    def try_acquire(self, provider: str, calls: int = 1) -> bool:
+        """
+        Reserves provider calls against the per-minute (in-process) and per-day (shared) quotas.
+        Output: False if the calls would exceed either quota; nothing is reserved then.
+        """
+        quota = PROVIDER_QUOTAS.get(provider)
+        if not quota:
+            return True
+        now = time.time()
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        with self._lock:
+            window = self._minute_windows.setdefault(provider, deque())
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) + calls > quota["per_minute"]:
+                return False
+            # Check and increment in one conditional UPDATE so concurrent processes cannot both pass the check
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO provider_usage (provider, day, calls) VALUES (?, ?, 0)", (provider, day))
+                reserved = self._conn.execute(
+                    "UPDATE provider_usage SET calls = calls + ? WHERE provider = ? AND day = ? AND calls + ? <= ?",
+                    (calls, provider, day, calls, quota["per_day"])).rowcount
+            if not reserved:
+                return False
+            window.extend([now] * calls)
+        return True
+
+
+_cache: Optional[MarketCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_market_cache() -> MarketCache:
+    """Process-wide MarketCache at MARKET_DB_PATH (env) or data/market.db."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MarketCache(os.getenv("MARKET_DB_PATH", MARKET_DB_PATH))
+        return _cache
@@ -0,0 +1,70 @@
+from typing import Dict, Any, Optional
+import os
+import time
+from datetime import datetime, time as dtime, timedelta
+from zoneinfo import ZoneInfo
+
+# Regular trading sessions per exchange, in local exchange time. Holidays are not modelled;
+# on a holiday the data simply stays fresh from the previous close.
+EXCHANGES: Dict[str, Dict[str, Any]] = {
+    "US": {"tz": "America/New_York", "sessions": [(dtime(9, 30), dtime(16, 0))]},
+    "KS": {"tz": "Asia/Seoul", "sessions": [(dtime(9, 0), dtime(15, 30))]},
+    "T": {"tz": "Asia/Tokyo", "sessions": [(dtime(9, 0), dtime(11, 30)), (dtime(12, 30), dtime(15, 30))]},
+    "HK": {"tz": "Asia/Hong_Kong", "sessions": [(dtime(9, 30), dtime(12, 0)), (dtime(13, 0), dtime(16, 0))]},
+}
+
+QUOTE_TTL_OPEN_S = float(os.getenv("QUOTE_TTL_OPEN_S", "300"))
+FUNDAMENTALS_TTL_S = float(os.getenv("FUNDAMENTALS_TTL_S", str(24 * 3600)))
+
+
+def exchange_for(ticker: str) -> str:
+    """Exchange code from the ticker suffix (.KS, .T, .HK); anything else trades in the US."""
+    suffix = ticker.rsplit(".", 1)[1].upper() if "." in ticker else ""
+    return suffix if suffix in EXCHANGES else "US"
+
+
+def _local_now(exchange: str, now: Optional[float]) -> datetime:
+    return datetime.fromtimestamp(now if now is not None else time.time(), ZoneInfo(EXCHANGES[exchange]["tz"]))
+
+
+def is_market_open(ticker: str, now: Optional[float] = None) -> bool:
+    """True while the ticker's exchange is inside a regular trading session."""
+    exchange = exchange_for(ticker)
+    local = _local_now(exchange, now)
+    if local.weekday() >= 5:
+        return False
+    return any(start <= local.time() < end for start, end in EXCHANGES[exchange]["sessions"])
+
+
+def last_close(ticker: str, now: Optional[float] = None) -> float:
+    """Epoch seconds of the most recent regular session close at or before now."""
+    exchange = exchange_for(ticker)
+    local = _local_now(exchange, now)
+    close_time = EXCHANGES[exchange]["sessions"][-1][1]
+    for days_back in range(8):
+        day = local.date() - timedelta(days=days_back)
+        if day.weekday() >= 5:
+            continue
+        close = datetime.combine(day, close_time, tzinfo=local.tzinfo)
+        if close <= local:
+            return close.timestamp()
+    return 0.0
+
+
+def is_fresh(ticker: str, kind: str, fetched_at: float, now: Optional[float] = None) -> bool:
+    """
+    Freshness policy for cached market data, tuned to the ticker's market hours.
+    - quote: younger than QUOTE_TTL_OPEN_S while the market is open; otherwise fetched after the last close.
+    - history: fetched after the last close (daily bars only change once per session).
+    - fundamentals: younger than FUNDAMENTALS_TTL_S.
+    """
+    now = now if now is not None else time.time()
+    if kind == "quote":
+        if is_market_open(ticker, now):
+            return now - fetched_at < QUOTE_TTL_OPEN_S
+        return fetched_at >= last_close(ticker, now)
+    if kind == "history":
+        return fetched_at >= last_close(ticker, now)
+    if kind == "fundamentals":
+        return now - fetched_at < FUNDAMENTALS_TTL_S
+    raise ValueError(f"Unknown market data kind: {kind}")
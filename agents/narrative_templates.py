@@ -0,0 +1,192 @@
+"""
+Deterministic narratives for simple intents, rendered locally instead of with an LLM call.
+
+Price and portfolio answers are a few numbers in one or two sentences, so they are filled into varied,
+human-sounding templates. The template is picked from a hash of the query and company, so the same
+question gets the same wording while different questions and companies vary. Compare and recommend
+templates are plainer and only used when the LLM is unavailable or out of time.
+"""
+import zlib
+from typing import Dict, Any, List, Optional
+
+TEMPLATE_INTENTS = ("price", "portfolio", "error")
+
+PRICE = [
+    "{name}'s stock is trading at {price}{change}.",
+    "{name} is at {price} right now{change}.",
+    "Shares of {name} are going for {price}{change}.",
+    "{name} last traded at {price}{change}.",
+]
+CHANGE_UP = [", up {pct} today", ", {pct} higher on the day"]
+CHANGE_DOWN = [", down {pct} today", ", {pct} lower on the day"]
+CHANGE_FLAT = [", roughly flat today", ", little changed on the day"]
+HISTORY = [
+    " That's {direction} from {past} {when}.",
+    " {when_cap}, it was at {past}, so it's {direction} {move} since then.",
+]
+HISTORY_FLAT = [
+    " That's unchanged from {past} {when}.",
+    " {when_cap}, it was at {past} too, so it hasn't moved since then.",
+]
+PE = [" Its PE ratio is {pe}.", " It trades at {pe} times earnings."]
+PRICE_MISSING = [
+    "I couldn't get a current price for {name} right now.",
+    "Price data for {name} isn't available at the moment.",
+]
+NO_COMPANY = "Which company would you like a price for? Try asking about Apple or Tesla, for example."
+
+PORTFOLIO = [
+    "Your portfolio is worth {total}, with {top}.",
+    "You're holding {total} in total; your biggest positions are {top}.",
+    "Your holdings add up to {total}, led by {top}.",
+]
+PORTFOLIO_SINGLE = [
+    "Your portfolio is worth {total}, all of it in {name}.",
+    "You're holding {total}, entirely in {name}.",
+]
+PORTFOLIO_MORE = [" You have {count} other {positions} as well.", " {count_cap} smaller {positions} {make} up the rest."]
+PORTFOLIO_PARTIAL = [
+    " I couldn't price {names}, so {they_are} left out of the total.",
+    " {names_cap} {is_are} missing price data and {is_are} not counted.",
+]
+PORTFOLIO_UNVALUED = "Unable to value your portfolio due to missing market data. Please try again in a moment."
+PORTFOLIO_EMPTY = "Your portfolio doesn't have any holdings yet."
+
+ERROR = [
+    "Sorry, I couldn’t understand your query. Please try rephrasing.",
+    "Sorry, I didn't catch that. Could you rephrase your question?",
+]
+
+
+def _pick(options: List[str], *keys: Any) -> str:
+    return options[zlib.crc32("|".join(map(str, keys)).encode("utf-8")) % len(options)]
+
+
+def money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).rstrip("%")) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _join(items: List[str]) -> str:
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def company_name(ticker: str, names: Dict[str, str]) -> str:
+    """Company name from reverse_ticker_map, falling back to the bare ticker."""
+    return names.get(ticker, ticker.split(".")[0])
+
+
+def render_price(companies: List[str], market_data: Dict[str, Any], names: Dict[str, str],
+                 time_query: Optional[str] = None, seed: str = "") -> str:
+    """One or two sentences per company: price, today's move, the move since time_query and PE when known."""
+    tickers = companies or [t for t in market_data if "error" not in market_data[t]][:3]
+    if not tickers:
+        return NO_COMPANY
+    sentences = []
+    for ticker in tickers:
+        data = market_data.get(ticker, {})
+        name = company_name(ticker, names)
+        price = _number(data.get("current_price"))
+        if price is None or "error" in data:
+            sentences.append(_pick(PRICE_MISSING, seed, ticker).format(name=name))
+            continue
+        pct = _number(data.get("change_percent"))
+        if pct is None:
+            change = ""
+        elif abs(pct) < 0.05:
+            change = _pick(CHANGE_FLAT, seed, ticker)
+        else:
+            change = _pick(CHANGE_UP if pct > 0 else CHANGE_DOWN, seed, ticker).format(pct=f"{abs(pct):.2f}%")
+        sentence = _pick(PRICE, seed, ticker).format(name=name, price=money(price), change=change)
+
+        past = _number(data.get("historical_price"))
+        if past and time_query:
+            move = (price - past) / past * 100
+            # Moves that round to 0.0% read as "unchanged", without a percentage
+            templates = HISTORY_FLAT if abs(move) < 0.05 else HISTORY
+            sentence += _pick(templates, seed, ticker, "history").format(
+                direction="up" if move > 0 else "down", past=money(past), when=time_query,
+                when_cap=time_query.capitalize(), move=f"{abs(move):.1f}%")
+        pe = _number(data.get("pe_ratio"))
+        if pe:
+            sentence += _pick(PE, seed, ticker, "pe").format(pe=f"{pe:.2f}")
+        sentences.append(sentence)
+    return " ".join(sentences)
+
+
+def render_portfolio(metrics: Dict[str, Any], names: Dict[str, str], seed: str = "") -> str:
+    """Total value, the three largest positions and any holdings that could not be priced."""
+    holdings = metrics.get("holdings", {})
+    if not holdings:
+        return PORTFOLIO_EMPTY
+    priced = sorted(((t, h["value"]) for t, h in holdings.items() if h.get("value")), key=lambda item: -item[1])
+    total = metrics.get("total_value") or 0
+    if not priced or not total:
+        return PORTFOLIO_UNVALUED
+
+    if len(priced) == 1:
+        text = _pick(PORTFOLIO_SINGLE, seed).format(total=money(total), name=company_name(priced[0][0], names))
+    else:
+        top = [f"{money(value)} in {company_name(ticker, names)}" for ticker, value in priced[:3]]
+        text = _pick(PORTFOLIO, seed).format(total=money(total), top=_join(top))
+    if len(priced) > 3:
+        count = len(priced) - 3
+        text += _pick(PORTFOLIO_MORE, seed).format(count=count if count > 1 else "one", count_cap=count if count > 1 else "One",
+                                                   positions="positions" if count > 1 else "position",
+                                                   make="make" if count > 1 else "makes")
+
+    unpriced = [company_name(t, names) for t, h in holdings.items() if not h.get("value")]
+    if unpriced:
+        shown = _join(unpriced[:3] + ([f"{len(unpriced) - 3} others"] if len(unpriced) > 3 else []))
+        plural = len(unpriced) > 1
+        text += _pick(PORTFOLIO_PARTIAL, seed, "partial").format(
+            names=shown, names_cap=shown[0].upper() + shown[1:], they_are="they are" if plural else "it is",
+            is_are="are" if plural else "is")
+    return text
+
+
+def render_compare(comparisons: Dict[str, Any], names: Dict[str, str]) -> str:
+    parts = []
+    for ticker, data in comparisons.items():
+        price = _number(data.get("current_price"))
+        if not price:
+            parts.append(f"no price for {company_name(ticker, names)}")
+            continue
+        pe = _number(data.get("pe_ratio"))
+        parts.append(f"{company_name(ticker, names)} at {money(price)}" + (f" with a PE of {pe:.2f}" if pe else ""))
+    return (_join(parts)[0].upper() + _join(parts)[1:] + ".") if parts else "Comparison data is unavailable right now."
+
+
+def render_recommend(recommendations: List[Dict[str, Any]], names: Dict[str, str]) -> str:
+    sentences = []
+    for rec in recommendations[:2]:
+        if rec.get("ticker"):
+            sentences.append(f"Consider {'selling' if rec['action'] == 'sell' else 'buying'} "
+                             f"{company_name(rec['ticker'], names)}: {rec['reason']}.")
+        else:
+            sentences.append(rec["reason"])
+    return " ".join(sentences) or "I don't have a clear recommendation right now."
+
+
+def render(intent: str, state: Dict[str, Any], names: Dict[str, str]) -> str:
+    """
+    Narrative for one intent from workflow state ('companies', 'market_data', 'analysis', 'time_query',
+    'transcript'); names is the reverse ticker map.
+    """
+    seed = state.get("transcript", "")
+    analysis = state.get("analysis") or {}
+    if intent == "price":
+        return render_price(state.get("companies", []), state.get("market_data", {}), names, state.get("time_query"), seed)
+    if intent == "portfolio":
+        return render_portfolio(analysis.get("portfolio_metrics", {}), names, seed)
+    if intent == "compare":
+        return render_compare(analysis.get("comparisons", {}), names)
+    if intent == "recommend":
+        return render_recommend(analysis.get("recommendations", []), names)
+    return _pick(ERROR, seed)
@@ -1,43 +1,149 @@
 import json
 import requests
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import os
+from agents.news_store import get_news_store, normalize_article
+from agents.deadline import MIN_CALL_S, call_timeout, degraded, node_deadline, time_left
+from agents.speculation import get_speculation, result as speculation_result
+from agents.logging_utils import get_logger
 from dotenv import load_dotenv
-load_dotenv() 
-def news_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+load_dotenv()
+
+log = get_logger(__name__)
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+def get_news_api_key() -> Optional[str]:
     """
-    Fetches news articles for companies using NewsAPI.
-    Input: State with 'companies'.
-    Output: Update State with 'news_data': Dict[str, List[Dict]].
+    NewsAPI key from NEWS_API_KEY, falling back to config.json's api_keys.news_api if present.
     """
-    companies = state["companies"]
-    print(f"News_Agent Input: companies={companies}")
+    api_key = os.getenv("NEWS_API_KEY")
+    if api_key:
+        return api_key
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    return config.get("api_keys", {}).get("news_api")
 
+def company_name(ticker: str) -> str:
+    """Display name of a ticker from config.json's ticker_map; the ticker itself when it is not listed."""
     with open("config.json", "r") as f:
         config = json.load(f)
-    api_key = config["api_keys"]["news_api"]
+    return next((name for name, mapped in config.get("ticker_map", {}).items() if mapped == ticker), ticker)
 
+def build_query(ticker: str, name: str) -> str:
+    """NewsAPI query: exact company name when known, ticker otherwise."""
+    return f'"{name}"' if name != ticker else ticker.split(".")[0]
 
+def fetch_news(query: str, api_key: str, from_time: str, page_size: int = 50, timeout: float = 10,
+               to_time: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fetches and normalizes one page of NewsAPI articles for a query published between from_time and to_time,
+    newest first.
+    Output: List of normalized articles (see news_store.normalize_article).
+    """
+    params = {
+        "q": query,
+        "from": from_time,
+        "sortBy": "publishedAt",
+        "pageSize": page_size,
+        "apiKey": api_key,
+    }
+    if to_time:
+        params["to"] = to_time
+    response = requests.get(NEWS_API_URL, params=params, timeout=timeout)
+    data = response.json()
+    if data.get("status") != "ok":
+        raise Exception(data.get("message", "NewsAPI request failed"))
+    articles = [normalize_article(article) for article in data.get("articles", [])]
+    return [article for article in articles if article]
+
+def fetch_news_since(query: str, api_key: str, from_time: str, max_pages: int, page_size: int = 50,
+                     timeout: float = 10, to_time: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool, int]:
+    """
+    Fetches every article published between from_time and to_time (default: now), walking back from the
+    newest one page at a time (each page ends where the previous one's oldest article was published)
+    until from_time is reached.
+    Output: (articles, complete, requests made); complete is False when max_pages ran out before from_time.
+    """
+    articles: List[Dict[str, Any]] = []
+    for pages in range(1, max_pages + 1):
+        page = fetch_news(query, api_key, from_time, page_size, timeout, to_time)
+        articles.extend(page)
+        if len(page) < page_size:
+            return articles, True, pages
+        oldest = min(article["published_at"] for article in page)
+        if oldest <= from_time or oldest == to_time:
+            return articles, True, pages
+        to_time = oldest
+    return articles, False, max_pages
+
+def ingest_live(company: str, api_key: str, deadline: Optional[float] = None) -> int:
+    """
+    Live NewsAPI fetch for a ticker the ingestion worker has not covered yet, written to the news store.
+    Uses the same query as the worker. Also the speculative fetch intent_classifier starts (see agents/speculation.py).
+    Only one page is fetched, so the worker's incremental cursor is left alone; it backfills the ticker itself.
+    Output: Number of articles stored.
+    """
+    store = get_news_store()
+    from_time = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    articles = fetch_news(build_query(company, company_name(company)), api_key, from_time,
+                          timeout=call_timeout(deadline, 10) if deadline else 10)
+    store.upsert_articles(company, articles)
+    store.mark_live_fetched(company)
+    return len(articles)
+
+def prefetch_news(company: str, deadline: Optional[float] = None) -> int:
+    """Speculative live fetch, only for tickers news_agent would fetch live itself."""
+    api_key = get_news_api_key()
+    if os.getenv("NEWS_LIVE_FALLBACK", "1") != "1" or not api_key or get_news_store().get_cursor(company) is not None:
+        return 0
+    return ingest_live(company, api_key, deadline)
+
+def news_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reads news articles for companies from the local news store filled by workers/news_ingestion.py.
+    Falls back to a live NewsAPI fetch only for tickers the worker has never ingested, and only while
+    the node's slice of the request deadline lasts. Articles a follow-up turn already read (state['context'])
+    are reused without touching the store; live fetches intent_classifier started speculatively are waited on.
+    Input: State with 'companies', 'deadline', 'context'.
+    Output: Update State with 'news_data': Dict[str, List[Dict]] and 'degradations'.
+    """
+    companies = state["companies"]
+    log.info("News_Agent Input", companies=companies)
 
+    store = get_news_store()
+    limit = int(os.getenv("NEWS_ARTICLES_PER_COMPANY", "10"))
+    live_fallback = os.getenv("NEWS_LIVE_FALLBACK", "1") == "1"
 
+    deadline = node_deadline(state, "news_agent")
     news_data = {}
+    skipped = []
+    remembered = (state.get("context") or {}).get("news_data", {})
+    speculated = get_speculation().take(state.get("request_id"), "news",
+                                        [company for company in companies if company not in remembered])
+    for future in speculated.values():
+        speculation_result(future, deadline)
     for company in companies:
+        if company in remembered:
+            news_data[company] = remembered[company]["articles"]
+            continue
         try:
-            url = f"https://newsapi.org/v2/everything?q={company}&apiKey={api_key}&from={(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')}&sortBy=relevancy"
-            response = requests.get(url)
-            data = response.json()
-            if data.get("status") == "ok":
-                news_data[company] = [
-                    {"title": article["title"], "content": article.get("description", ""), "url": article["url"]}
-                    for article in data.get("articles", [])[:5]
-                ]
-            else:
-                print(f"News_Agent Error for {company}: {data.get('message')}")
-                news_data[company] = []
+            if live_fallback and store.get_cursor(company) is None:
+                api_key = get_news_api_key()
+                if api_key and time_left(deadline) < MIN_CALL_S:
+                    skipped.append(company)
+                elif api_key:
+                    ingest_live(company, api_key, deadline)
+            news_data[company] = [
+                {"title": article["title"], "content": article["content"], "url": article["url"]}
+                for article in store.recent_articles(company, limit=limit)
+            ]
         except Exception as e:
-            print(f"News_Agent Error for {company}: {e}")
+            log.error("News_Agent Error", company=company, error=str(e))
             news_data[company] = []
 
-    print(f"News_Agent Output: news_data={news_data}")
-    return {"news_data": news_data}
\ No newline at end of file
+    log.info("News_Agent Output", articles={company: len(articles) for company, articles in news_data.items()},
+             skipped=skipped, reused=sum(1 for company in companies if company in remembered))
+    degradations = degraded("news_agent", "live_fetch_skipped", ",".join(skipped)) if skipped else []
+    return {"news_data": news_data, "degradations": degradations}
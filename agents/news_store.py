@@ -0,0 +1,159 @@
+from typing import Dict, Any, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+NEWS_DB_PATH = os.path.join("data", "news.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    ticker TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    url TEXT NOT NULL,
+    source TEXT,
+    published_at TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (ticker, article_id)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_ticker_published ON articles (ticker, published_at DESC);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    ticker TEXT PRIMARY KEY,
+    last_published_at TEXT,
+    last_run_at REAL NOT NULL,
+    resume_before TEXT,
+    resume_newest TEXT
+);
+"""
+# Columns added after the first release; existing databases get them on open
+INGEST_STATE_COLUMNS = {"resume_before": "TEXT", "resume_newest": "TEXT"}
+
+
+def normalize_url(url: str) -> str:
+    """Drops query strings and fragments (tracking params) so syndicated copies share one key."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def normalize_article(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Normalizes a NewsAPI article into the store schema.
+    Output: Dict with article_id, title, content, url, source, published_at; None for unusable articles.
+    """
+    title = (raw.get("title") or "").strip()
+    url = (raw.get("url") or "").strip()
+    if not title or not url or title == "[Removed]":
+        return None
+    content = " ".join((raw.get("description") or raw.get("content") or "").split())
+    published_at = raw.get("publishedAt") or raw.get("published_at") or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    key = normalize_url(url) or title.lower()
+    return {
+        "article_id": hashlib.sha1(key.encode("utf-8")).hexdigest(),
+        "title": title,
+        "content": content,
+        "url": url,
+        "source": (raw.get("source") or {}).get("name") if isinstance(raw.get("source"), dict) else raw.get("source"),
+        "published_at": published_at,
+    }
+
+
+class NewsStore:
+    """
+    Local SQLite store of normalized, deduplicated articles per ticker, plus per-ticker ingestion cursors.
+    Safe to share across threads; the ingestion worker writes while news_agent reads.
+    """
+
+    def __init__(self, path: str = NEWS_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(ingest_state)")}
+            for column, kind in INGEST_STATE_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE ingest_state ADD COLUMN {column} {kind}")
+
+    def upsert_articles(self, ticker: str, articles: List[Dict[str, Any]]) -> int:
+        """Inserts normalized articles, ignoring ones already stored. Output: number of new articles."""
+        now = time.time()
+        rows = [(ticker, a["article_id"], a["title"], a["content"], a["url"], a.get("source"), a["published_at"], now)
+                for a in articles]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO articles (ticker, article_id, title, content, url, source, published_at, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self._conn.total_changes - before
+
+    def recent_articles(self, ticker: str, limit: int = 10, max_age_days: int = 30) -> List[Dict[str, Any]]:
+        """Most recent articles for a ticker within max_age_days, newest first."""
+        since = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, content, url, source, published_at FROM articles "
+                "WHERE ticker = ? AND published_at >= ? ORDER BY published_at DESC LIMIT ?",
+                (ticker, since, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_cursor(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Ingestion cursor for a ticker, or None if never fetched: last_published_at and last_run_at, plus
+        resume_before/resume_newest while a pull that hit its page limit still has a gap to backfill.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_published_at, last_run_at, resume_before, resume_newest FROM ingest_state WHERE ticker = ?",
+                (ticker,)).fetchone()
+        return dict(row) if row else None
+
+    def set_cursor(self, ticker: str, last_published_at: Optional[str], resume_before: Optional[str] = None,
+                   resume_newest: Optional[str] = None) -> None:
+        """
+        Advances the cursor (None keeps it) and sets or clears the backfill resume point.
+        Input: resume_before is the oldest article fetched by an incomplete pull; resume_newest is the newest,
+        where the cursor moves once the gap below resume_before is filled.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO ingest_state (ticker, last_published_at, last_run_at, resume_before, resume_newest) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(ticker) DO UPDATE SET "
+                "last_published_at = COALESCE(excluded.last_published_at, ingest_state.last_published_at), "
+                "last_run_at = excluded.last_run_at, resume_before = excluded.resume_before, "
+                "resume_newest = excluded.resume_newest",
+                (ticker, last_published_at, time.time(), resume_before, resume_newest))
+
+    def mark_live_fetched(self, ticker: str) -> None:
+        """Records that a live fetch covered the ticker, without moving the worker's cursor or delaying its next pull."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO ingest_state (ticker, last_published_at, last_run_at) VALUES (?, NULL, 0)",
+                (ticker,))
+
+    def prune(self, max_age_days: int = 90) -> int:
+        """Deletes articles older than max_age_days. Output: number of deleted rows."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM articles WHERE published_at < ?", (cutoff,)).rowcount
+
+
+_store: Optional[NewsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_news_store() -> NewsStore:
+    """Process-wide NewsStore at NEWS_DB_PATH (env) or data/news.db."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore(os.getenv("NEWS_DB_PATH", NEWS_DB_PATH))
+        return _store
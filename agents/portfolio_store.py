@@ -0,0 +1,201 @@
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import os
+import re
+import threading
+import numpy as np
+
+DEFAULT_USER = "default"
+LEGACY_PORTFOLIO_PATH = os.path.join("data", "portfolio.json")
+PORTFOLIO_DIR = os.path.join("data", "portfolios")
+
+
+class SymbolTable:
+    """Process-wide ticker <-> integer index mapping shared by all portfolios."""
+
+    def __init__(self):
+        self.tickers: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, ticker: str) -> int:
+        idx = self.index.get(ticker)
+        if idx is None:
+            with self._lock:
+                idx = self.index.get(ticker)
+                if idx is None:
+                    idx = len(self.tickers)
+                    self.tickers.append(ticker)
+                    self.index[ticker] = idx
+        return idx
+
+    def intern_many(self, tickers: List[str]) -> np.ndarray:
+        return np.fromiter((self.intern(t) for t in tickers), dtype=np.int32, count=len(tickers))
+
+
+SYMBOLS = SymbolTable()
+
+
+class Portfolio:
+    """
+    Columnar holdings of one user: ticker_idx (int32 indices into SYMBOLS) and shares (float64).
+    The dict view in `holdings` is built lazily once per version, not per query.
+    Portfolios handed out by the store are never modified; updates go to a copy (see update_positions).
+    """
+
+    def __init__(self, user_id: str, ticker_idx: np.ndarray, shares: np.ndarray, version: int = 0,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.user_id = user_id
+        self.ticker_idx = ticker_idx
+        self.shares = shares
+        self.version = version
+        self.extra = extra or {}  # other top-level fields of the file (e.g. total_value), written back unchanged
+        self._row_of = {int(idx): row for row, idx in enumerate(ticker_idx)}
+        self._holdings: Optional[Dict[str, float]] = None
+
+    def __len__(self) -> int:
+        return len(self.ticker_idx)
+
+    @property
+    def tickers(self) -> List[str]:
+        return [SYMBOLS.tickers[i] for i in self.ticker_idx]
+
+    @property
+    def holdings(self) -> Dict[str, float]:
+        if self._holdings is None:
+            self._holdings = dict(zip(self.tickers, self.shares.tolist()))
+        return self._holdings
+
+    def copy(self) -> "Portfolio":
+        return Portfolio(self.user_id, self.ticker_idx.copy(), self.shares.copy(), self.version, dict(self.extra))
+
+    def set_position(self, ticker: str, shares: float) -> None:
+        """Sets one position in place, on a copy no reader holds yet; shares <= 0 removes it."""
+        idx = SYMBOLS.intern(ticker)
+        row = self._row_of.get(idx)
+        if row is not None and shares > 0:
+            self.shares[row] = shares
+        elif row is not None:
+            keep = np.arange(len(self.ticker_idx)) != row
+            self.ticker_idx, self.shares = self.ticker_idx[keep], self.shares[keep]
+            self._row_of = {int(i): r for r, i in enumerate(self.ticker_idx)}
+        elif shares > 0:
+            self._row_of[idx] = len(self.ticker_idx)
+            self.ticker_idx = np.append(self.ticker_idx, np.int32(idx))
+            self.shares = np.append(self.shares, np.float64(shares))
+        self.version += 1
+        self._holdings = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {**self.extra, "version": self.version, "holdings": self.holdings}
+
+
+class PortfolioStore:
+    """
+    Portfolios keyed by user/session id, each persisted as data/portfolios/<user_id>.json.
+    The default user reads the legacy data/portfolio.json. Parsed portfolios are cached and only
+    re-read when the file's mtime or size changes; position updates are applied to a copy, persisted and
+    swapped into the cache, so readers keep a consistent snapshot.
+    """
+
+    def __init__(self, portfolio_dir: str = PORTFOLIO_DIR, legacy_path: str = LEGACY_PORTFOLIO_PATH):
+        self.portfolio_dir = portfolio_dir
+        self.legacy_path = legacy_path
+        self._cache: Dict[str, Tuple[Tuple[int, int], Portfolio]] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, user_id: str) -> str:
+        if user_id == DEFAULT_USER:
+            return self.legacy_path
+        if not re.fullmatch(r"[A-Za-z0-9_.-]{1,128}", user_id) or user_id.startswith("."):
+            raise ValueError(f"Invalid user id: {user_id!r}")
+        return os.path.join(self.portfolio_dir, f"{user_id}.json")
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return (0, 0)
+
+    def _parse(self, user_id: str, path: str) -> Portfolio:
+        data: Dict[str, Any] = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r") as f:
+                data = json.load(f)
+        holdings = data.get("holdings", {})
+        tickers = list(holdings)
+        shares = np.fromiter((float(holdings[t]) for t in tickers), dtype=np.float64, count=len(tickers))
+        extra = {key: value for key, value in data.items() if key not in ("holdings", "version")}
+        return Portfolio(user_id, SYMBOLS.intern_many(tickers), shares, int(data.get("version", 0)), extra)
+
+    def _get_locked(self, user_id: str, path: str) -> Portfolio:
+        signature = self._signature(path)
+        cached = self._cache.get(user_id)
+        if cached and cached[0] == signature:
+            return cached[1]
+        portfolio = self._parse(user_id, path)
+        self._cache[user_id] = (signature, portfolio)
+        return portfolio
+
+    def get(self, user_id: str = DEFAULT_USER) -> Portfolio:
+        """Cached portfolio for a user, re-parsed only when its file changed."""
+        path = self.path_for(user_id)
+        with self._lock:
+            return self._get_locked(user_id, path)
+
+    def update_positions(self, user_id: str, updates: Dict[str, float]) -> Portfolio:
+        """
+        Applies absolute share counts (0 removes a position) and persists the portfolio atomically.
+        Input: Dict of ticker -> new share count.
+        """
+        path = self.path_for(user_id)
+        with self._lock:
+            portfolio = self._get_locked(user_id, path).copy()
+            for ticker, shares in updates.items():
+                portfolio.set_position(ticker, float(shares))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(portfolio.to_json(), f, indent=2)
+            os.replace(tmp_path, path)
+            self._cache[user_id] = (self._signature(path), portfolio)
+        return portfolio
+
+
+_store: Optional[PortfolioStore] = None
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store() -> PortfolioStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PortfolioStore()
+        return _store
+
+
+def session_user(query_params: Dict[str, str]) -> str:
+    """
+    Portfolio user for a UI session. ?user= picks any stored portfolio, so it is only honoured where access
+    is trusted (PORTFOLIO_USER_PARAM=1); otherwise every session gets the default portfolio.
+    """
+    if os.getenv("PORTFOLIO_USER_PARAM", "0") != "1":
+        return DEFAULT_USER
+    return query_params.get("user") or DEFAULT_USER
+
+
+def portfolio_columns(portfolio_data: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    """
+    Tickers and share counts for a state's portfolio_data.
+    Uses the store's columnar arrays when the state came from load_portfolio, the holdings dict otherwise.
+    """
+    user_id = portfolio_data.get("user_id")
+    if user_id is not None:
+        portfolio = get_portfolio_store().get(user_id)
+        if portfolio.version == portfolio_data.get("version"):
+            return portfolio.tickers, portfolio.shares
+    holdings = portfolio_data.get("holdings", {})
+    tickers = list(holdings)
+    return tickers, np.fromiter((float(holdings[t]) for t in tickers), dtype=np.float64, count=len(tickers))
@@ -1,60 +1,113 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import os
+from agents.deadline import DeadlineExceeded, degraded, node_budget, run_with_timeout
+from agents.embedding_backend import get_encoder
+from agents.lexical_index import BM25Index, build_query_terms
+from agents.logging_utils import get_logger
 from dotenv import load_dotenv
-load_dotenv() 
+load_dotenv()
+
+log = get_logger(__name__)
+
+def flatten_news(news_data: Dict[str, List[Dict]]) -> List[Dict[str, Any]]:
+    """Flattens per-company article lists into documents with retrievable content."""
+    docs = []
+    for company, articles in news_data.items():
+        for article in articles:
+            content = article.get("content", "")
+            if content:
+                docs.append({
+                    "content": content,
+                    "title": article.get("title") or "",
+                    "metadata": {"company": company, "title": article["title"], "url": article["url"]}
+                })
+    return docs
+
+def company_terms(companies: List[str]) -> List[str]:
+    """Company names and tickers used to boost the lexical query."""
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    reverse_ticker_map = {v: k for k, v in config["ticker_map"].items()}
+    terms = []
+    for ticker in companies:
+        terms.append(ticker.split(".")[0])
+        if ticker in reverse_ticker_map:
+            terms.append(reverse_ticker_map[ticker])
+    return terms
+
+def retrieve(docs: List[Dict[str, Any]], transcript: str, companies: List[str], mode: str = "dense",
+             top_n: int = 20, top_k: int = 3, encoder: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    Ranks documents against the transcript.
+    mode='dense' encodes every document; mode='hybrid' keeps only the top_n BM25 matches over
+    title + description, then dense-reranks that shortlist, so encode work is bounded by top_n.
+    """
+    encoder = encoder or get_encoder()
+    candidates = list(range(len(docs)))
+    if mode == "hybrid" and len(docs) > top_n:
+        index = BM25Index([f"{d['title']} {d['content']}" for d in docs])
+        shortlist = index.top_n(build_query_terms(transcript, company_terms(companies)), top_n)
+        # Fall back to the head of the list when too few documents match lexically
+        if len(shortlist) < top_k:
+            chosen = set(shortlist)
+            shortlist += [i for i in candidates if i not in chosen][:top_k - len(shortlist)]
+        candidates = shortlist
+
+    texts = [docs[i]["content"] for i in candidates]
+    # Encode documents and query in one call so the micro-batcher sees a single request
+    embeddings = encoder.encode(texts + [transcript])
+    doc_embeddings, query_embedding = embeddings[:-1], embeddings[-1]
+
+    # Embeddings are L2-normalized, so the dot product is the cosine similarity
+    similarities = doc_embeddings @ query_embedding
+    k = min(top_k, len(candidates))
+    top_indices = np.argsort(similarities)[-k:][::-1]
+    return [
+        {"content": texts[i], "metadata": docs[candidates[i]]["metadata"], "score": float(similarities[i])}
+        for i in top_indices
+    ]
 
 def retriever_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Indexes news data and retrieves relevant documents based on query.
-    Input: State with 'news_data', 'transcript'.
-    Output: Update State with 'retrieved_docs': List[Dict].
+    Input: State with 'news_data', 'transcript', 'companies', 'deadline'.
+    Output: Update State with 'retrieved_docs': List[Dict] (empty, with a degradation, if retrieval
+    cannot finish inside the node's slice of the deadline).
+    RETRIEVAL_MODE selects 'dense' (default) or 'hybrid'; HYBRID_TOP_N sets the rerank shortlist size.
     """
     news_data = state["news_data"]
     transcript = state["transcript"]
-    print(f"Retriever_Agent Input: news_data={news_data}, transcript={transcript}")
+    log.info("Retriever_Agent Input", articles=sum(len(articles) for articles in news_data.values()) if news_data else 0,
+             transcript=transcript)
 
     if not news_data:
-        print("Retriever_Agent: No news data to process")
+        log.info("Retriever_Agent: No news data to process")
         return {"retrieved_docs": []}
 
     try:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        all_docs = []
-        doc_metadata = []
-
-        # Flatten news data
-        for company, articles in news_data.items():
-            for article in articles:
-                content = article.get("content", "")
-                if content:
-                    all_docs.append(content)
-                    doc_metadata.append({"company": company, "title": article["title"], "url": article["url"]})
-
-        if not all_docs:
-            print("Retriever_Agent: No texts to index")
+        docs = flatten_news(news_data)
+        if not docs:
+            log.info("Retriever_Agent: No texts to index")
             return {"retrieved_docs": []}
 
-        # Encode documents and query
-        doc_embeddings = model.encode(all_docs)
-        query_embedding = model.encode([transcript])[0]
-
-        # Compute similarity
-        similarities = cosine_similarity([query_embedding], doc_embeddings)[0]
-        top_k = min(3, len(all_docs))
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        retrieved_docs = run_with_timeout(
+            retrieve,
+            node_budget(state, "retriever_agent"),
+            docs,
+            transcript,
+            state.get("companies", []),
+            mode=os.getenv("RETRIEVAL_MODE", "dense").lower(),
+            top_n=int(os.getenv("HYBRID_TOP_N", "20")),
+            pool="embedding",
+        )
 
-        # Retrieve top documents
-        retrieved_docs = [
-            {"content": all_docs[i], "metadata": doc_metadata[i], "score": float(similarities[i])}
-            for i in top_indices
-        ]
-
-        print(f"Retriever_Agent Output: retrieved_docs={retrieved_docs}")
+        log.info("Retriever_Agent Output", docs=[(d["metadata"]["company"], round(d["score"], 3)) for d in retrieved_docs])
         return {"retrieved_docs": retrieved_docs}
+    except DeadlineExceeded as e:
+        log.warning("Retriever_Agent Deadline: skipping retrieval", error=str(e))
+        return {"retrieved_docs": [], "degradations": degraded("retriever_agent", "skipped")}
     except Exception as e:
-        print(f"Retriever_Agent Error: {e}")
-        return {"retrieved_docs": []}
\ No newline at end of file
+        log.exception("Retriever_Agent Error", error=str(e))
+        return {"retrieved_docs": []}
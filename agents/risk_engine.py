@@ -0,0 +1,115 @@
+from typing import Dict, Any, Optional, Sequence, Tuple
+from statistics import NormalDist
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def align_prices(histories: Sequence[Sequence[Tuple[str, float]]]) -> np.ndarray:
+    """
+    Aligns per-ticker daily close histories on the union of their dates.
+    Gaps (holidays on one exchange, late listings) are forward-filled; cells before a ticker's first close stay NaN.
+    Input: One list of (ISO date, close) pairs per ticker, in portfolio order.
+    Output: Price matrix of shape (days, tickers).
+    """
+    dates = sorted({date for history in histories for date, _ in history})
+    row_of = {date: i for i, date in enumerate(dates)}
+    prices = np.full((len(dates), len(histories)), np.nan)
+    for col, history in enumerate(histories):
+        if history:
+            rows, closes = zip(*((row_of[date], close) for date, close in history))
+            prices[list(rows), col] = closes
+
+    # Forward fill along time: index of the last valid observation per cell
+    valid = ~np.isnan(prices)
+    last_valid = np.where(valid, np.arange(len(dates))[:, None], 0)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return prices[last_valid, np.arange(prices.shape[1])]
+
+
+def align_returns(histories: Sequence[Sequence[Tuple[str, float]]], lookback: int = TRADING_DAYS) -> np.ndarray:
+    """
+    Aligns daily close histories (see align_prices) and converts them to simple returns.
+    Forward-filled gaps contribute a zero return.
+    Output: Returns matrix of shape (days, tickers), at most lookback rows.
+    """
+    prices = align_prices(histories)
+    if prices.shape[0] < 2:
+        return np.zeros((0, len(histories)))
+    prices = prices[-(lookback + 1):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[1:] / prices[:-1] - 1.0
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def covariance(returns: np.ndarray) -> np.ndarray:
+    """Sample covariance matrix of daily returns, shape (tickers, tickers)."""
+    return np.cov(returns, rowvar=False, ddof=1)
+
+
+def portfolio_risk(shares: np.ndarray, prices: np.ndarray, returns: np.ndarray,
+                   betas: Optional[np.ndarray] = None, pe_ratios: Optional[np.ndarray] = None,
+                   confidence: float = 0.95, horizon_days: int = 1) -> Dict[str, Any]:
+    """
+    Vectorized portfolio risk for N positions.
+    Input: shares, prices, betas, pe_ratios as length-N arrays (NaN where unknown); returns of shape (days, N).
+    Output: Dict with values, weights, total_value, weighted beta and PE, daily/annual volatility,
+    historical and parametric VaR (currency units, positive = loss) and per-position risk contributions.
+
+    The covariance matrix is never materialized: Sigma @ w is computed as Xc.T @ (Xc @ w) / (T - 1),
+    which is O(T * N) and keeps portfolios of thousands of positions in the millisecond range.
+    """
+    shares = np.asarray(shares, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    priced = ~np.isnan(prices) & (prices > 0)
+    values = np.where(priced, shares * np.nan_to_num(prices), 0.0)
+    total_value = float(values.sum())
+    weights = values / total_value if total_value > 0 else np.zeros_like(values)
+
+    result: Dict[str, Any] = {
+        "values": values,
+        "weights": weights,
+        "total_value": total_value,
+        "missing_prices": np.flatnonzero(~priced),
+        "portfolio_beta": None,
+        "portfolio_pe": None,
+        "volatility_daily": None,
+        "volatility_annual": None,
+        "var_historical": None,
+        "var_parametric": None,
+        "risk_contributions": np.zeros_like(values),
+        "confidence": confidence,
+        "horizon_days": horizon_days,
+    }
+
+    if betas is not None:
+        betas = np.asarray(betas, dtype=np.float64)
+        covered = ~np.isnan(betas) & (weights > 0)
+        if covered.any():
+            result["portfolio_beta"] = float(weights[covered] @ betas[covered] / weights[covered].sum())
+    if pe_ratios is not None:
+        # Weighted harmonic mean: the PE of the combined earnings stream
+        pe_ratios = np.asarray(pe_ratios, dtype=np.float64)
+        covered = ~np.isnan(pe_ratios) & (pe_ratios > 0) & (weights > 0)
+        if covered.any():
+            result["portfolio_pe"] = float(weights[covered].sum() / (weights[covered] / pe_ratios[covered]).sum())
+
+    if total_value <= 0 or returns.shape[0] < 2:
+        return result
+
+    portfolio_returns = returns @ weights
+    centered = returns - returns.mean(axis=0)
+    sigma_w = centered.T @ (centered @ weights) / (returns.shape[0] - 1)
+    variance = float(weights @ sigma_w)
+    vol = variance ** 0.5
+    scale = horizon_days ** 0.5
+
+    result["volatility_daily"] = vol
+    result["volatility_annual"] = vol * TRADING_DAYS ** 0.5
+    result["var_historical"] = float(-np.percentile(portfolio_returns, (1 - confidence) * 100) * scale * total_value)
+    z = NormalDist().inv_cdf(confidence)
+    result["var_parametric"] = float((z * vol * scale - portfolio_returns.mean() * horizon_days) * total_value)
+    if vol > 0:
+        # Euler decomposition: fractions of portfolio volatility per position, summing to 1
+        result["risk_contributions"] = weights * sigma_w / variance
+    return result
@@ -0,0 +1,182 @@
+from typing import Dict, Any, List, Optional
+import json
+import operator
+import os
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+import numpy as np
+from agents.market_cache import MarketCache, get_market_cache
+from agents.risk_engine import TRADING_DAYS, align_prices
+
+TABLE_TTL_S = float(os.getenv("SCREENER_TABLE_TTL_S", "300"))
+FIELDS = ("current_price", "change_percent", "pe_ratio", "beta", "volatility", "return_1m", "return_3m", "return_1y", "max_drawdown_1y")
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq}
+
+DEFAULT_RULES = {
+    "sell": {
+        "scope": "holdings",
+        "min_score": 1,
+        "rules": [
+            {"field": "pe_ratio", "op": ">", "value": 30, "weight": 1, "label": "High PE"},
+            {"field": "volatility", "op": ">", "value": 0.5, "weight": 1, "label": "high volatility"},
+            {"field": "beta", "op": ">", "value": 1.5, "weight": 1, "label": "high beta"},
+        ],
+    },
+    "buy": {
+        "scope": "universe",
+        "exclude_holdings": True,
+        "min_score": 2,
+        "rules": [
+            {"field": "pe_ratio", "op": "<", "value": 25, "weight": 1, "label": "reasonable PE"},
+            {"field": "beta", "op": "<", "value": 1.2, "weight": 0.5, "label": "moderate beta"},
+            {"field": "volatility", "op": "<", "value": 0.35, "weight": 0.5, "label": "low volatility"},
+            {"field": "return_3m", "op": ">", "value": 0, "weight": 1, "label": "positive 3-month momentum"},
+        ],
+    },
+}
+
+
+def _percent(value: Any) -> float:
+    try:
+        return float(str(value).rstrip("%"))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _number(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+
+class UniverseTable:
+    """
+    Column-oriented fundamentals and risk table for the tracked universe, precomputed from the market cache.
+    columns[field] is a float64 array aligned with tickers; unknown values are NaN.
+    """
+
+    def __init__(self, tickers: List[str], columns: Dict[str, np.ndarray]):
+        self.tickers = tickers
+        self.row_of = {ticker: i for i, ticker in enumerate(tickers)}
+        self.columns = columns
+        self.built_at = time.time()
+
+    @classmethod
+    def build(cls, cache: MarketCache, tickers: List[str]) -> "UniverseTable":
+        quotes = cache.get_many(tickers, "quote")
+        fundamentals = cache.get_many(tickers, "fundamentals")
+        columns = {field: np.full(len(tickers), np.nan) for field in FIELDS}
+        for i, ticker in enumerate(tickers):
+            quote = quotes.get(ticker, ({}, 0))[0]
+            fundamental = fundamentals.get(ticker, ({}, 0))[0]
+            columns["current_price"][i] = _number(quote.get("current_price"))
+            columns["change_percent"][i] = _percent(quote.get("change_percent"))
+            for field in ("pe_ratio", "beta", "volatility"):
+                columns[field][i] = _number(fundamental.get(field))
+
+        since = (datetime.now() - timedelta(days=400)).strftime("%Y-%m-%d")
+        histories = cache.get_histories(tickers, since)
+        prices = align_prices([histories[t] for t in tickers])[-(TRADING_DAYS + 1):]
+        if prices.shape[0] > 1:
+            last = prices[-1]
+            # Tickers without history are all-NaN columns; their NaN results are expected
+            with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                for field, days in (("return_1m", 21), ("return_3m", 63), ("return_1y", TRADING_DAYS)):
+                    base = prices[-min(days + 1, prices.shape[0])]
+                    columns[field] = last / base - 1.0
+                running_max = np.fmax.accumulate(prices, axis=0)
+                columns["max_drawdown_1y"] = np.nanmax(1.0 - prices / running_max, axis=0)
+                returns = prices[1:] / prices[:-1] - 1.0
+                realized = np.nanstd(returns, axis=0, ddof=1) * TRADING_DAYS ** 0.5
+            # Realized volatility fills in where the provider reported none
+            columns["volatility"] = np.where(np.isnan(columns["volatility"]), realized, columns["volatility"])
+        return cls(tickers, columns)
+
+    def with_overrides(self, market_data: Dict[str, Any]) -> "UniverseTable":
+        """Copy of the table with fresher per-request market_data patched in (and new tickers appended)."""
+        tickers = self.tickers + [t for t in market_data if t not in self.row_of and "error" not in market_data[t]]
+        columns = {field: np.concatenate([col, np.full(len(tickers) - len(self.tickers), np.nan)])
+                   for field, col in self.columns.items()}
+        row_of = {ticker: i for i, ticker in enumerate(tickers)}
+        for ticker, data in market_data.items():
+            if ticker not in row_of or "error" in data:
+                continue
+            row = row_of[ticker]
+            for field in ("current_price", "pe_ratio", "beta", "volatility"):
+                if data.get(field) is not None:
+                    columns[field][row] = float(data[field])
+            if data.get("change_percent") is not None:
+                columns["change_percent"][row] = _percent(data["change_percent"])
+        return UniverseTable(tickers, columns)
+
+
+_table: Optional[UniverseTable] = None
+_table_lock = threading.Lock()
+
+
+def tracked_universe(cache: MarketCache, extra: Optional[List[str]] = None) -> List[str]:
+    """ticker_map companies, tickers users asked about and any extra tickers (e.g. holdings)."""
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    tickers = dict.fromkeys(config["ticker_map"].values())
+    tickers.update(dict.fromkeys(cache.tracked_tickers()))
+    tickers.update(dict.fromkeys(extra or []))
+    return list(tickers)
+
+
+def get_universe_table(extra: Optional[List[str]] = None) -> UniverseTable:
+    """Process-wide universe table, rebuilt when older than SCREENER_TABLE_TTL_S or missing tickers."""
+    global _table
+    with _table_lock:
+        missing = extra and _table is not None and any(t not in _table.row_of for t in extra)
+        if _table is None or missing or time.time() - _table.built_at > TABLE_TTL_S:
+            cache = get_market_cache()
+            _table = UniverseTable.build(cache, tracked_universe(cache, extra))
+        return _table
+
+
+def load_rules(config_path: str = "config.json") -> Dict[str, Any]:
+    """
+    Screening rule sets from config.json's screening_rules, falling back to DEFAULT_RULES.
+    An override replaces only the keys it sets, so e.g. a custom 'rules' list keeps the default scope.
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    rule_sets = {name: dict(rule_set) for name, rule_set in DEFAULT_RULES.items()}
+    for name, override in config.get("screening_rules", {}).items():
+        rule_sets[name] = {**rule_sets.get(name, {}), **override}
+    return rule_sets
+
+
+def screen(table: UniverseTable, rule_set: Dict[str, Any], candidates: Optional[List[str]] = None,
+           exclude: Optional[List[str]] = None, limit: int = 3) -> List[Dict[str, Any]]:
+    """
+    Scores every candidate against a rule set in one vectorized pass and returns the best-ranked ones.
+    A candidate's score is the summed weight of the rules it satisfies; NaN never satisfies a rule.
+    Output: List of {'ticker', 'score', 'matched': [(label, field, value)]}, best first.
+    """
+    mask = np.ones(len(table.tickers), dtype=bool)
+    if candidates is not None:
+        mask[:] = False
+        mask[[table.row_of[t] for t in candidates if t in table.row_of]] = True
+    if exclude:
+        mask[[table.row_of[t] for t in exclude if t in table.row_of]] = False
+
+    rules = rule_set["rules"]
+    hits = np.zeros((len(rules), len(table.tickers)), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for r, rule in enumerate(rules):
+            hits[r] = OPS[rule["op"]](table.columns[rule["field"]], rule["value"])
+    weights = np.array([rule.get("weight", 1.0) for rule in rules], dtype=np.float64)
+    scores = weights @ hits
+    scores[~mask] = -np.inf
+
+    eligible = np.flatnonzero(scores >= rule_set.get("min_score", 1))
+    ranked = eligible[np.argsort(-scores[eligible], kind="stable")][:limit]
+    results = []
+    for row in ranked:
+        matched = [(rule.get("label", rule["field"]), rule["field"], float(table.columns[rule["field"]][row]))
+                   for r, rule in enumerate(rules) if hits[r, row]]
+        results.append({"ticker": table.tickers[row], "score": float(scores[row]), "matched": matched})
+    return results
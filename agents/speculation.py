@@ -0,0 +1,140 @@
+"""
+Speculative prefetch of market data and news while the intent LLM call is still running.
+
+intent_classifier already knows the likely tickers (entity resolver), whether holdings are involved
+("portfolio" keyword) and which fetch branch the query will take before it calls Bedrock. It starts the
+fetches for those tickers here, keyed by request_id, and the fetch node that actually runs takes them
+over: tickers it needs are waited on instead of fetched again, everything else is discarded. Results
+land in the market cache / news store as usual, so a discarded fetch is not lost work for later requests.
+
+Enabled with SPECULATIVE_PREFETCH=1 (off by default: wasted speculation spends provider quota).
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, List, Optional
+from agents.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+SPECULATION_TTL_S = 60.0  # entries never taken (request failed before its fetch node) are dropped after this
+
+
+def speculation_enabled() -> bool:
+    return os.getenv("SPECULATIVE_PREFETCH", "0") == "1"
+
+
+class Speculation:
+    """Prefetches started for one request: one future per ticker, all of one kind ('market' or 'news')."""
+
+    def __init__(self, kind: str, futures: Dict[str, Future]):
+        self.kind = kind
+        self.futures = futures
+        self.started_at = time.time()
+
+
+class SpeculationRegistry:
+    """
+    Per-request speculative fetches on a small dedicated pool, with hit-rate counters:
+      hits:   speculated tickers the fetch node used
+      wasted: speculated tickers it did not need, or whose branch never ran
+      misses: tickers the fetch node needed that were not speculated
+    """
+
+    def __init__(self, max_workers: int = int(os.getenv("SPECULATION_WORKERS", "8"))):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self._pending: Dict[str, Speculation] = {}
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "started": 0, "hits": 0, "misses": 0, "wasted": 0, "discarded_requests": 0}
+
+    def start(self, request_id: str, kind: str, tickers: List[str], fn: Callable[..., Any], *args: Any) -> None:
+        """Submits fn(ticker, *args) for each ticker; a second start for the same request replaces the first."""
+        if not request_id or not tickers:
+            return
+        futures = {ticker: self._pool.submit(fn, ticker, *args) for ticker in dict.fromkeys(tickers)}
+        with self._lock:
+            self._sweep()
+            previous = self._pending.pop(request_id, None)
+            if previous:
+                self._discard(previous)
+            self._pending[request_id] = Speculation(kind, futures)
+            self._counts["requests"] += 1
+            self._counts["started"] += len(futures)
+        log.debug("Speculation Started", request_id=request_id, kind=kind, tickers=list(futures))
+
+    def take(self, request_id: str, kind: str, tickers: List[str]) -> Dict[str, Future]:
+        """
+        Hands the fetch node the futures for the tickers it needs; the rest of the request's speculation
+        (other tickers, or all of it when the kind does not match the branch that ran) is discarded.
+        """
+        with self._lock:
+            speculation = self._pending.pop(request_id, None) if request_id else None
+            if speculation is None:
+                return {}
+            if speculation.kind != kind:
+                self._discard(speculation)
+                return {}
+            needed = set(tickers)
+            taken = {ticker: future for ticker, future in speculation.futures.items() if ticker in needed}
+            for ticker, future in speculation.futures.items():
+                if ticker not in needed:
+                    future.cancel()
+            self._counts["hits"] += len(taken)
+            self._counts["wasted"] += len(speculation.futures) - len(taken)
+            self._counts["misses"] += len(needed - set(taken))
+        log.info("Speculation Taken", request_id=request_id, kind=kind, hits=sorted(taken),
+                 wasted=sorted(set(speculation.futures) - set(taken)), misses=sorted(needed - set(taken)))
+        return taken
+
+    def discard(self, request_id: str) -> None:
+        with self._lock:
+            speculation = self._pending.pop(request_id, None)
+            if speculation:
+                self._discard(speculation)
+
+    def _discard(self, speculation: Speculation) -> None:
+        for future in speculation.futures.values():
+            future.cancel()
+        self._counts["wasted"] += len(speculation.futures)
+        self._counts["discarded_requests"] += 1
+
+    def _sweep(self) -> None:
+        cutoff = time.time() - SPECULATION_TTL_S
+        for request_id in [rid for rid, s in self._pending.items() if s.started_at < cutoff]:
+            self._discard(self._pending.pop(request_id))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            counts["pending"] = len(self._pending)
+        used = counts["hits"] + counts["wasted"]
+        needed = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / used, 3) if used else None    # share of speculation that was used
+        counts["coverage"] = round(counts["hits"] / needed, 3) if needed else None  # share of fetches speculation covered
+        return counts
+
+
+def result(future: Optional[Future], deadline: Optional[float], default: Any = None) -> Any:
+    """Waits for a taken speculative fetch until deadline; default when there is none, it failed or time ran out."""
+    if future is None:
+        return default
+    try:
+        return future.result(timeout=max(0.0, deadline - time.time()) if deadline else None)
+    except FutureTimeout:
+        return default
+    except Exception as e:
+        log.warning("Speculation Failed", error=str(e))
+        return default
+
+
+_registry: Optional[SpeculationRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_speculation() -> SpeculationRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SpeculationRegistry()
+        return _registry
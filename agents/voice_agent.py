@@ -1,4 +1,3 @@
-import logging
 import os
 import json
 import requests
@@ -7,16 +6,19 @@ import traceback
 import boto3
 import re
 from botocore.exceptions import ClientError, ParamValidationError
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
+from agents.deadline import (MIN_CALL_S, DeadlineExceeded, boto_config, call_timeout, degraded, extend_deadline,
+                             node_deadline, stt_deadline, time_left)
+from agents.logging_utils import get_logger
 from dotenv import load_dotenv
 load_dotenv() 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
-def process_stt(audio_input: str, assemblyai_api_key: str) -> Dict[str, str]:
-    """Handles STT using AssemblyAI."""
+def process_stt(audio_input: str, assemblyai_api_key: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Handles STT using AssemblyAI. With a deadline, every call and the status polling stop when it passes."""
+    timeout = lambda cap: call_timeout(deadline, cap) if deadline else cap
     try:
         headers = {"authorization": assemblyai_api_key}
         with open(audio_input, "rb") as f:
@@ -24,7 +26,7 @@ def process_stt(audio_input: str, assemblyai_api_key: str) -> Dict[str, str]:
                 "https://api.assemblyai.com/v2/upload",
                 headers=headers,
                 data=f,
-                timeout=30
+                timeout=timeout(30)
             )
         upload_response.raise_for_status()
         audio_url = upload_response.json()["upload_url"]
@@ -33,7 +35,7 @@ def process_stt(audio_input: str, assemblyai_api_key: str) -> Dict[str, str]:
             "https://api.assemblyai.com/v2/transcript",
             headers=headers,
             json={"audio_url": audio_url, "language_code": "en_us"},
-            timeout=30
+            timeout=timeout(30)
         )
         transcribe_response.raise_for_status()
         transcript_id = transcribe_response.json()["id"]
@@ -42,12 +44,14 @@ def process_stt(audio_input: str, assemblyai_api_key: str) -> Dict[str, str]:
             status_response = requests.get(
                 f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
                 headers=headers,
-                timeout=10
+                timeout=timeout(10)
             )
             status_response.raise_for_status()
             status = status_response.json()
             if status["status"] in ["completed", "error"]:
                 break
+            if deadline and time_left(deadline) < 1 + MIN_CALL_S:
+                raise DeadlineExceeded("Transcription not ready before the deadline")
             time.sleep(1)
 
         if status["status"] == "completed":
@@ -55,139 +59,140 @@ def process_stt(audio_input: str, assemblyai_api_key: str) -> Dict[str, str]:
         else:
             raise Exception(f"AssemblyAI transcription failed: {status.get('error', 'Unknown error')}")
 
-        print(f"Voice_Agent STT Output: {transcript}")
-        logger.info(f"STT Success: {transcript}")
+        logger.info("STT Success", transcript=transcript)
         return {"transcript": transcript}
+    except DeadlineExceeded as e:
+        logger.error("STT Deadline", error=str(e))
+        return {"error": f"STT timed out: {e}", "degradations": degraded("voice_agent_stt", "timeout")}
     except Exception as e:
         error_msg = f"STT Error: {str(e)}\n{traceback.format_exc()}"
-        print(f"Voice_Agent Error: {error_msg}")
-        logger.error(error_msg)
+        logger.exception("STT Error", error=str(e))
         return {"error": error_msg}
 
-def process_tts(narrative: str, aws_access_key_id: str, aws_secret_access_key: str, region_name: str) -> Dict[str, str]:
-    """Handle TTS using AWS Polly."""
-    logger.info(f"Voice_Agent TTS Input: narrative_length={len(narrative)}")
-    print(f"Voice_Agent TTS Input: narrative={len(narrative)}...")
+def process_tts(narrative: str, aws_access_key_id: str, aws_secret_access_key: str, region_name: str,
+                audio_output: str = "data/output.mp3", timeout: float = 60) -> Dict[str, str]:
+    """Handle TTS using AWS Polly, writing the MP3 to audio_output. AWS calls are bounded by timeout seconds."""
+    logger.info("Voice_Agent TTS Input", narrative_length=len(narrative))
 
     try:
         # Validate narrative
-        logger.info(f"Original narrative length: {len(narrative)} characters")
         if len(narrative) == 0:
             error_msg = "Empty narrative provided"
-            logger.error(error_msg)
+            logger.error("Voice_Agent TTS Error", error=error_msg)
             return {"error": error_msg, "audio_output": ""}
         if len(narrative) > 3000:  # Polly character limit
             error_msg = f"Narrative exceeds 3000 characters: {len(narrative)}"
-            logger.error(error_msg)
+            logger.error("Voice_Agent TTS Error", error="narrative too long", narrative_length=len(narrative))
             return {"error": error_msg, "audio_output": ""}
 
         # Sanitize narrative
         sanitized_narrative = re.sub(r'[^\w\s.,!?;:%$-]', '', narrative)
-        logger.info(f"Sanitized narrative length: {len(sanitized_narrative)} characters")
+        logger.info("Voice_Agent TTS Sanitized", narrative_length=len(narrative),
+                    sanitized_length=len(sanitized_narrative))
         if not sanitized_narrative:
             error_msg = "Sanitized narrative is empty"
-            logger.error(error_msg)
+            logger.error("Voice_Agent TTS Error", error=error_msg)
             return {"error": error_msg, "audio_output": ""}
 
         # Validate AWS credentials
-        logger.info("Validating AWS credentials")
+        logger.info("Voice_Agent TTS Validating Credentials")
         try:
             session = boto3.Session(
                 aws_access_key_id=aws_access_key_id,
                 aws_secret_access_key=aws_secret_access_key,
                 region_name=region_name
             )
-            sts = session.client("sts")
+            sts = session.client("sts", config=boto_config(timeout))
             identity = sts.get_caller_identity()
-            logger.info(f"AWS credentials validated: Account {identity['Account']}")
+            logger.info("Voice_Agent TTS Credentials Valid", account=identity["Account"])
         except ClientError as e:
             error_msg = f"AWS credential validation failed: {e.response['Error']['Code']} - {e.response['Error']['Message']}\n{traceback.format_exc()}"
-            logger.error(error_msg)
+            logger.exception("Voice_Agent TTS Credentials Error", code=e.response["Error"]["Code"],
+                             error=e.response["Error"]["Message"])
             return {"error": error_msg, "audio_output": ""}
 
         # Check region
         available_regions = ["us-east-1", "us-west-2", "eu-west-1"]
         if region_name not in available_regions:
             error_msg = f"Polly not supported in region {region_name}. Use {available_regions}"
-            logger.error(error_msg)
+            logger.error("Voice_Agent TTS Error", error="unsupported region", region=region_name)
             return {"error": error_msg, "audio_output": ""}
 
         # Pre-check file system
-        audio_output = "data/output.mp3"
-        os.makedirs("data", exist_ok=True)
-        if not os.access("data", os.W_OK):
-            error_msg = "No write permission for data directory"
-            logger.error(error_msg)
+        output_dir = os.path.dirname(audio_output) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        if not os.access(output_dir, os.W_OK):
+            error_msg = f"No write permission for {output_dir} directory"
+            logger.error("Voice_Agent TTS Error", error="output directory not writable", path=output_dir)
             return {"error": error_msg, "audio_output": ""}
 
         import shutil
         _, _, free_space = shutil.disk_usage(".")
         if free_space < 1024 * 1024:  # Less than 1MB
             error_msg = "Insufficient disk space in data directory"
-            logger.error(error_msg)
+            logger.error("Voice_Agent TTS Error", error=error_msg, free_bytes=free_space)
             return {"error": error_msg, "audio_output": ""}
 
         # Clean up existing file
         try:
             if os.path.exists(audio_output):
                 os.remove(audio_output)
-                logger.info(f"Removed existing {audio_output}")
+                logger.info("Voice_Agent TTS Removed Existing", path=audio_output)
         except Exception as e:
             error_msg = f"Failed to remove existing {audio_output}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
+            logger.exception("Voice_Agent TTS Remove Error", path=audio_output, error=str(e))
             return {"error": error_msg, "audio_output": ""}
 
         # Call Polly
-        logger.info("Calling AWS Polly for TTS")
+        logger.info("Voice_Agent TTS Calling Polly")
         try:
-            polly = session.client("polly")
+            polly = session.client("polly", config=boto_config(timeout))
             response = polly.synthesize_speech(
                 Text=sanitized_narrative,
                 OutputFormat="mp3",
                 VoiceId="Joanna"
             )
-            logger.info(f"Polly Response: {response.get('ResponseMetadata')}")
+            logger.info("Voice_Agent TTS Polly Response", metadata=response.get("ResponseMetadata"))
         except (ClientError, ParamValidationError) as e:
             error_msg = f"Polly TTS failed: {e.response['Error']['Code']} - {e.response['Error']['Message']}\n{traceback.format_exc()}"
-            logger.error(error_msg)
+            logger.exception("Voice_Agent TTS Polly Error", code=e.response["Error"]["Code"],
+                             error=e.response["Error"]["Message"])
             return {"error": error_msg, "audio_output": ""}
 
         # Write audio file
-        logger.info(f"Writing audio to {audio_output}")
+        logger.info("Voice_Agent TTS Writing Audio", path=audio_output)
         try:
             with open(audio_output, "wb") as f:
                 f.write(response["AudioStream"].read())
             if not os.path.exists(audio_output):
                 error_msg = "Failed to write audio output file"
-                logger.error(error_msg)
+                logger.error("Voice_Agent TTS Error", error=error_msg, path=audio_output)
                 return {"error": error_msg, "audio_output": ""}
             file_size = os.path.getsize(audio_output)
-            print(f"Voice_Agent TTS Output: {audio_output} (File exists: {os.path.exists(audio_output)}, Size: {file_size} bytes)")
-            logger.info(f"TTS Success: {audio_output} (Size: {file_size} bytes)")
+            logger.info("Voice_Agent TTS Success", path=audio_output, size_bytes=file_size)
             return {"audio_output": audio_output}
         except Exception as e:
             error_msg = f"File write failed: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
+            logger.exception("Voice_Agent TTS Write Error", path=audio_output, error=str(e))
             return {"error": error_msg, "audio_output": ""}
 
     except Exception as e:
         error_msg = f"TTS Error: {str(e)}\n{traceback.format_exc()}"
-        print(f"Voice_Agent Error: {error_msg}")
-        logger.error(error_msg)
+        logger.exception("Voice_Agent TTS Error", error=str(e))
         return {"error": error_msg, "audio_output": ""}
 
 def voice_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handles STT or TTS based on node context.
-    Input: State with 'audio_input' (STT), 'narrative' (TTS), and 'node' (context).
+    Input: State with 'audio_input' (STT), 'narrative' (TTS), 'node' (context) and optional 'work_dir'
+    (per-request directory for the TTS output; defaults to data/).
     Output: Updates State with 'transcript' or 'audio_output'.
     """
     audio_input = state.get("audio_input", "")
     narrative = state.get("narrative", "").strip()
     transcript = state.get("transcript", "")
     node = state.get("node", "")
-    logger.info(f"Starting voice agent: node={node}, audio_input={audio_input}, narrative_length={len(narrative)}, transcript={transcript[:500]}")
-    print(f"Voice_Agent Input: node={node}, audio_input={audio_input}, narrative={narrative[:50]}..., transcript={transcript[:100]}")
+    logger.info("Starting voice agent", node=node, audio_input=audio_input, narrative_length=len(narrative), transcript=transcript)
 
     try:
         assemblyai_api_key = os.getenv("ASSEMBLYAI_API_KEY")
@@ -199,18 +204,26 @@ def voice_agent(state: Dict[str, Any]) -> Dict[str, Any]:
             raise ValueError("Missing required environment variables: ASSEMBLYAI_API_KEY, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, or LLM_REGION")
     except Exception as e:
         error_msg = f"Environment variable load error: {str(e)}\n{traceback.format_exc()}"
-        logger.error(error_msg)
+        logger.error("Voice_Agent Config Error", error=str(e))
         return {"error": error_msg, "audio_output": ""}
 
     # Prioritize TTS for voice_agent_tts node
     if node == "voice_agent_tts" and narrative:
-        return process_tts(narrative, aws_access_key_id, aws_secret_access_key, region_name)
+        audio_output = os.path.join(state.get("work_dir") or "data", "output.mp3")
+        budget = time_left(node_deadline(state, "voice_agent_tts"))
+        if budget < MIN_CALL_S:
+            # Out of time: the narrative is still shown as text
+            logger.warning("TTS skipped: deadline reached")
+            return {"audio_output": "", "degradations": degraded("voice_agent_tts", "skipped")}
+        return process_tts(narrative, aws_access_key_id, aws_secret_access_key, region_name, audio_output, budget)
 
     # Handle STT for voice_agent_stt node or if audio_input is present
     if audio_input and os.path.exists(audio_input):
-        return process_stt(audio_input, assemblyai_api_key)
+        started = time.time()
+        result = process_stt(audio_input, assemblyai_api_key, stt_deadline())
+        return {**result, **extend_deadline(state, time.time() - started)}
 
     # Fallback for invalid input
     error_msg = "No valid audio input or narrative provided for node: " + node
-    logger.error(error_msg)
+    logger.error("Voice_Agent Error", error="no valid audio input or narrative", node=node)
     return {"error": error_msg, "audio_output": ""}
\ No newline at end of file
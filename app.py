@@ -1,18 +1,21 @@
 import streamlit as st
 import asyncio
 import os
-import logging
 import base64
-from orchestrator.workflow import workflow
+import uuid
+from agents.logging_utils import get_logger
+from agents.portfolio_store import session_user
+from orchestrator.conversation import ConversationGraph
+from orchestrator.workflow import initial_state, workflow
+from orchestrator.executor import ExecutorBusy, RequestExecutor, new_request_state
 from streamlit_mic_recorder import mic_recorder
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 load_dotenv() 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
-logger = logging.getLogger(__name__)
+# Configure logging (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT)
+logger = get_logger(__name__)
 
 # Custom CSS for design
 st.markdown("""
@@ -130,6 +133,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_executor() -> RequestExecutor:
+    """One compiled graph and one bounded executor shared by every session in this process."""
+    return RequestExecutor(ConversationGraph(workflow()))
+
 async def main():
     st.title("Market Brief")
 
@@ -140,25 +148,14 @@ async def main():
         st.session_state.audio_trigger = 0
     if "is_processing" not in st.session_state:
         st.session_state.is_processing = False
+    if "user_id" not in st.session_state:
+        st.session_state.user_id = session_user(st.query_params)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
     # Workflow setup
-    graph = workflow()
-    state = {
-        "transcript": "",
-        "companies": [],
-        "intents": [],
-        "market_data": {},
-        "news_data": {},
-        "retrieved_docs": [],
-        "portfolio_data": {},
-        "analysis": {},
-        "narrative": "",
-        "audio_input": "",
-        "audio_output": "",
-        "time_query": None,
-        "error": None,
-        "node": ""
-    }
+    executor = get_executor()
+    state = initial_state(user_id=st.session_state.user_id, session_id=st.session_state.session_id)
 
     # Recorder
     recorder_class = "recorder disabled" if st.session_state.is_processing else "recorder"
@@ -169,16 +166,20 @@ async def main():
     if audio and not st.session_state.is_processing:
         st.session_state.is_processing = True
         with st.spinner(""):
-            audio_input = "data/input.wav"
-            os.makedirs("data", exist_ok=True)
             try:
+                state = new_request_state(state)
+                audio_input = os.path.join(state["work_dir"], "input.wav")
                 with open(audio_input, "wb") as f:
                     f.write(audio["bytes"])
                 state["audio_input"] = audio_input
-                logger.info(f"Running workflow with state: {state}")
-                result = graph.invoke(state)
+                logger.info("Running workflow", request_id=state["request_id"], user_id=state.get("user_id"))
+                result = executor.run(state)
                 state.update(result)
-                logger.info(f"Workflow result: {state}")
+                logger.info("Workflow result", request_id=state["request_id"], intents=state.get("intents"),
+                            companies=state.get("companies"), narrative=state.get("narrative"), error=state.get("error"),
+                            degradations=state.get("degradations"))
+                logger.debug("Workflow state", **state)
+                logger.info("Executor metrics", **executor.metrics())
 
                 # Update conversation history
                 if state["transcript"]:
@@ -196,8 +197,11 @@ async def main():
                 # Trigger audio playback
                 if state["audio_output"]:
                     st.session_state.audio_trigger += 1
+            except ExecutorBusy as e:
+                logger.warning("Executor busy", **executor.metrics())
+                st.warning(str(e))
             except Exception as e:
-                logger.error(f"Workflow error: {str(e)}")
+                logger.error("Workflow error", error=str(e))
                 st.error(f"Error: {str(e)}")
                 state["error"] = str(e)
             finally:
@@ -0,0 +1,123 @@
+"""
+Compares embedding backends for the retriever: PyTorch SentenceTransformer vs int8 ONNX,
+with and without request micro-batching.
+
+Usage: python -m benchmarks.bench_embeddings --docs 500 --sessions 8
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+import numpy as np
+from agents.embedding_backend import TorchEncoder, OnnxEncoder, MicroBatcher
+
+COMPANIES = ["Apple", "Samsung", "TSMC", "Microsoft", "Google", "Amazon", "Nvidia", "Meta",
+             "Intel", "IBM", "Sony", "Tencent", "Alibaba", "Netflix", "Tesla"]
+EVENTS = ["beats earnings expectations", "misses revenue guidance", "announces a share buyback",
+          "faces a regulatory probe", "launches a new product line", "cuts jobs amid restructuring",
+          "raises its dividend", "signs a supply deal", "shares fall on weak demand",
+          "stock rises after analyst upgrade"]
+QUERIES = ["Why is {c} stock rising?", "Why did {c} fall today?", "What is the latest news on {c}?",
+           "Is {c} up this week?", "Why is {c} down?"]
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(COMPANIES)} {rng.choice(EVENTS)}, according to a report on {rng.randint(1, 28)} May."
+            for _ in range(n)]
+
+
+def synthetic_queries(n: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(QUERIES).format(c=rng.choice(COMPANIES)) for _ in range(n)]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def bench_throughput(encoder: Any, docs: List[str], batch_size: int = 64) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        encoder.encode(docs[i:i + batch_size])
+    return len(docs) / (time.perf_counter() - start)
+
+
+def bench_latency(encoder: Any, queries: List[str]) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        encoder.encode([query])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": statistics.median(latencies), "p95_ms": percentile(latencies, 95)}
+
+
+def bench_concurrent(encoder: Any, docs: List[str], queries: List[str], sessions: int, docs_per_request: int) -> Dict[str, float]:
+    """Simulates concurrent retriever calls, each encoding a small news set plus its query."""
+    def one_request(i: int) -> float:
+        start = time.perf_counter()
+        offset = (i * docs_per_request) % max(1, len(docs) - docs_per_request)
+        encoder.encode(docs[offset:offset + docs_per_request] + [queries[i % len(queries)]])
+        return (time.perf_counter() - start) * 1000
+
+    requests = sessions * 8
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {"requests_per_s": requests / elapsed, "p50_ms": statistics.median(latencies), "p95_ms": percentile(latencies, 95)}
+
+
+def retrieval_agreement(reference: Any, candidate: Any, docs: List[str], queries: List[str], k: int = 3) -> Dict[str, float]:
+    """Top-k overlap and embedding cosine between two backends on the same corpus."""
+    ref_docs, cand_docs = reference.encode(docs), candidate.encode(docs)
+    ref_queries, cand_queries = reference.encode(queries), candidate.encode(queries)
+    ref_top = np.argsort(ref_queries @ ref_docs.T, axis=1)[:, -k:]
+    cand_top = np.argsort(cand_queries @ cand_docs.T, axis=1)[:, -k:]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]
+    top1 = np.mean(ref_top[:, -1] == cand_top[:, -1])
+    cosine = np.sum(ref_docs * cand_docs, axis=1)
+    return {f"top{k}_overlap": float(np.mean(overlap)), "top1_agreement": float(top1),
+            "mean_doc_cosine": float(np.mean(cosine)), "min_doc_cosine": float(np.min(cosine))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--docs-per-request", type=int, default=15)
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    docs = synthetic_corpus(args.docs)
+    queries = synthetic_queries(args.queries)
+    torch_encoder = TorchEncoder()
+    onnx_encoder = OnnxEncoder()
+
+    results: Dict[str, Any] = {}
+    for encoder in (torch_encoder, onnx_encoder):
+        encoder.encode(docs[:8])  # warm up
+        results[encoder.name] = {
+            "throughput_docs_per_s": bench_throughput(encoder, docs),
+            "query_latency": bench_latency(encoder, queries),
+            "concurrent": bench_concurrent(encoder, docs, queries, args.sessions, args.docs_per_request),
+        }
+        batcher = MicroBatcher(encoder, max_wait_ms=args.batch_wait_ms)
+        results[batcher.name] = {
+            "concurrent": bench_concurrent(batcher, docs, queries, args.sessions, args.docs_per_request),
+        }
+    results["agreement_onnx_vs_torch"] = retrieval_agreement(torch_encoder, onnx_encoder, docs, queries)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
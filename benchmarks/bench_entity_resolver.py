@@ -0,0 +1,89 @@
+"""
+Times company resolution per transcript as the symbol universe grows, for the Aho-Corasick resolver
+and the old substring scan over every name and ticker.
+
+Usage: python -m benchmarks.bench_entity_resolver --sizes 15 1000 10000 50000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, List
+from agents.entity_resolver import Alias, EntityResolver, config_aliases, load_aliases, universe_aliases
+
+SYLLABLES = ["ar", "bel", "cor", "dex", "el", "fin", "gen", "hal", "ion", "jet", "kor", "lum", "mer", "nov", "or",
+             "pax", "quin", "ros", "syn", "tor", "ul", "vex", "wel", "xan", "yor", "zen"]
+# Listing names mix coined brands with ordinary words and place names, like the Nasdaq symbol directories
+WORDS = ["summit", "harbor", "pioneer", "liberty", "atlas", "cascade", "frontier", "keystone", "meridian", "beacon",
+         "pacific", "midwest", "texas", "first", "united", "american", "national", "general", "royal", "golden"]
+SECTORS = ["Technologies", "Therapeutics", "Energy", "Financial", "Bancorp", "Semiconductor", "Motors", "Software",
+           "Pharmaceuticals", "Airlines", "Realty", "Foods", "Mining", "Networks", "Biosciences", "Capital"]
+FORMS = ["{} Inc. - Common Stock", "{}, Inc. - Class A Common Stock", "{} Corporation - Common Stock",
+         "{} Holdings Ltd. - American Depositary Shares", "{} Group, Inc. - Common Stock", "{} Co. - Common Stock"]
+TRANSCRIPTS = [
+    "What is the Apple stock price?",
+    "Compare Microsoft vs Google and tell me which one to buy",
+    "Why is invidia falling today, and how is Tesla doing?",
+    "How is my portfolio doing this week?",
+    "Should I sell I B M or metadata heavy stocks like Meta?",
+]
+
+
+def synthetic_universe(n: int, seed: int = 0) -> List[Alias]:
+    """Aliases for n listing rows shaped like real ones ('Summit Corvex Therapeutics, Inc. - Class A Common Stock')."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        brand = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        words = [rng.choice(WORDS)] if rng.random() < 0.3 else []
+        words += [brand] + ([rng.choice(SECTORS)] if rng.random() < 0.7 else [])
+        rows.append({"symbol": f"{brand[:3].upper()}{i % 100:02d}",
+                     "name": rng.choice(FORMS).format(" ".join(word.capitalize() for word in words))})
+    return universe_aliases(rows)
+
+
+def substring_scan(transcript: str, ticker_map: Dict[str, str]) -> List[str]:
+    transcript = transcript.lower()
+    return [ticker for name, ticker in ticker_map.items() if name.lower() in transcript or ticker.lower() in transcript]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    base = load_aliases() + config_aliases()
+    report: Dict[str, Any] = {}
+    for n in args.sizes:
+        universe = synthetic_universe(n)
+        start = time.perf_counter()
+        resolver = EntityResolver(base + universe)
+        build_s = time.perf_counter() - start
+        ticker_map = {a.text: a.ticker for a in base + universe if not a.ticker_only}
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for transcript in TRANSCRIPTS:
+                resolver.tickers(transcript)
+        resolver_us = (time.perf_counter() - start) / (args.repeat * len(TRANSCRIPTS)) * 1e6
+
+        scan_repeat = max(1, args.repeat // max(1, n // 1000))
+        start = time.perf_counter()
+        for _ in range(scan_repeat):
+            for transcript in TRANSCRIPTS:
+                substring_scan(transcript, ticker_map)
+        scan_us = (time.perf_counter() - start) / (scan_repeat * len(TRANSCRIPTS)) * 1e6
+
+        report[str(n)] = {
+            "aliases": len(resolver),
+            "build_s": round(build_s, 3),
+            "resolver_us_per_query": round(resolver_us, 1),
+            "substring_scan_us_per_query": round(scan_us, 1),
+            "sample": {t: resolver.tickers(t) for t in TRANSCRIPTS[:3]} if n == args.sizes[0] else None,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
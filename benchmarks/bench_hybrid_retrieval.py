@@ -0,0 +1,95 @@
+"""
+Measures relevance vs latency of hybrid (BM25 prefilter + dense rerank) retrieval at different
+shortlist sizes N, against full dense retrieval over the same synthetic news sets.
+
+Relevance is reported two ways: agreement of the top-k with full dense ranking, and the share of
+top-k documents that are about the company the query asks for.
+
+Usage: python -m benchmarks.bench_hybrid_retrieval --sizes 100 1000 5000 --top-n 5 10 20 50
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, Any, List
+from agents.embedding_backend import get_encoder
+from agents.retriever_agent import retrieve
+from benchmarks.bench_embeddings import COMPANIES, EVENTS
+
+TICKERS = {"Apple": "AAPL", "Microsoft": "MSFT", "Nvidia": "NVDA", "Tesla": "TSLA", "Amazon": "AMZN",
+           "Google": "GOOGL", "Meta": "META", "Intel": "INTC", "Netflix": "NFLX", "IBM": "IBM",
+           "TSMC": "TSM", "Samsung": "005930.KS", "Sony": "6758.T", "Tencent": "0700.HK", "Alibaba": "BABA"}
+QUERIES = ["why is {c} stock rising", "why is {c} falling", "why did {c} go down this week", "is {c} up today and why"]
+
+
+def synthetic_docs(n: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        company = rng.choice(COMPANIES)
+        event = rng.choice(EVENTS)
+        docs.append({
+            "title": f"{company} {event}",
+            "content": f"{company} {event}; analysts weigh the impact on the quarter ({i}).",
+            "metadata": {"company": TICKERS[company], "title": f"{company} {event}", "url": f"https://example.com/{i}"},
+        })
+    return docs
+
+
+def run_mode(docs: List[Dict[str, Any]], queries: List[Dict[str, Any]], mode: str, top_n: int, encoder: Any) -> Dict[str, Any]:
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(retrieve(docs, query["transcript"], query["companies"], mode=mode, top_n=top_n, encoder=encoder))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"latencies": latencies, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--top-n", type=int, nargs="+", default=[5, 10, 20, 50])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    encoder = get_encoder()
+    rng = random.Random(5)
+    queries = []
+    for _ in range(args.queries):
+        company = rng.choice(COMPANIES)
+        queries.append({"transcript": rng.choice(QUERIES).format(c=company.lower()),
+                        "companies": [TICKERS[company]]})
+
+    report: Dict[str, Any] = {}
+    for size in args.sizes:
+        docs = synthetic_docs(size)
+        dense = run_mode(docs, queries, "dense", 0, encoder)
+        rows = {"dense": {"p50_ms": statistics.median(dense["latencies"])}}
+        for top_n in args.top_n:
+            hybrid = run_mode(docs, queries, "hybrid", top_n, encoder)
+            agreement, on_topic = [], []
+            for query, dense_docs, hybrid_docs in zip(queries, dense["results"], hybrid["results"]):
+                dense_urls = {d["metadata"]["url"] for d in dense_docs}
+                hybrid_urls = {d["metadata"]["url"] for d in hybrid_docs}
+                agreement.append(len(dense_urls & hybrid_urls) / max(1, len(dense_urls)))
+                on_topic.append(sum(d["metadata"]["company"] in query["companies"] for d in hybrid_docs) / max(1, len(hybrid_docs)))
+            rows[f"hybrid_n{top_n}"] = {
+                "p50_ms": statistics.median(hybrid["latencies"]),
+                "agreement_with_dense": statistics.mean(agreement),
+                "on_topic_precision": statistics.mean(on_topic),
+            }
+        dense_on_topic = [sum(d["metadata"]["company"] in q["companies"] for d in r) / max(1, len(r))
+                          for q, r in zip(queries, dense["results"])]
+        rows["dense"]["on_topic_precision"] = statistics.mean(dense_on_topic)
+        report[str(size)] = rows
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
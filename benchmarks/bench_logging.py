@@ -0,0 +1,94 @@
+"""
+Measures per-request logging cost on agent-sized payloads: the old full-payload prints against the
+structured logger (INFO enabled, INFO filtered out, and sampled DEBUG records).
+
+Usage: python -m benchmarks.bench_logging --holdings 10 1000 10000 --articles 1000
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, Any, Callable
+from agents.logging_utils import StructuredLogger
+
+
+def payloads(holdings: int, articles: int) -> Dict[str, Any]:
+    rng = random.Random(holdings)
+    tickers = [f"SYN{i:05d}" for i in range(holdings)]
+    market_data = {t: {"current_price": rng.uniform(5, 500), "change_percent": f"{rng.uniform(-3, 3):.2f}%",
+                       "pe_ratio": rng.uniform(5, 60), "beta": rng.uniform(0.4, 2.2), "timestamp": "2025-05-30"}
+                   for t in tickers}
+    news_data = {t: [{"title": f"{t} headline {i}", "content": f"{t} story {i} " * 20, "url": f"https://news.example.com/{t}/{i}"}
+                     for i in range(articles // 10)] for t in tickers[:10]}
+    return {"market_data": market_data, "portfolio_data": {"holdings": {t: 10.0 for t in tickers}}, "news_data": news_data}
+
+
+def time_ms(fn: Callable[[], None], repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holdings", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+    os.environ["LOG_DEBUG_SAMPLE_RATE"] = str(args.sample_rate)
+
+    sink = io.StringIO()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+    base = logging.getLogger("bench.logging")
+    base.addHandler(handler)
+    base.propagate = False
+    log = StructuredLogger(base)
+
+    def reset_sink() -> None:
+        sink.seek(0)
+        sink.truncate()
+
+    report: Dict[str, Any] = {}
+    for n in args.holdings:
+        p = payloads(n, args.articles)
+        state = {**p, "intents": ["portfolio"], "companies": [], "transcript": "how is my portfolio doing"}
+
+        def legacy() -> None:
+            # What the agents and app.py used to emit for one request
+            print(f"API_Agent Output: market_data={p['market_data']}", file=sink)
+            print(f"Analysis_Agent Input: market_data={p['market_data']}, portfolio_data={p['portfolio_data']}", file=sink)
+            print(f"Retriever_Agent Input: news_data={p['news_data']}", file=sink)
+            base.info(f"Running workflow with state: {state}")
+            reset_sink()
+
+        def structured() -> None:
+            log.info("API_Agent Output", market_data=p["market_data"])
+            log.info("Analysis_Agent Input", market_data=p["market_data"], holdings=p["portfolio_data"]["holdings"])
+            log.info("Retriever_Agent Input", articles=sum(len(a) for a in p["news_data"].values()))
+            log.info("Running workflow", request_id="bench", user_id="default")
+            reset_sink()
+
+        def sampled_debug() -> None:
+            log.debug("Workflow state", **state)
+            reset_sink()
+
+        base.setLevel(logging.INFO)
+        row = {"legacy_ms": time_ms(legacy, args.repeat), "structured_info_ms": time_ms(structured, args.repeat)}
+        base.setLevel(logging.WARNING)
+        row["structured_filtered_ms"] = time_ms(structured, args.repeat)
+        base.setLevel(logging.DEBUG)
+        row["debug_sampled_ms"] = time_ms(sampled_debug, args.repeat)
+        row["speedup_info"] = row["legacy_ms"] / max(row["structured_info_ms"], 1e-9)
+        report[str(n)] = row
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-process memory and latency of app processes that embed locally vs through the model worker sidecar.
+
+Starts --processes child processes per mode. Each encodes a retriever-sized request (news set plus
+query) and reports its resident set size; 'remote' mode runs one workers.model_worker for all of them.
+
+Usage: python -m benchmarks.bench_model_worker --processes 4 --backend onnx
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+from benchmarks.bench_embeddings import synthetic_corpus, synthetic_queries
+
+
+def rss_mb(pid: Any = "self") -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def client(backend: str, socket_path: str, docs_per_request: int, requests: int, results: Any) -> None:
+    os.environ["MODEL_WORKER_SOCKET"] = socket_path
+    from agents.embedding_backend import get_encoder
+    encoder = get_encoder(backend)
+    docs, queries = synthetic_corpus(docs_per_request * requests), synthetic_queries(requests)
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        encoder.encode(docs[i * docs_per_request:(i + 1) * docs_per_request] + [queries[i]])
+        latencies.append((time.perf_counter() - start) * 1000)
+    results.put({"rss_mb": rss_mb(), "p50_ms": statistics.median(latencies[1:] or latencies)})
+
+
+def run_mode(backend: str, socket_path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=client, args=(backend, socket_path, args.docs_per_request, args.requests, results))
+             for _ in range(args.processes)]
+    for proc in procs:
+        proc.start()
+    reports: List[Dict[str, float]] = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {
+        "rss_mb_per_process": round(statistics.mean(r["rss_mb"] for r in reports), 1),
+        "rss_mb_total": round(sum(r["rss_mb"] for r in reports), 1),
+        "p50_ms": round(statistics.median(r["p50_ms"] for r in reports), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="onnx")
+    parser.add_argument("--docs-per-request", type=int, default=15)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"local": run_mode(args.backend, "", args)}
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "model_worker.sock")
+    worker = subprocess.Popen([sys.executable, "-m", "workers.model_worker", "--socket", socket_path,
+                               "--backend", args.backend])
+    try:
+        while not os.path.exists(socket_path):
+            if worker.poll() is not None:
+                raise RuntimeError("Model worker exited during startup")
+            time.sleep(0.1)
+        remote = run_mode("remote", socket_path, args)
+        remote["worker_rss_mb"] = round(rss_mb(worker.pid), 1)
+        remote["rss_mb_total_with_worker"] = round(remote["rss_mb_total"] + remote["worker_rss_mb"], 1)
+        report["remote"] = remote
+    finally:
+        worker.terminate()
+        worker.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
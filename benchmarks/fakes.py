@@ -0,0 +1,125 @@
+"""
+In-process fake providers for benchmarks: Alpha Vantage, NewsAPI, Bedrock and the embedding model.
+Each fake sleeps for a configurable latency so provider-bound and CPU-bound costs can be separated.
+"""
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+COMPANY_NAMES = ["Apple", "Microsoft", "Nvidia", "Tesla", "Amazon", "Google", "Meta", "Intel", "Netflix", "IBM"]
+EVENTS = ["beats earnings expectations", "misses revenue guidance", "announces a buyback", "faces a regulatory probe",
+          "launches a new product", "shares fall on weak demand", "stock rises after analyst upgrade"]
+
+
+class FakeResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+        self.status_code = 200
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class FakeHTTP:
+    """
+    Stands in for the `requests` module inside api_agent and news_agent.
+    Serves deterministic Alpha Vantage and NewsAPI payloads after `latency_s`.
+    """
+
+    def __init__(self, latency_s: float = 0.0, articles_per_query: int = 20, seed: int = 0):
+        self.latency_s = latency_s
+        self.articles_per_query = articles_per_query
+        self.seed = seed
+        self.calls = 0
+
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None, **kwargs) -> FakeResponse:
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        query = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        query.update(params or {})
+        if "newsapi.org" in url:
+            return FakeResponse(self._news(query.get("q", "")))
+        symbol = query.get("symbol", "X").split(".")[0]
+        rng = random.Random(f"{self.seed}:{symbol}")
+        price = rng.uniform(10, 500)
+        function = query.get("function")
+        if function == "GLOBAL_QUOTE":
+            return FakeResponse({"Global Quote": {"05. price": f"{price:.2f}", "10. change percent": f"{rng.uniform(-3, 3):.2f}%",
+                                                  "07. latest trading day": datetime.now().strftime("%Y-%m-%d")}})
+        if function == "TIME_SERIES_DAILY":
+            closes = price * np.cumprod(1 + np.random.default_rng(rng.randint(0, 10**6)).normal(0, 0.02, 100))[::-1]
+            series = {(datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d"): {"4. close": f"{c:.2f}"}
+                      for i, c in enumerate(closes)}
+            return FakeResponse({"Time Series (Daily)": series})
+        if function == "OVERVIEW":
+            return FakeResponse({"Symbol": query.get("symbol"), "PERatio": f"{rng.uniform(5, 60):.2f}", "Beta": f"{rng.uniform(0.4, 2.2):.2f}"})
+        return FakeResponse({})
+
+    def _news(self, query: str) -> Dict[str, Any]:
+        name = query.strip('"')
+        rng = random.Random(f"{self.seed}:news:{name}")
+        articles = []
+        for i in range(self.articles_per_query):
+            event = rng.choice(EVENTS)
+            articles.append({
+                "title": f"{name} {event}",
+                "description": f"{name} {event}, analysts say the move matters for the quarter ({i}).",
+                "url": f"https://news.example.com/{name}/{i}",
+                "source": {"name": "Example Wire"},
+                "publishedAt": (datetime.utcnow() - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            })
+        return {"status": "ok", "articles": articles}
+
+
+class FakeLLMResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChatBedrock:
+    """Stands in for langchain_aws.ChatBedrock; answers intent prompts with a JSON list, others with a sentence."""
+    latency_s = 0.0
+    calls = 0
+
+    def __init__(self, model_id: str = None, region_name: str = None, **kwargs):
+        pass
+
+    def invoke(self, prompt: str) -> FakeLLMResponse:
+        FakeChatBedrock.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        if "Return a JSON list of intents" in prompt:
+            intents = [intent for intent, words in {"portfolio": ["portfolio"], "compare": ["compare", " vs"],
+                                                    "recommend": ["buy", "sell"], "price": ["price", "stock", "why"]}.items()
+                       if any(w in prompt.lower() for w in words)]
+            return FakeLLMResponse(json.dumps(intents or ["error"]))
+        return FakeLLMResponse("Here is a short synthetic narrative for benchmarking purposes.")
+
+
+class FakeEncoder:
+    """Deterministic hashed bag-of-words embeddings with a per-text latency, in place of MiniLM."""
+    name = "fake"
+
+    def __init__(self, latency_per_text_s: float = 0.0, dim: int = 384):
+        self.latency_per_text_s = latency_per_text_s
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if self.latency_per_text_s:
+            time.sleep(self.latency_per_text_s * len(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in re.findall(r"[a-z0-9]+", text.lower()):
+                out[i, int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.clip(norms, 1e-12, None)
@@ -0,0 +1,287 @@
+"""
+Synthetic-workload benchmark suite for every agent and the full graph.
+
+Runs in a scratch directory against in-process fake providers (benchmarks/fakes.py), so results
+are repeatable and need no API keys. Reports p50/mean wall time per scenario, per-node times for
+end-to-end runs, peak traced memory and allocated blocks.
+
+Usage:
+  python -m benchmarks.run_suite                                   # run and print
+  python -m benchmarks.run_suite --save benchmarks/baselines/local.json
+  python -m benchmarks.run_suite --compare benchmarks/baselines/local.json --threshold 0.2
+  python -m benchmarks.run_suite --quick --only analysis retriever
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FULL_SIZES = {"portfolio": [10, 100, 1000, 10000], "companies": [1, 10, 50], "news": [10, 100, 1000, 10000], "e2e_portfolio": [10, 1000]}
+QUICK_SIZES = {"portfolio": [10, 1000], "companies": [1, 10], "news": [10, 1000], "e2e_portfolio": [10]}
+
+
+def prepare_environment(workdir: str, args: argparse.Namespace) -> None:
+    """Points every store at the scratch directory and lifts provider quotas before agents are imported."""
+    shutil.copy(os.path.join(REPO_ROOT, "config.json"), os.path.join(workdir, "config.json"))
+    os.chdir(workdir)
+    os.makedirs("data", exist_ok=True)
+    os.environ.update({
+        "ALPHA_VANTAGE_KEY": "bench", "NEWS_API_KEY": "bench", "LLM_MODEL_ID": "bench", "LLM_REGION": "us-east-1",
+        "ALPHA_VANTAGE_DAILY_QUOTA": "100000000", "ALPHA_VANTAGE_MINUTE_QUOTA": "100000000",
+        "NEWS_LIVE_FALLBACK": "0", "SCREENER_TABLE_TTL_S": "0",
+    })
+    sys.path.insert(0, REPO_ROOT)
+
+
+def install_fakes(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.fakes import FakeHTTP, FakeChatBedrock, FakeEncoder
+    import agents.api_agent as api_agent_module
+    import agents.news_agent as news_agent_module
+    import agents.language_agent as language_agent_module
+    import agents.retriever_agent as retriever_agent_module
+    import orchestrator.workflow as workflow_module
+
+    http = FakeHTTP(latency_s=args.http_latency_ms / 1000)
+    FakeChatBedrock.latency_s = args.llm_latency_ms / 1000
+    encoder = FakeEncoder(latency_per_text_s=args.embed_latency_ms / 1000)
+    api_agent_module.requests = http
+    news_agent_module.requests = http
+    language_agent_module.ChatBedrock = FakeChatBedrock
+    workflow_module.ChatBedrock = FakeChatBedrock
+    if not args.real_embeddings:
+        retriever_agent_module.get_encoder = lambda backend=None: encoder
+    return {"http": http, "llm": FakeChatBedrock, "encoder": encoder}
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Times repeat runs after one warm-up, then one traced run for peak memory and allocated blocks.
+    Per-node times are the median over the untraced runs; tracemalloc slows every allocation.
+    """
+    timings = []
+    node_runs: Dict[str, List[float]] = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+            if isinstance(result, dict):
+                for node, seconds in result.get("node_timings", {}).items():
+                    node_runs.setdefault(node, []).append(seconds * 1000)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    out = {"p50_ms": statistics.median(timings), "mean_ms": statistics.mean(timings), "min_ms": min(timings),
+           "peak_kb": peak / 1024, "alloc_blocks": allocations}
+    if node_runs:
+        out["node_ms"] = {node: statistics.median(runs) for node, runs in node_runs.items()}
+    return out
+
+
+def synthetic_tickers(n: int, prefix: str = "SYN") -> List[str]:
+    return [f"{prefix}{i:05d}" for i in range(n)]
+
+
+def seed_market(tickers: List[str], days: int = 130, seed: int = 0) -> Dict[str, Any]:
+    """Writes quotes, fundamentals and history for tickers into the market cache; returns market_data."""
+    import numpy as np
+    from agents.market_cache import get_market_cache
+    cache = get_market_cache()
+    rng = np.random.default_rng(seed)
+    dates = [(datetime.now() - timedelta(days=days - i)).strftime("%Y-%m-%d") for i in range(days)]
+    market_data = {}
+    for ticker in tickers:
+        price = float(rng.uniform(5, 500))
+        closes = price * np.cumprod(1 + rng.normal(0.0003, 0.02, days))
+        quote = {"current_price": float(closes[-1]), "change_percent": f"{rng.normal(0, 1.5):.2f}%",
+                 "timestamp": dates[-1]}
+        fundamentals = {"pe_ratio": float(rng.uniform(5, 60)), "beta": float(rng.uniform(0.4, 2.2)), "volatility": None}
+        cache.put(ticker, "quote", quote)
+        cache.put(ticker, "fundamentals", fundamentals)
+        cache.put_history(ticker, dict(zip(dates, closes.tolist())))
+        market_data[ticker] = {**quote, **fundamentals}
+    return market_data
+
+
+def seed_news(companies: List[str], total_articles: int) -> Dict[str, List[Dict[str, Any]]]:
+    from benchmarks.fakes import EVENTS
+    rng = random.Random(total_articles)
+    news_data = {company: [] for company in companies}
+    for i in range(total_articles):
+        company = companies[i % len(companies)]
+        event = rng.choice(EVENTS)
+        news_data[company].append({"title": f"{company} {event}",
+                                   "content": f"{company} {event}; analysts weigh the impact ({i}).",
+                                   "url": f"https://news.example.com/{i}"})
+    return news_data
+
+
+def base_state(**overrides: Any) -> Dict[str, Any]:
+    from orchestrator.workflow import initial_state
+    return initial_state(skip_tts=True, **overrides)
+
+
+def run_scenarios(args: argparse.Namespace, sizes: Dict[str, List[int]]) -> Dict[str, Any]:
+    from agents.api_agent import api_agent
+    from agents.news_agent import news_agent
+    from agents.news_store import get_news_store, normalize_article
+    from agents.retriever_agent import retriever_agent
+    from agents.analysis_agent import analysis_agent
+    from agents.language_agent import language_agent
+    from orchestrator.runner import TimedGraph
+    from orchestrator.workflow import workflow
+
+    results: Dict[str, Any] = {}
+    selected = lambda group: not args.only or group in args.only
+
+    def record(name: str, fn: Callable[[], Any], repeat: Optional[int] = None) -> None:
+        results[name] = measure(fn, repeat or args.repeat)
+        print(f"{name:40s} p50={results[name]['p50_ms']:9.2f} ms  peak={results[name]['peak_kb']:9.0f} KB", file=sys.stderr)
+
+    if selected("api"):
+        for k in sizes["companies"]:
+            counter = iter(range(10**9))
+            # Cold: every run asks for tickers the cache has never seen
+            record(f"api_agent.cold.companies={k}", lambda k=k: api_agent(base_state(
+                companies=synthetic_tickers(k, prefix=f"C{next(counter):04d}"), intents=["price"])))
+            warm = synthetic_tickers(k, prefix="WARM")
+            seed_market(warm)
+            record(f"api_agent.warm.companies={k}", lambda warm=warm: api_agent(base_state(companies=warm, intents=["price"])))
+
+    if selected("news"):
+        store = get_news_store()
+        for k in sizes["companies"]:
+            companies = synthetic_tickers(k, prefix="NEWS")
+            for company in companies:
+                articles = [normalize_article({"title": f"{company} headline {i}", "description": f"{company} story {i}",
+                                               "url": f"https://news.example.com/{company}/{i}",
+                                               "publishedAt": (datetime.utcnow() - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")})
+                            for i in range(20)]
+                store.upsert_articles(company, articles)
+                store.set_cursor(company, articles[0]["published_at"])
+            record(f"news_agent.companies={k}", lambda companies=companies: news_agent(base_state(companies=companies)))
+
+    if selected("retriever"):
+        names = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "INTC", "NFLX", "IBM"]
+        for n in sizes["news"]:
+            news_data = seed_news(names, n)
+            for mode in ("dense", "hybrid"):
+                def run(news_data=news_data, mode=mode):
+                    os.environ["RETRIEVAL_MODE"] = mode
+                    return retriever_agent(base_state(news_data=news_data, companies=["TSLA"], transcript="why is tesla stock falling"))
+                record(f"retriever_agent.{mode}.articles={n}", run, repeat=max(1, args.repeat // (2 if n >= 1000 else 1)))
+        os.environ["RETRIEVAL_MODE"] = "dense"
+
+    if selected("analysis"):
+        for n in sizes["portfolio"]:
+            tickers = synthetic_tickers(n, prefix="PF")
+            market_data = seed_market(tickers, seed=n)
+            holdings = {t: float(random.Random(t).randint(1, 500)) for t in tickers}
+            state = base_state(market_data=market_data, portfolio_data={"holdings": holdings}, intents=["portfolio"],
+                               transcript="how is my portfolio doing")
+            record(f"analysis_agent.portfolio.holdings={n}", lambda state=state: analysis_agent(state))
+            sell = {**state, "intents": ["recommend"], "transcript": "what should i sell"}
+            record(f"analysis_agent.recommend_sell.holdings={n}", lambda sell=sell: analysis_agent(sell))
+
+    if selected("language"):
+        state = base_state(market_data={"AAPL": {"current_price": 200.0}}, analysis={"portfolio_metrics": {}},
+                           retrieved_docs=[], intents=["price"], transcript="apple stock price")
+        record("language_agent.price", lambda: language_agent(state))
+
+    if selected("e2e"):
+        graph = TimedGraph(workflow())
+        for n in sizes["e2e_portfolio"]:
+            tickers = synthetic_tickers(n, prefix="E2E")
+            seed_market(tickers, seed=n + 1)
+            with open(os.path.join("data", "portfolio.json"), "w") as f:
+                json.dump({"holdings": {t: 10 for t in tickers}}, f)
+            for label, transcript in (("price", "what is the apple stock price"),
+                                      ("portfolio", "what is my portfolio worth"),
+                                      ("why", "why is tesla stock falling")):
+                record(f"e2e.{label}.holdings={n}", lambda transcript=transcript: graph.invoke(base_state(transcript=transcript)))
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """Scenarios whose p50 time or peak memory regressed by more than threshold (relative) versus the baseline."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if not now:
+            continue
+        if now["p50_ms"] > base["p50_ms"] * (1 + threshold) and now["p50_ms"] - base["p50_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p50 {base['p50_ms']:.2f} -> {now['p50_ms']:.2f} ms")
+        if now["peak_kb"] > base["peak_kb"] * (1 + threshold) and now["peak_kb"] - base["peak_kb"] > 256:
+            regressions.append(f"{name}: peak {base['peak_kb']:.0f} -> {now['peak_kb']:.0f} KB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller workload sizes")
+    parser.add_argument("--only", nargs="+", choices=["api", "news", "retriever", "analysis", "language", "e2e"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--http-latency-ms", type=float, default=0.0, help="Fake Alpha Vantage/NewsAPI latency")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Fake Bedrock latency")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Fake per-text embedding latency")
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the configured embedding backend")
+    parser.add_argument("--save", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    workdir = tempfile.mkdtemp(prefix="market-brief-bench-")
+    logging.disable(logging.WARNING)
+    try:
+        prepare_environment(workdir, args)
+        install_fakes(args)
+        results = run_scenarios(args, QUICK_SIZES if args.quick else FULL_SIZES)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"created_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "quick": args.quick,
+                 "fake_latency_ms": {"http": args.http_latency_ms, "llm": args.llm_latency_ms, "embed": args.embed_latency_ms}},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if save_path:
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if compare_path:
+        with open(compare_path, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Per-session conversation memory carried across turns.
+
+After each turn the session remembers the resolved companies, intents and time query, the market data it
+served (with the time each quote was fetched) and the news it read. The next turn starts with that memory
+in state['context']:
+  - intent_classifier resolves follow-ups ("and what about Microsoft?", "why is it down?") against the
+    previous companies and intents without another LLM call;
+  - api_agent reuses remembered quotes that are still fresh and fetches only the rest;
+  - news_agent reuses remembered articles younger than CONVERSATION_NEWS_TTL_S.
+Sessions live in process memory (like a LangGraph in-memory checkpointer) and expire after
+CONVERSATION_TTL_S of inactivity.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+CONVERSATION_TTL_S = float(os.getenv("CONVERSATION_TTL_S", "1800"))
+CONVERSATION_NEWS_TTL_S = float(os.getenv("CONVERSATION_NEWS_TTL_S", "900"))
+MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+
+FOLLOW_UP_START = re.compile(r"^\s*(and|also|what about|how about|same for|then)\b", re.IGNORECASE)
+# "it"/"they" only count as the subject of a sentence or question ("it fell", "why is it down?"); as an
+# object ("explain it", "put it in stocks") they rarely point back at the previous company
+FOLLOW_UP_SUBJECT = (r"(?:^|[.!?;]\s*)(?:it|they)\b"
+                     r"|\b(?:is|was|are|were|does|did|do|has|have|will|would|can|could|should)\s+(?:it|they)\b"
+                     r"|\b(?:it|they)\s+(?:is|was|are|were|has|have|had|does|did|do|will|went|fell|rose|dropped|"
+                     r"jumped|closed|opened|moved)\b")
+FOLLOW_UP_REFERENCE = re.compile(FOLLOW_UP_SUBJECT + r"|\b(?:it's|its|they're|them|their|that one|this one|that stock|"
+                                 r"those|the same)\b", re.IGNORECASE)
+
+
+def is_follow_up(transcript: str) -> bool:
+    """Whether the transcript leans on the previous turn ('and what about ...', 'why is it down?')."""
+    return bool(FOLLOW_UP_START.search(transcript) or FOLLOW_UP_REFERENCE.search(transcript))
+
+
+class ConversationMemory:
+    """What one session has resolved and fetched so far; `lock` serializes the session's turns."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.companies: List[str] = []
+        self.intents: List[str] = []
+        self.time_query: Optional[str] = None
+        self.market_data: Dict[str, Dict[str, Any]] = {}  # ticker -> {'entry', 'fetched_at', 'time_query'}
+        self.news_data: Dict[str, Dict[str, Any]] = {}    # ticker -> {'articles', 'fetched_at'}
+        self.turns = 0
+        self.updated_at = time.time()
+
+    def context(self) -> Dict[str, Any]:
+        """Snapshot handed to the next turn as state['context']; news older than CONVERSATION_NEWS_TTL_S is left out."""
+        now = time.time()
+        return {
+            "turn": self.turns,
+            "companies": list(self.companies),
+            "intents": list(self.intents),
+            "time_query": self.time_query,
+            "market_data": dict(self.market_data),
+            "news_data": {ticker: news for ticker, news in self.news_data.items()
+                          if now - news["fetched_at"] <= CONVERSATION_NEWS_TTL_S},
+        }
+
+    def record(self, result: Dict[str, Any]) -> None:
+        """Merges a finished turn into the memory; failed lookups are not remembered."""
+        now = time.time()
+        if result.get("companies"):
+            self.companies = list(result["companies"])
+        if result.get("intents") and result["intents"] != ["error"]:
+            self.intents = list(result["intents"])
+            self.time_query = result.get("time_query")
+        fetched_at = result.get("market_fetched_at") or {}
+        for ticker, entry in (result.get("market_data") or {}).items():
+            if "error" not in entry and ticker in fetched_at:
+                self.market_data[ticker] = {"entry": entry, "fetched_at": fetched_at[ticker],
+                                            "time_query": result.get("time_query")}
+        context_news = (result.get("context") or {}).get("news_data", {})
+        for ticker, articles in (result.get("news_data") or {}).items():
+            if not articles:
+                continue
+            # Articles reused from memory keep their original fetch time
+            reused = context_news.get(ticker)
+            self.news_data[ticker] = {"articles": articles,
+                                      "fetched_at": reused["fetched_at"] if reused and reused["articles"] == articles else now}
+        self.turns += 1
+        self.updated_at = now
+
+
+class ConversationStore:
+    """Process-wide session memories with LRU eviction past max_sessions and an inactivity TTL."""
+
+    def __init__(self, ttl_s: float = CONVERSATION_TTL_S, max_sessions: int = MAX_SESSIONS):
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ConversationMemory:
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None or time.time() - memory.updated_at > self.ttl_s:
+                memory = ConversationMemory()
+                self._sessions[session_id] = memory
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+_store: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore()
+        return _store
+
+
+class ConversationGraph:
+    """
+    Wraps a graph so invoke() starts from the session's memory and records the turn afterwards.
+    States without a session_id run statelessly. Turns of one session are serialized so a follow-up
+    always sees the previous answer.
+    """
+
+    def __init__(self, graph: Any, store: Optional[ConversationStore] = None):
+        self.graph = graph
+        self.store = store or get_conversation_store()
+
+    def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        session_id = state.get("session_id")
+        if not session_id:
+            return self.graph.invoke(state)
+        # The lock lives with the memory, so it goes away exactly when the store evicts the session
+        memory = self.store.get(session_id)
+        with memory.lock:
+            result = self.graph.invoke({**state, "context": memory.context()})
+            memory.record(result)
+            return result
@@ -0,0 +1,156 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from agents.deadline import new_deadline
+from agents.logging_utils import get_logger
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = get_logger(__name__)
+
+WORK_ROOT = os.path.join("data", "requests")
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor's queue is full; callers should ask the user to retry."""
+
+
+def default_workers() -> int:
+    """
+    Worker count: EXECUTOR_MAX_WORKERS if set, otherwise two per core (graph runs mostly wait on
+    providers), capped by EXECUTOR_PROVIDER_CONCURRENCY so bursts stay inside provider rate limits.
+    """
+    if os.getenv("EXECUTOR_MAX_WORKERS"):
+        return max(1, int(os.getenv("EXECUTOR_MAX_WORKERS")))
+    provider_cap = int(os.getenv("EXECUTOR_PROVIDER_CONCURRENCY", "8"))
+    return max(1, min(2 * (os.cpu_count() or 1), provider_cap))
+
+
+def new_request_state(state: Dict[str, Any], request_id: Optional[str] = None, work_root: str = WORK_ROOT,
+                      budget_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Copy of state with a request id, a private working directory for its audio files (so concurrent
+    sessions never share data/input.wav or data/output.mp3) and a deadline (REQUEST_DEADLINE_S unless
+    budget_s is given), which starts counting now so queue wait is part of the budget.
+    The working directory is always named by a fresh uuid, never by request_id: ids can come from
+    clients, and duplicates must not share (or escape) a directory.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    work_dir = os.path.join(work_root, uuid.uuid4().hex)
+    os.makedirs(work_dir, exist_ok=True)
+    deadline = state.get("deadline") or new_deadline(budget_s)
+    return {**state, "request_id": request_id, "work_dir": work_dir, "deadline": deadline}
+
+
+class RequestExecutor:
+    """
+    Bounded executor in front of graph.invoke.
+    At most max_workers graph runs execute at once and at most max_queue more wait; anything beyond
+    that is rejected immediately with ExecutorBusy instead of piling up behind a saturated pool.
+    """
+
+    def __init__(self, graph: Any, max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 work_root: str = WORK_ROOT, work_dir_ttl_s: float = 3600):
+        self.graph = graph
+        self.max_workers = max_workers or default_workers()
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("EXECUTOR_MAX_QUEUE", str(2 * self.max_workers)))
+        self.work_root = work_root
+        self.work_dir_ttl_s = work_dir_ttl_s
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="graph")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._waits = deque(maxlen=500)
+        self._runs = deque(maxlen=500)
+        self._last_cleanup = 0.0
+
+    def submit(self, state: Dict[str, Any], request_id: Optional[str] = None) -> Future:
+        """
+        Admits a request or raises ExecutorBusy. The future resolves to the graph result,
+        which includes request_id and work_dir.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["rejected"] += 1
+            logger.warning("Executor Busy", **self.metrics())
+            raise ExecutorBusy("The assistant is busy right now. Please try again in a moment.")
+        with self._lock:
+            self._counters["submitted"] += 1
+            self._queued += 1
+        self._maybe_cleanup()
+        try:
+            request_state = state if "work_dir" in state else new_request_state(state, request_id, self.work_root)
+            return self._pool.submit(self._run, request_state, time.perf_counter())
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+
+    def run(self, state: Dict[str, Any], request_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Submits and waits for the result."""
+        return self.submit(state, request_id).result(timeout=timeout)
+
+    def _run(self, state: Dict[str, Any], submitted_at: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._waits.append(started - submitted_at)
+        ok = False
+        try:
+            result = self.graph.invoke(state)
+            ok = True
+            return {**result, "request_id": state["request_id"], "work_dir": state["work_dir"]}
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._runs.append(time.perf_counter() - started)
+                self._counters["completed" if ok else "failed"] += 1
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight runs, counters and recent queue-wait/run-time percentiles (seconds)."""
+        def pct(values, q):
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+        with self._lock:
+            return {
+                "queue_depth": self._queued,
+                "running": self._running,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                **self._counters,
+                "queue_wait_p50": pct(self._waits, 0.5),
+                "queue_wait_p95": pct(self._waits, 0.95),
+                "run_time_p50": pct(self._runs, 0.5),
+                "run_time_p95": pct(self._runs, 0.95),
+            }
+
+    def _maybe_cleanup(self) -> None:
+        """Removes request working directories older than work_dir_ttl_s, at most once a minute."""
+        now = time.time()
+        with self._lock:
+            if now - self._last_cleanup < 60:
+                return
+            self._last_cleanup = now
+        if not os.path.isdir(self.work_root):
+            return
+        for name in os.listdir(self.work_root):
+            path = os.path.join(self.work_root, name)
+            try:
+                if now - os.path.getmtime(path) > self.work_dir_ttl_s:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
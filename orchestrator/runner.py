@@ -0,0 +1,270 @@
+"""
+Headless entry points for the workflow: batch JSONL runs and a small local HTTP endpoint.
+
+Each request is a JSON object with either a "transcript" (STT is skipped) or an "audio_path",
+plus optional "id", "user_id", "tts" (default false: return the narrative without audio),
+"deadline_s" (time budget; default REQUEST_DEADLINE_S) and "session_id" (requests sharing one are
+turns of a conversation; follow-ups reuse earlier turns' companies, intents and data).
+
+The "id" is only a label echoed in the result; every run gets its own request_id and working
+directory. Over HTTP, "audio_path" must point inside --audio-dir (RUNNER_AUDIO_DIR).
+
+Batch:  python -m orchestrator.runner --input requests.jsonl --output results.jsonl --parallel 4
+HTTP:   python -m orchestrator.runner --serve --port 8765
+        POST /run with one request object; GET /metrics; GET /healthz
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterable, Optional
+from agents.logging_utils import get_logger
+from agents.speculation import get_speculation
+from orchestrator.conversation import ConversationGraph
+from orchestrator.executor import ExecutorBusy, RequestExecutor, new_request_state
+from orchestrator.workflow import initial_state, workflow
+
+logger = get_logger(__name__)
+
+RESULT_FIELDS = ("transcript", "intents", "companies", "narrative", "audio_output", "error", "degradations", "brief")
+
+
+class TimedGraph:
+    """
+    Wraps a compiled graph so invoke() also records wall time per node, using LangGraph's
+    streamed updates (one chunk per finished node) alongside the full state values.
+    """
+
+    def __init__(self, graph: Any):
+        self.graph = graph
+
+    def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        timings: Dict[str, float] = {}
+        final = dict(state)
+        last = time.perf_counter()
+        for mode, chunk in self.graph.stream(state, stream_mode=["updates", "values"]):
+            if mode == "updates":
+                now = time.perf_counter()
+                for node in chunk:
+                    timings[node] = timings.get(node, 0.0) + (now - last)
+                last = now
+            else:
+                final = chunk
+        return {**final, "node_timings": timings}
+
+
+AUDIO_DIR = os.path.join("data", "audio")
+
+
+def resolve_audio_path(audio_path: str, audio_root: Optional[str]) -> str:
+    """The audio file to read; with audio_root, only files inside that directory are accepted."""
+    if audio_root is None:
+        return audio_path
+    root = os.path.realpath(audio_root)
+    path = os.path.realpath(os.path.join(root, audio_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"audio_path must be inside {audio_root}")
+    return path
+
+
+def build_state(request: Dict[str, Any], audio_root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Maps a request object onto a fresh workflow state in its own working directory.
+    With audio_root (HTTP requests), audio_path is resolved inside that directory and nothing else is read.
+    """
+    if "_parse_error" in request:
+        raise ValueError(f"Invalid JSON: {request['_parse_error']}")
+    transcript = (request.get("transcript") or "").strip()
+    audio_path = request.get("audio_path")
+    if not transcript and not audio_path:
+        raise ValueError("Request needs a 'transcript' or an 'audio_path'")
+    if not transcript:
+        audio_path = resolve_audio_path(audio_path, audio_root)
+        if not os.path.isfile(audio_path):
+            raise ValueError(f"Audio file not found: {request.get('audio_path')}")
+    state = new_request_state(initial_state(
+        transcript=transcript,
+        user_id=request.get("user_id", "default"),
+        skip_tts=not request.get("tts", False),
+        session_id=str(request.get("session_id") or ""),
+    ), budget_s=request.get("deadline_s"))
+    if not transcript:
+        state["audio_input"] = os.path.join(state["work_dir"], "input" + os.path.splitext(audio_path)[1])
+        shutil.copyfile(audio_path, state["audio_input"])
+    return state
+
+
+def to_result(request: Dict[str, Any], state: Optional[Dict[str, Any]], started: float, error: Optional[str] = None) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"id": request.get("id")}
+    if state is not None:
+        result["request_id"] = state.get("request_id")
+        if result["id"] is None:
+            result["id"] = result["request_id"]
+        result.update({field: state.get(field) for field in RESULT_FIELDS})
+    if error:
+        result["error"] = error
+    result["status"] = "error" if result.get("error") else "ok"
+    result["timings"] = {"total_s": round(time.perf_counter() - started, 4),
+                         "nodes_s": {k: round(v, 4) for k, v in (state or {}).get("node_timings", {}).items()}}
+    return result
+
+
+def run_batch(requests: Iterable[Dict[str, Any]], executor: RequestExecutor, output, parallel: int) -> Dict[str, int]:
+    """
+    Runs requests through the executor with at most `parallel` in flight and streams one JSONL result
+    per request to output as each finishes. Output order follows completion, not input.
+    """
+    in_flight = threading.BoundedSemaphore(parallel)
+    write_lock = threading.Lock()
+    counts = {"ok": 0, "error": 0}
+
+    def write(result: Dict[str, Any]) -> None:
+        with write_lock:
+            counts[result["status"]] += 1
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    for request in requests:
+        # The deadline is stamped once a slot is free, so waiting behind earlier requests does not eat the budget
+        in_flight.acquire()
+        started = time.perf_counter()
+        try:
+            state = build_state(request)
+        except Exception as e:
+            in_flight.release()
+            write(to_result(request, None, started, str(e)))
+            continue
+        try:
+            future = executor.submit(state)
+        except Exception as e:
+            in_flight.release()
+            write(to_result(request, state, started, str(e)))
+            continue
+
+        def done(f: Future, request=request, state=state, started=started) -> None:
+            try:
+                write(to_result(request, f.result(), started))
+            except Exception as e:
+                write(to_result(request, state, started, str(e)))
+            finally:
+                in_flight.release()
+
+        future.add_done_callback(done)
+
+    # Callbacks release their slot after writing, so holding every slot means all results are written
+    for _ in range(parallel):
+        in_flight.acquire()
+    return counts
+
+
+def parse_jsonl(lines: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    """Request objects from JSONL lines; a malformed line becomes a request that fails with its parse error."""
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            request = {"id": f"line-{line_no}", "_parse_error": str(e)}
+        if not isinstance(request, dict):
+            request = {"id": f"line-{line_no}", "_parse_error": "Request must be a JSON object"}
+        yield request
+
+
+def read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, "r") as f:
+        yield from parse_jsonl(f)
+
+
+def make_handler(executor: RequestExecutor, audio_root: str = AUDIO_DIR):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send(200, {**executor.metrics(), "speculation": get_speculation().metrics()})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/run":
+                self._send(404, {"error": "not found"})
+                return
+            started = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+                state = build_state(request, audio_root)
+            except Exception as e:
+                self._send(400, {"status": "error", "error": str(e)})
+                return
+            try:
+                self._send(200, to_result(request, executor.run(state), started))
+            except ExecutorBusy as e:
+                self._send(503, {"status": "busy", "error": str(e)})
+            except Exception as e:
+                self._send(500, to_result(request, state, started, str(e)))
+
+        def log_message(self, format, *args):
+            logger.info("Runner HTTP", client=self.address_string(), request=format % args)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="requests.jsonl", help="JSONL file of requests ('-' for stdin)")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file for results ('-' for stdout)")
+    parser.add_argument("--parallel", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--serve", action="store_true", help="Serve HTTP instead of running a batch")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--audio-dir", default=os.getenv("RUNNER_AUDIO_DIR", AUDIO_DIR),
+                        help="Directory HTTP requests may read audio_path from")
+    args = parser.parse_args()
+
+    executor = RequestExecutor(ConversationGraph(TimedGraph(workflow())), max_workers=args.parallel,
+                               max_queue=None if args.serve else args.parallel)
+    if args.serve:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(executor, args.audio_dir))
+        logger.info("Runner Serving", url=f"http://{args.host}:{args.port}", workers=executor.max_workers)
+        try:
+            server.serve_forever()
+        finally:
+            executor.shutdown()
+        return
+
+    requests = read_jsonl(args.input) if args.input != "-" else parse_jsonl(sys.stdin)
+    output = open(args.output, "w") if args.output != "-" else sys.stdout
+    started = time.perf_counter()
+    try:
+        counts = run_batch(requests, executor, output, args.parallel)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        executor.shutdown()
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["error"]
+    logger.info("Runner Batch Done", **counts, elapsed_s=round(elapsed, 2),
+                throughput=round(total / elapsed, 2) if elapsed else 0, metrics=executor.metrics(),
+                speculation=get_speculation().metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,29 @@
-import logging
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List, Dict, Any
-from agents.api_agent import api_agent
+from typing import Annotated, TypedDict, List, Dict, Any, Optional
+from agents.api_agent import api_agent, prefetch_market_data
 from agents.retriever_agent import retriever_agent
 from agents.analysis_agent import analysis_agent
 from agents.language_agent import language_agent
 from agents.voice_agent import voice_agent
-from agents.news_agent import news_agent
+from agents.news_agent import news_agent, prefetch_news
+from agents.deadline import DeadlineExceeded, boto_config, degraded, node_budget, run_with_timeout
+from agents.entity_resolver import get_entity_resolver
+from agents.logging_utils import get_logger
+from agents.portfolio_store import DEFAULT_USER, get_portfolio_store
+from agents.speculation import get_speculation, speculation_enabled
+from agents.brief_store import BriefStore, brief_key, get_brief_store
+from orchestrator.conversation import is_follow_up
 from langchain_aws import ChatBedrock
 import json
+import operator
 import re
 import os
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv() 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class State(TypedDict):
     transcript: str
@@ -33,13 +40,54 @@ class State(TypedDict):
     time_query: str
     error: str
     node: str  # Added to track node context
+    user_id: str  # Selects the portfolio in the portfolio store
+    request_id: str
+    work_dir: str  # Per-request directory for audio files
+    skip_tts: bool  # Headless runs can return the narrative without synthesizing audio
+    deadline: float  # Absolute request deadline (epoch seconds); see agents/deadline.py
+    degradations: Annotated[List[str], operator.add]  # Shortcuts nodes took to stay inside the deadline
+    session_id: str  # Conversation this turn belongs to; see orchestrator/conversation.py
+    context: Dict[str, Any]  # Previous turns' companies, intents and fetched data for follow-ups
+    market_fetched_at: Dict[str, float]  # ticker -> when the served quote was fetched
+    brief: str  # Key of the precomputed brief that answered the request, if any
+    skip_briefs: bool  # Set by workers/brief_materializer.py so builds run the full pipeline
+
+NEWS_WORDS = ["why", "rising", "falling", "up", "down"]
+
+def needs_news(transcript: str) -> bool:
+    """Trend questions ("why", "rising", ...) are answered from news rather than quotes."""
+    transcript = transcript.lower()
+    return any(word in transcript for word in NEWS_WORDS)
+
+def speculate_fetch(state: State, companies: List[str], intents: List[str], time_query: str) -> None:
+    """
+    Starts the fetches the keyword pass predicts (news or quotes, plus holdings when "portfolio" was said)
+    so they run alongside the intent LLM call; api_agent/news_agent take over the ones they need.
+    """
+    if not speculation_enabled():
+        return
+    try:
+        deadline = time.time() + node_budget(state, "intent_classifier") + node_budget(state, "api_agent")
+        if needs_news(state.get("transcript", "")):
+            get_speculation().start(state.get("request_id"), "news", companies, prefetch_news, deadline)
+            return
+        tickers = list(companies)
+        if "portfolio" in intents:
+            tickers += get_portfolio_store().get(state.get("user_id") or DEFAULT_USER).tickers
+        kinds = ["quote", "fundamentals"] + (["history"] if time_query else [])
+        get_speculation().start(state.get("request_id"), "market", tickers, prefetch_market_data, kinds, deadline)
+    except Exception as e:
+        logger.warning("Speculation Error", error=str(e))
 
 def intent_classifier(state: State) -> State:
     """
     Classifie intents using LLM with fallback keyword matching.
+    Companies come from the entity resolver (aliases, misspellings and the listing universe).
+    Follow-ups without their own companies or intents inherit them from the conversation context.
+    With SPECULATIVE_PREFETCH=1 the likely fetches start before the LLM call (speculate_fetch).
     """
     transcript = state.get("transcript", "").lower()
-    logger.info(f"Intent_Classifier Input: transcript={transcript}")
+    logger.info("Intent_Classifier Input", transcript=transcript)
     if not transcript:
         logger.error("Intent_Classifier Error: No transcript available")
         return {
@@ -49,23 +97,8 @@ def intent_classifier(state: State) -> State:
             "error": "No transcript generated from audio."
         }
 
-    # Load LLM configuration from environment variables
-    model_id = os.getenv("LLM_MODEL_ID")
-    region_name = os.getenv("LLM_REGION")
-    if not model_id or not region_name:
-        raise ValueError("LLM_MODEL_ID or LLM_REGION not set in environment variables")
-
-    llm = ChatBedrock(model_id=model_id, region_name=region_name)
-
-    # Load ticker_map from config.json
-    with open("config.json", "r") as f:
-        config = json.load(f)
-    ticker_map = config["ticker_map"]
-
-    companies = []
-    for name, ticker in ticker_map.items():
-        if name.lower() in transcript or ticker.lower() in transcript:
-            companies.append(ticker)
+    # Single pass over the raw transcript (capitals matter for bare tickers); see agents/entity_resolver.py
+    companies = get_entity_resolver().tickers(state.get("transcript", ""))
 
     intents = []
     portfolio_keywords = ["portfolio", "balance", "holdings", "investment"]
@@ -81,6 +114,37 @@ def intent_classifier(state: State) -> State:
     if any(keyword in transcript for keyword in price_keywords):
         intents.append("price")
 
+    time_query = None
+    if "ago" in transcript:
+        match = re.search(r"(\d+)\s*(day|week|month|year)s?\s*ago", transcript)
+        if match:
+            time_query = match.group(0)
+
+    # Follow-ups ("and what about Microsoft?", "why is it down?") lean on the previous turn
+    context = state.get("context") or {}
+    if context.get("turn") and is_follow_up(transcript):
+        if not companies:
+            companies = list(context.get("companies", []))
+        if not intents and context.get("intents"):
+            output = {
+                "intents": list(context["intents"]),
+                "companies": companies,
+                "time_query": time_query or context.get("time_query"),
+                "error": None
+            }
+            logger.info("Intent_Classifier Output: follow-up", **output)
+            return output
+
+    # Load LLM configuration from environment variables
+    model_id = os.getenv("LLM_MODEL_ID")
+    region_name = os.getenv("LLM_REGION")
+    if not model_id or not region_name:
+        raise ValueError("LLM_MODEL_ID or LLM_REGION not set in environment variables")
+
+    budget = node_budget(state, "intent_classifier")
+    llm = ChatBedrock(model_id=model_id, region_name=region_name, config=boto_config(budget))
+    speculate_fetch(state, companies, intents, time_query)
+
     prompt = f"""
     You are a financial assistant. Analyze the query: '{transcript}'.
     Identify all applicable intents from: [price, portfolio, compare, recommend].
@@ -92,8 +156,9 @@ def intent_classifier(state: State) -> State:
     If no intents match, return ["error"].
     Example: ["portfolio", "recommend"]
     """
+    degradations = []
     try:
-        response = llm.invoke(prompt)
+        response = run_with_timeout(llm.invoke, budget, prompt, pool="bedrock")
         content = response.content.strip()
         if not content:
             raise ValueError("Empty LLM response")
@@ -103,48 +168,153 @@ def intent_classifier(state: State) -> State:
         intents = list(set(intents + intents_llm))
         if not intents or intents == ["error"]:
             intents = ["error"]
+    except DeadlineExceeded as e:
+        logger.warning("Intent_Classifier Deadline: using keyword intents", error=str(e))
+        degradations = degraded("intent_classifier", "keyword_intents")
+        intents = intents if intents else ["error"]
     except Exception as e:
-        logger.error(f"Intent_Classifier Error: {e}")
+        logger.error("Intent_Classifier Error", error=str(e))
         intents = intents if intents else ["error"]
 
-    time_query = None
-    if "ago" in transcript:
-        match = re.search(r"(\d+)\s*(day|week|month|year)s?\s*ago", transcript)
-        if match:
-            time_query = match.group(0)
-
     output = {
         "intents": intents,
         "companies": companies,
         "time_query": time_query,
         "error": None if intents != ["error"] else "Intent classification failed"
     }
-    logger.info(f"Intent_Classifier Output: {output}")
-    return output
+    logger.info("Intent_Classifier Output", **output)
+    return {**output, "degradations": degradations}
 
 def load_portfolio(state: State) -> State:
     """
-    Loads portfolio data from data/portfolio.json.
+    Loads the session user's portfolio from the portfolio store (data/portfolio.json for the default user).
+    Parsed portfolios are cached and only re-read when their file changes.
     """
-    logger.info("Loading portfolio data")
+    user_id = state.get("user_id") or DEFAULT_USER
+    logger.info("Loading portfolio data", user=user_id)
     try:
-        with open("data/portfolio.json", "r") as f:
-            portfolio_data = json.load(f)
-        logger.info(f"Portfolio Data Loaded: {portfolio_data}")
+        portfolio = get_portfolio_store().get(user_id)
+        portfolio_data = {"user_id": user_id, "version": portfolio.version, "holdings": portfolio.holdings}
+        logger.info("Portfolio Data Loaded", user=user_id, version=portfolio.version, holdings=len(portfolio))
         return {"portfolio_data": portfolio_data}
     except Exception as e:
-        logger.error(f"Portfolio Load Error: {e}")
+        logger.error("Portfolio Load Error", error=str(e))
         return {"portfolio_data": {}, "error": str(e)}
 
+def match_brief(state: State) -> Optional[str]:
+    """
+    Key of the brief that would answer this request: a single company's price or "why is X up",
+    or the user's portfolio value. Anything else (comparisons, time queries) runs the pipeline.
+    """
+    intents = state.get("intents") or []
+    companies = state.get("companies") or []
+    if state.get("time_query"):
+        return None
+    if intents == ["portfolio"] and not companies:
+        return brief_key("portfolio", state.get("user_id") or DEFAULT_USER)
+    if intents == ["price"] and len(companies) == 1:
+        return brief_key("news" if needs_news(state.get("transcript", "")) else "price", companies[0])
+    return None
+
+def brief_lookup(state: State) -> State:
+    """
+    Serves the request from the brief store (filled by workers/brief_materializer.py) when a matching
+    brief is still fresh: no price move past BRIEF_MOVE_PCT since it was built and, for portfolios,
+    the same holdings.
+    Output: Updates State with the brief's narrative, analysis, data, audio and 'brief', or nothing.
+    """
+    key = None if state.get("skip_briefs") else match_brief(state)
+    if not key:
+        return {}
+    try:
+        brief = get_brief_store().get(key)
+        if not brief:
+            logger.info("Brief Miss", key=key, reason="missing")
+            return {}
+        holdings = state.get("portfolio_data", {}).get("holdings", {}) if brief["kind"] == "portfolio" else None
+        reason = BriefStore.stale_reason(brief, holdings)
+        if reason:
+            logger.info("Brief Miss", key=key, reason=reason)
+            return {}
+    except Exception as e:
+        logger.error("Brief Lookup Error", key=key, error=str(e))
+        return {}
+    get_speculation().discard(state.get("request_id"))
+    payload = brief["payload"]
+    logger.info("Brief Hit", key=key, age_s=round(time.time() - brief["built_at"], 1))
+    return {
+        "brief": key,
+        "narrative": payload.get("narrative", ""),
+        "analysis": payload.get("analysis", {}),
+        "market_data": payload.get("market_data", {}),
+        "market_fetched_at": payload.get("market_fetched_at", {}),
+        "news_data": payload.get("news_data", {}),
+        "audio_output": "" if state.get("skip_tts") else (brief["audio_path"] or ""),
+    }
+
+def initial_state(**overrides: Any) -> Dict[str, Any]:
+    """
+    Blank workflow state, optionally pre-filled (e.g. with a transcript to skip STT).
+    """
+    state = {
+        "transcript": "",
+        "companies": [],
+        "intents": [],
+        "market_data": {},
+        "news_data": {},
+        "retrieved_docs": [],
+        "portfolio_data": {},
+        "analysis": {},
+        "narrative": "",
+        "audio_input": "",
+        "audio_output": "",
+        "time_query": None,
+        "error": None,
+        "node": "",
+        "user_id": "default",
+        "skip_tts": False,
+        "deadline": None,
+        "degradations": [],
+        "session_id": "",
+        "context": {},
+        "market_fetched_at": {},
+        "brief": "",
+        "skip_briefs": False
+    }
+    state.update(overrides)
+    return state
+
+def route_entry(state: State) -> str:
+    """
+    Skips STT when the request already carries a transcript, and intent classification when it also
+    carries intents (brief builds in workers/brief_materializer.py).
+    """
+    if state.get("transcript") and state.get("intents"):
+        return "load_portfolio"
+    return "intent_classifier" if state.get("transcript") else "voice_agent_stt"
+
+def route_after_brief(state: State) -> str:
+    """
+    A served brief ends the run (or only synthesizes audio if the brief has none); otherwise fetch.
+    """
+    if not state.get("brief"):
+        return should_fetch_news(state)
+    return END if state.get("skip_tts") or state.get("audio_output") else "voice_agent_tts"
+
+def should_synthesize(state: State) -> str:
+    """
+    Skips TTS for headless requests that only want the narrative.
+    """
+    return END if state.get("skip_tts") else "voice_agent_tts"
+
 def should_fetch_news(state: State) -> str:
     """
     Determines if news should be fetched based on intents and transcript.
     """
-    transcript = state.get("transcript", "").lower()
     intents = state.get("intents", [])
-    needs_news = any(word in transcript for word in ["why", "rising", "falling", "up", "down"])
-    logger.info(f"Should fetch news: intents={intents}, needs_news={needs_news}")
-    return "news_agent" if "price" in intents and needs_news else "api_agent"
+    news = needs_news(state.get("transcript", ""))
+    logger.info("Should fetch news", intents=intents, needs_news=news)
+    return "news_agent" if "price" in intents and news else "api_agent"
 
 def workflow():
     """
@@ -154,6 +324,7 @@ def workflow():
     graph.add_node("voice_agent_stt", lambda state: voice_agent({**state, "node": "voice_agent_stt"}))
     graph.add_node("intent_classifier", intent_classifier)
     graph.add_node("load_portfolio", load_portfolio)
+    graph.add_node("brief_lookup", brief_lookup)
     graph.add_node("api_agent", api_agent)
     graph.add_node("news_agent", news_agent)
     graph.add_node("retriever_agent", retriever_agent)
@@ -163,16 +334,26 @@ def workflow():
 
     graph.add_edge("voice_agent_stt", "intent_classifier")
     graph.add_edge("intent_classifier", "load_portfolio")
-    graph.add_conditional_edges("load_portfolio", should_fetch_news, {
+    graph.add_edge("load_portfolio", "brief_lookup")
+    graph.add_conditional_edges("brief_lookup", route_after_brief, {
         "news_agent": "news_agent",
-        "api_agent": "api_agent"
+        "api_agent": "api_agent",
+        "voice_agent_tts": "voice_agent_tts",
+        END: END
     })
     graph.add_edge("news_agent", "retriever_agent")
     graph.add_edge("api_agent", "retriever_agent")
     graph.add_edge("retriever_agent", "analysis_agent")
     graph.add_edge("analysis_agent", "language_agent")
-    graph.add_edge("language_agent", "voice_agent_tts")
+    graph.add_conditional_edges("language_agent", should_synthesize, {
+        "voice_agent_tts": "voice_agent_tts",
+        END: END
+    })
     graph.add_edge("voice_agent_tts", END)
 
-    graph.set_entry_point("voice_agent_stt")
+    graph.set_conditional_entry_point(route_entry, {
+        "voice_agent_stt": "voice_agent_stt",
+        "intent_classifier": "intent_classifier",
+        "load_portfolio": "load_portfolio"
+    })
     return graph.compile()
\ No newline at end of file
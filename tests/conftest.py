@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported as in `python -m ...` runs from the repo root (agents.*, orchestrator.*, workers.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
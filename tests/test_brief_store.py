@@ -0,0 +1,137 @@
+import os
+import time
+import pytest
+import agents.brief_store as brief_store_module
+from agents.brief_store import BRIEF_MAX_AGE_S, BriefStore, brief_key, moved, quote_basis
+from agents.market_cache import MarketCache
+
+PAYLOAD = {"narrative": "Apple is at $200.00.", "analysis": {}, "market_data": {"AAPL": {"current_price": 200.0}},
+           "market_fetched_at": {"AAPL": 1.0}, "news_data": {}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MarketCache(str(tmp_path / "market.db"))
+    cache.put("AAPL", "quote", {"current_price": 200.0})
+    cache.put("MSFT", "quote", {"current_price": 400.0})
+    return cache
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BriefStore(str(tmp_path / "briefs.db"), str(tmp_path / "briefs"))
+
+
+def test_put_and_get_round_trip(store, cache, tmp_path):
+    audio = tmp_path / "output.mp3"
+    audio.write_bytes(b"mp3")
+    basis = {"quotes": quote_basis(["AAPL", "NVDA"], cache)}
+    assert list(basis["quotes"]) == ["AAPL"] and basis["quotes"]["AAPL"]["price"] == 200.0
+
+    key = store.put("price", "AAPL", PAYLOAD, basis, str(audio))
+    assert key == brief_key("price", "AAPL") == "price:AAPL"
+    brief = store.get(key)
+    assert (brief["kind"], brief["subject"], brief["payload"], brief["basis"]) == ("price", "AAPL", PAYLOAD, basis)
+    assert brief["audio_path"] == os.path.join(str(tmp_path / "briefs"), "price_AAPL.mp3")
+    with open(brief["audio_path"], "rb") as f:
+        assert f.read() == b"mp3"
+    assert list(store.built_at()) == [key]
+
+    store.put("price", "AAPL", {**PAYLOAD, "narrative": "Apple is at $201.00."}, basis)
+    assert store.get(key)["payload"]["narrative"] == "Apple is at $201.00." and store.get(key)["audio_path"] is None
+    store.delete(key)
+    assert store.get(key) is None and store.get("price:UNKNOWN") is None
+
+
+def test_fresh_brief_is_servable(store, cache):
+    key = store.put("price", "AAPL", PAYLOAD, {"quotes": quote_basis(["AAPL"], cache)})
+    assert BriefStore.stale_reason(store.get(key), cache=cache) is None
+
+
+def test_stale_reasons(store, cache):
+    key = store.put("portfolio", "default", PAYLOAD,
+                    {"quotes": quote_basis(["AAPL", "MSFT"], cache), "holdings": {"AAPL": 10, "MSFT": 5}})
+    brief = store.get(key)
+    assert BriefStore.stale_reason(brief, {"AAPL": 10, "MSFT": 5}, cache) is None
+    assert BriefStore.stale_reason(brief, {"AAPL": 10}, cache) == "holdings_changed"
+    assert BriefStore.stale_reason(brief, cache=cache, now=brief["built_at"] + BRIEF_MAX_AGE_S + 1) == "age"
+
+    # A move below BRIEF_MOVE_PCT keeps the brief; a larger one retires it
+    cache.put("MSFT", "quote", {"current_price": 400.4})
+    assert BriefStore.stale_reason(brief, cache=cache) is None
+    cache.put("MSFT", "quote", {"current_price": 404.0})
+    assert BriefStore.stale_reason(brief, cache=cache) == "price_move"
+
+    cache.put("AAPL", "quote", {"current_price": 200.0}, fetched_at=time.time() - 7 * 86400)
+    assert BriefStore.stale_reason(brief, cache=cache) == "quote_stale"
+
+
+def test_moved_compares_against_the_basis_price():
+    basis = {"AAPL": {"price": 100.0, "fetched_at": 0}, "MSFT": {"price": 100.0, "fetched_at": 0}}
+    current = {"AAPL": ({"current_price": 100.4}, 0), "MSFT": ({"current_price": 99.0}, 0)}
+    assert moved(basis, current, threshold_pct=0.5) == ["MSFT"]
+    assert moved(basis, {}, threshold_pct=0.5) == []
+
+
+@pytest.fixture
+def workflow_module(store, cache, monkeypatch):
+    for module in ("dotenv", "langgraph", "langchain_aws", "yfinance"):
+        pytest.importorskip(module)
+    import orchestrator.workflow as workflow_module
+    monkeypatch.setattr(workflow_module, "get_brief_store", lambda: store)
+    monkeypatch.setattr(brief_store_module, "get_market_cache", lambda: cache)
+    return workflow_module
+
+
+def price_state(workflow_module, **overrides):
+    return workflow_module.initial_state(**{"transcript": "what is the apple stock price", "intents": ["price"],
+                                            "companies": ["AAPL"], "skip_tts": True, **overrides})
+
+
+def test_brief_lookup_short_circuits_the_pipeline(workflow_module, store, cache):
+    store.put("price", "AAPL", PAYLOAD, {"quotes": quote_basis(["AAPL"], cache)})
+    state = price_state(workflow_module)
+    update = workflow_module.brief_lookup(state)
+    assert update["brief"] == "price:AAPL"
+    assert update["narrative"] == PAYLOAD["narrative"] and update["market_data"] == PAYLOAD["market_data"]
+    assert workflow_module.route_after_brief({**state, **update}) == workflow_module.END
+    assert workflow_module.route_after_brief(state) != workflow_module.END
+
+
+def test_brief_lookup_falls_through(workflow_module, store, cache):
+    # No brief stored yet
+    assert workflow_module.brief_lookup(price_state(workflow_module)) == {}
+    store.put("price", "AAPL", PAYLOAD, {"quotes": quote_basis(["AAPL"], cache)})
+    # Requests the briefs do not cover, and brief builds themselves, run the pipeline
+    assert workflow_module.brief_lookup(price_state(workflow_module, skip_briefs=True)) == {}
+    assert workflow_module.brief_lookup(price_state(workflow_module, time_query="1 week ago")) == {}
+    assert workflow_module.brief_lookup(price_state(workflow_module, companies=["AAPL", "MSFT"])) == {}
+    # A stale brief is not served
+    cache.put("AAPL", "quote", {"current_price": 210.0})
+    assert workflow_module.brief_lookup(price_state(workflow_module)) == {}
+
+
+def test_materializer_stores_only_clean_builds(workflow_module, store, cache, tmp_path, monkeypatch):
+    import workers.brief_materializer as materializer
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(materializer, "quote_basis", lambda tickers: quote_basis(tickers, cache))
+
+    class Graph:
+        def __init__(self, result):
+            self.result = result
+            self.states = []
+
+        def invoke(self, state):
+            self.states.append(state)
+            return self.result
+
+    graph = Graph({**PAYLOAD, "degradations": []})
+    assert materializer.build(graph, store, "price", "AAPL", "Apple", with_audio=False) == "price:AAPL"
+    built = graph.states[0]
+    assert (built["intents"], built["companies"], built["skip_briefs"], built["skip_tts"]) == (["price"], ["AAPL"], True, True)
+    assert not os.path.exists(built["work_dir"])
+    assert store.get("price:AAPL")["basis"]["quotes"]["AAPL"]["price"] == 200.0
+
+    degraded = Graph({**PAYLOAD, "degradations": ["api_agent:stale_quotes(MSFT)"]})
+    assert materializer.build(degraded, store, "price", "MSFT", "Microsoft", with_audio=False) is None
+    assert store.get("price:MSFT") is None
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+import pytest
+from orchestrator.conversation import (CONVERSATION_NEWS_TTL_S, ConversationGraph, ConversationMemory,
+                                       ConversationStore, is_follow_up)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("transcript", [
+    "and what about Microsoft?",
+    "What about Nvidia",
+    "why is it down?",
+    "Did it beat earnings?",
+    "It dropped a lot today, why?",
+    "Apple is up. It rose 3% this week?",
+    "what's its PE ratio?",
+    "how are they doing",
+    "is that stock a buy?",
+])
+def test_follow_up_phrasings(transcript):
+    assert is_follow_up(transcript)
+
+
+@pytest.mark.parametrize("transcript", [
+    "what is the apple stock price",
+    "explain it simply, what is a PE ratio",
+    "should I put my savings in it or in bonds",
+    "is Apple a good pick, can you explain it to me",
+    "compare tesla and ford",
+])
+def test_standalone_questions_are_not_follow_ups(transcript):
+    assert not is_follow_up(transcript)
+
+
+def test_record_remembers_resolved_turns_only():
+    memory = ConversationMemory()
+    memory.record({"companies": ["AAPL"], "intents": ["price"], "time_query": "1 week ago",
+                   "market_data": {"AAPL": {"current_price": 200.0}, "MSFT": {"error": "no data"}},
+                   "market_fetched_at": {"AAPL": 100.0, "MSFT": 100.0},
+                   "news_data": {"AAPL": [{"title": "Apple beats"}], "MSFT": []}})
+    context = memory.context()
+    assert context["turn"] == 1
+    assert (context["companies"], context["intents"], context["time_query"]) == (["AAPL"], ["price"], "1 week ago")
+    assert context["market_data"] == {"AAPL": {"entry": {"current_price": 200.0}, "fetched_at": 100.0,
+                                               "time_query": "1 week ago"}}
+    assert list(context["news_data"]) == ["AAPL"]
+
+    # A failed turn counts but does not overwrite what was resolved before
+    memory.record({"companies": [], "intents": ["error"]})
+    context = memory.context()
+    assert context["turn"] == 2
+    assert (context["companies"], context["intents"]) == (["AAPL"], ["price"])
+
+
+def test_reused_news_keeps_its_fetch_time_and_expires():
+    memory = ConversationMemory()
+    articles = [{"title": "Tesla falls"}]
+    memory.record({"news_data": {"TSLA": articles}})
+    fetched_at = memory.news_data["TSLA"]["fetched_at"]
+    memory.record({"news_data": {"TSLA": articles}, "context": memory.context()})
+    assert memory.news_data["TSLA"]["fetched_at"] == fetched_at
+
+    memory.news_data["TSLA"]["fetched_at"] = time.time() - CONVERSATION_NEWS_TTL_S - 1
+    assert memory.context()["news_data"] == {}
+
+
+def test_store_expires_idle_sessions_and_evicts_least_recent():
+    store = ConversationStore(ttl_s=60, max_sessions=2)
+    first = store.get("a")
+    assert store.get("a") is first
+    first.updated_at = time.time() - 120
+    assert store.get("a") is not first
+
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert len(store) == 2
+    assert store.get("a").turns == 0 and len(store) == 2
+
+
+class RecordingGraph:
+    """Graph that echoes the context it was given and tracks how many runs overlap per session."""
+
+    def __init__(self, hold_s=0.05):
+        self.hold_s = hold_s
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = {}
+        self.peak = 0
+        self.contexts = []
+
+    def invoke(self, state):
+        session = state.get("session_id")
+        with self.lock:
+            self.active[session] = self.active.get(session, 0) + 1
+            self.max_active[session] = max(self.max_active.get(session, 0), self.active[session])
+            self.peak = max(self.peak, sum(self.active.values()))
+            self.contexts.append(state.get("context"))
+        time.sleep(self.hold_s)
+        with self.lock:
+            self.active[session] -= 1
+        return {"companies": [state["transcript"].upper()], "intents": ["price"]}
+
+
+def run_concurrently(graph, states):
+    threads = [threading.Thread(target=graph.invoke, args=(state,)) for state in states]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+
+def test_turns_of_one_session_are_serialized():
+    inner = RecordingGraph()
+    graph = ConversationGraph(inner, ConversationStore())
+    run_concurrently(graph, [{"session_id": "s1", "transcript": name} for name in ("aapl", "msft", "tsla")])
+    assert inner.max_active["s1"] == inner.peak == 1
+    assert sorted(context["turn"] for context in inner.contexts) == [0, 1, 2]
+    assert graph.store.get("s1").turns == 3
+
+
+def test_sessions_run_in_parallel_and_without_a_session_statelessly():
+    inner = RecordingGraph(hold_s=0.3)
+    graph = ConversationGraph(inner, ConversationStore())
+    run_concurrently(graph, [{"session_id": "s1", "transcript": "aapl"}, {"session_id": "s2", "transcript": "msft"}])
+    assert inner.peak == 2
+
+    graph.invoke({"transcript": "nvda"})
+    assert inner.contexts[-1] is None
+    assert len(graph.store) == 2
+
+
+def test_follow_up_reuses_previous_intents_and_companies(monkeypatch):
+    for module in ("dotenv", "langgraph", "langchain_aws", "yfinance"):
+        pytest.importorskip(module)
+    monkeypatch.chdir(REPO_ROOT)
+    monkeypatch.delenv("SPECULATIVE_PREFETCH", raising=False)
+    from orchestrator.workflow import initial_state, intent_classifier
+    context = {"turn": 1, "companies": ["TSLA"], "intents": ["price"], "time_query": "1 week ago"}
+
+    output = intent_classifier(initial_state(transcript="Why is it down?", context=context))
+    assert (output["intents"], output["companies"], output["time_query"]) == (["price"], ["TSLA"], "1 week ago")
+
+    output = intent_classifier(initial_state(transcript="And what about Microsoft?", context=context))
+    assert (output["intents"], output["companies"]) == (["price"], ["MSFT"])
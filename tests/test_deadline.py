@@ -0,0 +1,124 @@
+import os
+import shutil
+import threading
+import time
+import pytest
+from agents.deadline import (NODE_WEIGHTS, CallPool, DeadlineExceeded, call_timeout, degraded, extend_deadline,
+                             node_budget, run_with_timeout)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def state_with(seconds_left, **extra):
+    return {"deadline": time.time() + seconds_left, **extra}
+
+
+def test_node_budget_is_the_weighted_share_of_what_is_left():
+    state = state_with(100)
+    total = sum(NODE_WEIGHTS.values())
+    assert node_budget(state, "intent_classifier") == pytest.approx(100 * 2.0 / total, abs=0.05)
+    # api_agent and news_agent share the fetch stage's weight; earlier stages no longer count
+    ahead = total - NODE_WEIGHTS["intent_classifier"] - NODE_WEIGHTS["load_portfolio"]
+    assert node_budget(state, "api_agent") == pytest.approx(100 * 3.0 / ahead, abs=0.05)
+    assert node_budget(state, "news_agent") == pytest.approx(node_budget(state, "api_agent"), abs=0.05)
+    assert node_budget(state, "voice_agent_tts") == pytest.approx(100, abs=0.05)
+
+
+def test_skipped_tts_leaves_its_share_to_earlier_nodes():
+    with_tts, without_tts = state_with(100), state_with(100, skip_tts=True)
+    total = sum(NODE_WEIGHTS.values())
+    assert node_budget(without_tts, "intent_classifier") == pytest.approx(
+        100 * 2.0 / (total - NODE_WEIGHTS["voice_agent_tts"]), abs=0.05)
+    assert node_budget(without_tts, "language_agent") == pytest.approx(100, abs=0.05)
+    assert node_budget(with_tts, "language_agent") < node_budget(without_tts, "language_agent")
+
+
+def test_a_slow_node_shrinks_later_budgets_proportionally():
+    state = state_with(10)
+    before = node_budget(state, "analysis_agent")
+    state["deadline"] -= 5
+    assert node_budget(state, "analysis_agent") == pytest.approx(before / 2, abs=0.05)
+    state["deadline"] = time.time() - 1
+    assert node_budget(state, "analysis_agent") == 0
+
+
+def test_extend_deadline_and_call_timeout():
+    state = state_with(10)
+    assert extend_deadline(state, 3)["deadline"] == pytest.approx(state["deadline"] + 3)
+    assert extend_deadline({}, 3) == {}
+    assert call_timeout(time.time() + 30, cap=10) == 10
+    with pytest.raises(DeadlineExceeded):
+        call_timeout(time.time() + 0.01, cap=10)
+
+
+def test_degraded_entries():
+    assert degraded("retriever_agent", "skipped") == ["retriever_agent:skipped"]
+    assert degraded("api_agent", "stale_quotes", "AAPL,MSFT") == ["api_agent:stale_quotes(AAPL,MSFT)"]
+
+
+def test_run_with_timeout_returns_result_and_propagates_exceptions():
+    assert run_with_timeout(lambda a, b=0: a + b, 5, 1, b=2, pool="test-ok") == 3
+
+    def fail():
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        run_with_timeout(fail, 5, pool="test-ok")
+
+
+def test_run_with_timeout_abandons_slow_calls():
+    release = threading.Event()
+    started = time.time()
+    with pytest.raises(DeadlineExceeded):
+        run_with_timeout(release.wait, 0.3, 5, pool="test-slow")
+    assert time.time() - started < 2
+    with pytest.raises(DeadlineExceeded):
+        run_with_timeout(release.wait, 0.1, pool="test-slow")
+    release.set()
+
+
+def test_call_pool_refuses_work_once_every_worker_is_taken():
+    pool = CallPool("test-saturation", max_workers=2)
+    release = threading.Event()
+    futures = [pool.submit(release.wait, 5) for _ in range(2)]
+    assert pool.in_flight() == 2
+    with pytest.raises(DeadlineExceeded):
+        pool.submit(release.wait, 5)
+
+    release.set()
+    for future in futures:
+        assert future.result(5) is True
+    deadline = time.time() + 5
+    while pool.in_flight() and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool.in_flight() == 0
+    assert pool.submit(lambda: "again").result(5) == "again"
+
+
+def test_llm_timeout_falls_back_to_template_with_degradation(tmp_path, monkeypatch):
+    for module in ("dotenv", "langchain", "langchain_aws"):
+        pytest.importorskip(module)
+    import agents.language_agent as language_agent_module
+    release = threading.Event()
+
+    class SlowChatBedrock:
+        def __init__(self, **kwargs):
+            pass
+
+        def invoke(self, prompt):
+            release.wait(5)
+
+    shutil.copy(os.path.join(REPO_ROOT, "config.json"), tmp_path / "config.json")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_MODEL_ID", "test")
+    monkeypatch.setenv("LLM_REGION", "us-east-1")
+    monkeypatch.setattr(language_agent_module, "ChatBedrock", SlowChatBedrock)
+    state = state_with(0.5, skip_tts=True, intents=["compare"], transcript="compare apple and microsoft",
+                       market_data={}, retrieved_docs=[],
+                       analysis={"comparisons": {"AAPL": {"current_price": 200.0}, "MSFT": {"current_price": 400.0}}})
+    try:
+        result = language_agent_module.language_agent(state)
+    finally:
+        release.set()
+    assert result["degradations"] == ["language_agent:template(compare)"]
+    assert "Apple at $200.00" in result["narrative"]
@@ -0,0 +1,126 @@
+import os
+import pytest
+from agents.entity_resolver import (
+    PRIORITY_CONFIG, PRIORITY_SEED, Alias, EntityResolver, clean_company_name, config_aliases, head_name,
+    load_aliases, universe_aliases,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UNIVERSE = [
+    {"symbol": "NOW", "name": "ServiceNow, Inc. - Common Stock"},
+    {"symbol": "AMD", "name": "Advanced Micro Devices, Inc. - Common Stock"},
+    {"symbol": "PLTR", "name": "Palantir Technologies Inc. - Class A Common Stock"},
+    {"symbol": "UBER", "name": "Uber Technologies, Inc. - Common Stock"},
+    {"symbol": "COIN", "name": "Coinbase Global, Inc. - Class A Common Stock"},
+    {"symbol": "F", "name": "Ford Motor Company Common Stock"},
+    {"symbol": "MTCH", "name": "Match Group, Inc. - Common Stock"},
+    {"symbol": "BBY", "name": "Best Buy Co., Inc. Common Stock"},
+    {"symbol": "GAP", "name": "The Gap, Inc. Common Stock"},
+    {"symbol": "XYZ", "name": "Block, Inc. Class A Common Stock"},
+    {"symbol": "METAF", "name": "Meta Financial Group, Inc. - Common Stock"},
+]
+
+
+@pytest.fixture
+def resolver():
+    curated = [
+        Alias("AAPL", "apple", PRIORITY_CONFIG, False),
+        Alias("AAPL", "AAPL", PRIORITY_CONFIG, False),
+        Alias("META", "meta", PRIORITY_CONFIG, False),
+        Alias("IBM", "IBM", PRIORITY_CONFIG, False),
+        Alias("TSLA", "tesla", PRIORITY_CONFIG, False),
+        Alias("NVDA", "invidia", PRIORITY_SEED, False),
+    ]
+    return EntityResolver(curated + universe_aliases(UNIVERSE))
+
+
+def test_clean_and_head_names():
+    assert clean_company_name("The Gap, Inc. Common Stock") == "gap"
+    assert clean_company_name("JPMorgan Chase & Co. Common Stock") == "jpmorgan chase"
+    assert head_name("ford motor") == "ford"
+    assert head_name("coinbase global") == "coinbase"
+    assert head_name("apple") == "apple"
+
+
+def test_word_boundaries(resolver):
+    assert resolver.tickers("How is Apple doing?") == ["AAPL"]
+    assert resolver.tickers("Apple's earnings") == ["AAPL"]
+    assert resolver.tickers("I bought pineapples and snapple") == []
+
+
+def test_universe_tickers_need_capitals(resolver):
+    assert resolver.tickers("what should I buy now") == []
+    assert resolver.tickers("What is NOW trading at?") == ["NOW"]
+    assert resolver.tickers("how is amd doing") == []
+    assert resolver.tickers("how is AMD doing") == ["AMD"]
+
+
+def test_spelled_tickers(resolver):
+    assert resolver.tickers("Should I sell I B M?") == ["IBM"]
+    assert resolver.tickers("compare A M D and I B M") == ["AMD", "IBM"]
+
+
+def test_head_noun_aliases(resolver):
+    assert resolver.tickers("how are palantir and uber doing") == ["PLTR", "UBER"]
+    assert resolver.tickers("is coinbase a buy") == ["COIN"]
+    assert resolver.tickers("Ford stock price") == ["F"]
+
+
+def test_common_words_do_not_match_listings(resolver):
+    assert resolver.tickers("what's the best buy in my portfolio") == []
+    assert resolver.tickers("is there a gap between the two") == []
+    assert resolver.tickers("which block of shares should I sell") == []
+    assert resolver.tickers("watch the market for me") == []
+
+
+@pytest.fixture
+def shipped(monkeypatch):
+    """Resolver over the shipped seed aliases and config.json, without a listing universe."""
+    monkeypatch.chdir(REPO_ROOT)
+    return EntityResolver(load_aliases() + config_aliases())
+
+
+@pytest.mark.parametrize("transcript", [
+    "I want to apply for a loan",
+    "is it ample",
+    "I'm in video production",
+    "he owes me ten cent",
+    "I like apples and oranges",
+    "what's the n video about",
+    "en video stuff",
+])
+def test_ordinary_speech_does_not_match_seeds(shipped, transcript):
+    assert shipped.tickers(transcript) == []
+
+
+def test_shipped_seeds_still_resolve(shipped):
+    assert shipped.tickers("how are Apple, invidia and Tencent doing") == ["AAPL", "NVDA", "0700.HK"]
+    assert shipped.tickers("what about tessla and microsfot") == ["TSLA", "MSFT"]
+
+
+def test_fuzzy_only_for_curated_aliases(resolver):
+    assert resolver.tickers("how is tessla doing") == ["TSLA"]
+    assert resolver.tickers("how is palantyr doing") == []
+
+
+def test_fuzzy_ambiguity_is_not_guessed():
+    resolver = EntityResolver([Alias("TSLA", "tesla", PRIORITY_CONFIG, False),
+                               Alias("TESS", "tessa", PRIORITY_CONFIG, False)])
+    assert resolver.tickers("how is teslla doing") == ["TSLA"]
+    assert resolver.tickers("how is tesna doing") == []
+
+
+def test_alias_priority(resolver):
+    # 'meta' is both a config company and the head of a listing name; the config company wins
+    assert resolver.tickers("how is meta doing") == ["META"]
+    assert resolver.tickers("how is meta financial doing") == ["METAF"]
+    ambiguous = EntityResolver([Alias("XYZ", "acme", 1, False), Alias("ACME", "acme", PRIORITY_SEED, False)])
+    assert ambiguous.tickers("acme earnings") == ["ACME"]
+
+
+def test_ambiguous_heads_are_dropped():
+    aliases = universe_aliases([{"symbol": "AAA", "name": "Corvex Energy Inc."},
+                                {"symbol": "BBB", "name": "Corvex Therapeutics Inc."}])
+    assert EntityResolver(aliases).tickers("how is corvex doing") == []
+    assert EntityResolver(aliases).tickers("how is corvex energy doing") == ["AAA"]
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+import pytest
+
+pytest.importorskip("dotenv")
+from orchestrator.executor import ExecutorBusy, RequestExecutor
+
+
+class BlockingGraph:
+    """Graph whose runs wait until release() so tests control how many are in flight."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.started = threading.Semaphore(0)
+        self.gate = threading.Event()
+
+    def invoke(self, state):
+        self.started.release()
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("graph failed")
+        return {"narrative": state.get("transcript", "")}
+
+    def release(self):
+        self.gate.set()
+
+
+@pytest.fixture
+def work_root(tmp_path):
+    return str(tmp_path / "requests")
+
+
+def test_saturated_executor_rejects_with_busy(work_root):
+    graph = BlockingGraph()
+    executor = RequestExecutor(graph, max_workers=1, max_queue=1, work_root=work_root)
+    running = executor.submit({"transcript": "first"})
+    assert graph.started.acquire(timeout=5)
+    queued = executor.submit({"transcript": "second"})
+
+    with pytest.raises(ExecutorBusy):
+        executor.submit({"transcript": "third"})
+    metrics = executor.metrics()
+    assert metrics["running"] == 1
+    assert metrics["queue_depth"] == 1
+    assert metrics["submitted"] == 2
+    assert metrics["rejected"] == 1
+
+    graph.release()
+    assert running.result(5)["narrative"] == "first"
+    assert queued.result(5)["narrative"] == "second"
+    # A freed slot admits new requests again
+    assert executor.run({"transcript": "fourth"}, timeout=5)["narrative"] == "fourth"
+    executor.shutdown()
+
+
+def test_metrics_count_completed_and_failed_runs(work_root):
+    ok_graph, failing_graph = BlockingGraph(), BlockingGraph(fail=True)
+    ok_graph.release()
+    failing_graph.release()
+    executor = RequestExecutor(ok_graph, max_workers=2, max_queue=2, work_root=work_root)
+    result = executor.run({"transcript": "hi"}, request_id="req-1", timeout=5)
+    assert result["request_id"] == "req-1"
+    assert os.path.dirname(result["work_dir"]) == work_root
+
+    executor.graph = failing_graph
+    with pytest.raises(RuntimeError):
+        executor.run({"transcript": "boom"}, timeout=5)
+    executor.shutdown()
+
+    metrics = executor.metrics()
+    assert (metrics["submitted"], metrics["completed"], metrics["failed"], metrics["rejected"]) == (2, 1, 1, 0)
+    assert (metrics["queue_depth"], metrics["running"]) == (0, 0)
+    assert metrics["queue_wait_p50"] is not None and metrics["run_time_p95"] is not None
+
+
+def test_cleanup_removes_expired_work_dirs_at_most_once_a_minute(work_root):
+    expired, recent = os.path.join(work_root, "expired"), os.path.join(work_root, "recent")
+    os.makedirs(expired)
+    os.makedirs(recent)
+    old = time.time() - 7200
+    os.utime(expired, (old, old))
+    graph = BlockingGraph()
+    graph.release()
+    executor = RequestExecutor(graph, max_workers=1, max_queue=1, work_root=work_root, work_dir_ttl_s=3600)
+
+    result = executor.run({"transcript": "hi"}, timeout=5)
+    assert not os.path.exists(expired)
+    assert os.path.isdir(recent) and os.path.isdir(result["work_dir"])
+
+    # Within a minute of the last sweep, expired directories are left for the next one
+    os.makedirs(expired)
+    os.utime(expired, (old, old))
+    executor.run({"transcript": "again"}, timeout=5)
+    assert os.path.isdir(expired)
+    executor.shutdown()
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")
+from agents.embedding_backend import FrameError, RemoteEncoder, read_frame, write_frame
+from benchmarks.fakes import FakeEncoder
+from workers.model_worker import ModelWorker
+
+
+@pytest.fixture
+def worker():
+    # Unix socket paths are limited to ~100 characters, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="mw-")
+    server = ModelWorker(os.path.join(directory, "worker.sock"), FakeEncoder())
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def connect(server):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(server.server_address)
+    return sock
+
+
+def send_raw_header(sock, data: bytes):
+    sock.sendall(struct.pack(">I", len(data)) + data)
+
+
+def test_encode_and_ping(worker):
+    encoder = RemoteEncoder(worker.server_address)
+    small = encoder.encode(["apple beats earnings", "tesla falls"])
+    assert small.shape == (2, 384) and small.dtype == np.float32
+    np.testing.assert_allclose(small, FakeEncoder().encode(["apple beats earnings", "tesla falls"]))
+    # Large results travel through shared memory where /dev/shm exists
+    large = encoder.encode([f"headline {i}" for i in range(100)])
+    assert large.shape == (100, 384)
+
+    response, _ = encoder.request({"op": "ping"})
+    assert response["backend"] == "fake" and response["texts"] == 102
+    assert encoder.encode([]).shape == (0, 384)
+
+
+def test_unknown_op_is_an_error_reply_on_a_live_connection(worker):
+    encoder = RemoteEncoder(worker.server_address)
+    with pytest.raises(RuntimeError, match="Unknown op: train"):
+        encoder.request({"op": "train"})
+    assert encoder.encode(["still works"]).shape == (1, 384)
+    assert worker.counts["errors"] == 1
+
+
+@pytest.mark.parametrize("header", [
+    b'{"op": "encode", "texts": ["trunc',    # truncated JSON
+    b"\xff\xfe not json",                    # not UTF-8
+    b'["op", "encode"]',                     # not an object
+    b'{"op": "encode", "payload_bytes": -1}',
+    b'{"op": "encode", "payload_bytes": "12"}',
+])
+def test_malformed_frames_get_an_error_reply(worker, header):
+    with connect(worker) as sock:
+        send_raw_header(sock, header)
+        response, payload = read_frame(sock)
+        assert response["error"].startswith("Bad request frame:") and payload == b""
+        # The worker drops the connection after a bad frame
+        assert sock.recv(1) == b""
+    assert worker.counts["errors"] == 1
+    assert RemoteEncoder(worker.server_address).encode(["next client"]).shape == (1, 384)
+
+
+def test_oversized_header_is_rejected_without_reading_it(worker):
+    with connect(worker) as sock:
+        sock.sendall(struct.pack(">I", 2**31))
+        response, _ = read_frame(sock)
+    assert "exceeds" in response["error"]
+
+
+def test_client_closing_mid_frame_does_not_break_the_worker(worker):
+    with connect(worker) as sock:
+        data = json.dumps({"op": "encode", "texts": ["cut off"]}).encode()
+        sock.sendall(struct.pack(">I", len(data)) + data[:5])
+    assert RemoteEncoder(worker.server_address).encode(["after"]).shape == (1, 384)
+    assert worker.counts["errors"] == 0
+
+
+def test_read_frame_validates_headers():
+    left, right = socket.socketpair()
+    with left, right:
+        write_frame(left, {"op": "ping"}, b"abc")
+        assert read_frame(right) == ({"op": "ping", "payload_bytes": 3}, bytearray(b"abc"))
+        send_raw_header(left, b"{}")
+        with pytest.raises(FrameError):
+            read_frame(right, max_header_bytes=1)
@@ -0,0 +1,93 @@
+import re
+import pytest
+from agents.narrative_templates import (
+    NO_COMPANY, PORTFOLIO_EMPTY, PORTFOLIO_UNVALUED, render, render_compare, render_portfolio, render_price,
+    render_recommend,
+)
+
+NAMES = {"AAPL": "Apple", "TSM": "TSMC", "005930.KS": "Samsung", "MSFT": "Microsoft"}
+# Enough seeds that every template variant of each family gets picked
+SEEDS = [f"query {i}" for i in range(40)]
+
+
+def holdings(**values):
+    return {ticker: {"value": value} for ticker, value in values.items()}
+
+
+def test_price_variants():
+    data = {"AAPL": {"current_price": 190.5, "change_percent": "1.25%", "pe_ratio": 29.1}}
+    texts = {render_price(["AAPL"], data, NAMES, seed=seed) for seed in SEEDS}
+    assert len(texts) > 1
+    for text in texts:
+        assert "Apple" in text and "$190.50" in text and "1.25%" in text and "29.10" in text
+
+
+def test_price_flat_down_and_missing():
+    flat = render_price(["AAPL"], {"AAPL": {"current_price": 10, "change_percent": "0.01%"}}, NAMES)
+    assert "flat" in flat or "little changed" in flat
+    down = render_price(["AAPL"], {"AAPL": {"current_price": 10, "change_percent": "-2%"}}, NAMES)
+    assert "2.00%" in down and ("down" in down or "lower" in down)
+    missing = render_price(["MSFT"], {"MSFT": {"error": "no data"}}, NAMES)
+    assert "Microsoft" in missing and "$" not in missing
+    assert render_price([], {}, NAMES) == NO_COMPANY
+
+
+@pytest.mark.parametrize("seed", SEEDS[:8])
+def test_history_move(seed):
+    data = {"AAPL": {"current_price": 110.0, "historical_price": 100.0}}
+    text = render_price(["AAPL"], data, NAMES, time_query="last month", seed=seed)
+    assert "$100.00" in text and "up" in text
+
+
+@pytest.mark.parametrize("seed", SEEDS[:8])
+def test_history_zero_change_has_no_percentage(seed):
+    data = {"AAPL": {"current_price": 100.0, "historical_price": 100.0}}
+    text = render_price(["AAPL"], data, NAMES, time_query="last week", seed=seed)
+    assert "$100.00" in text
+    assert "0.0%" not in text and "unchanged 0" not in text
+
+
+@pytest.mark.parametrize("seed", SEEDS[:8])
+def test_portfolio_single_holding(seed):
+    metrics = {"total_value": 1000.0, "holdings": {**holdings(AAPL=1000.0), "TSM": {"value": None}}}
+    text = render_portfolio(metrics, NAMES, seed)
+    assert text.count("$1,000.00") == 1
+    assert "in Apple" in text and "$1,000.00 in Apple" not in text
+    assert "TSMC" in text
+
+
+@pytest.mark.parametrize("seed", SEEDS[:8])
+def test_portfolio_multiple_holdings(seed):
+    metrics = {"total_value": 4500.0, "holdings": holdings(AAPL=2000.0, TSM=1500.0, MSFT=700.0, **{"005930.KS": 300.0})}
+    text = render_portfolio(metrics, NAMES, seed)
+    assert "$4,500.00" in text and "$2,000.00 in Apple" in text and "$700.00 in Microsoft" in text
+    assert "Samsung" not in text
+    assert re.search(r"\bone\b|One", text)
+
+
+def test_portfolio_partial_plural():
+    metrics = {"total_value": 1000.0, "holdings": {**holdings(AAPL=600.0, TSM=400.0), "MSFT": {"value": 0},
+                                                   "005930.KS": {"value": None}}}
+    text = render_portfolio(metrics, NAMES, "x")
+    assert "Microsoft and Samsung" in text and ("they are" in text or "are missing" in text)
+
+
+def test_portfolio_empty_and_unvalued():
+    assert render_portfolio({}, NAMES) == PORTFOLIO_EMPTY
+    assert render_portfolio({"total_value": 0, "holdings": {"AAPL": {"value": None}}}, NAMES) == PORTFOLIO_UNVALUED
+
+
+def test_compare_and_recommend():
+    text = render_compare({"AAPL": {"current_price": 190, "pe_ratio": 29}, "MSFT": {}}, NAMES)
+    assert text == "Apple at $190.00 with a PE of 29.00 and no price for Microsoft."
+    recs = [{"ticker": "AAPL", "action": "sell", "reason": "High PE (35.00)"},
+            {"ticker": None, "action": "buy", "reason": "Nothing passes the buy screen."}]
+    assert render_recommend(recs, NAMES) == "Consider selling Apple: High PE (35.00). Nothing passes the buy screen."
+    assert render_recommend([], NAMES)
+
+
+def test_render_dispatch():
+    state = {"transcript": "huh", "analysis": {}, "companies": [], "market_data": {}}
+    assert render("error", state, NAMES).startswith("Sorry")
+    assert render("portfolio", state, NAMES) == PORTFOLIO_EMPTY
+    assert render("price", state, NAMES) == NO_COMPANY
@@ -0,0 +1,70 @@
+import json
+import os
+import pytest
+from agents.portfolio_store import DEFAULT_USER, PortfolioStore, session_user
+
+
+@pytest.fixture
+def store(tmp_path):
+    legacy = tmp_path / "portfolio.json"
+    legacy.write_text(json.dumps({"holdings": {"AAPL": 10, "MSFT": 5}, "total_value": 1234.5}))
+    return PortfolioStore(str(tmp_path / "portfolios"), str(legacy))
+
+
+def test_update_does_not_touch_a_snapshot_readers_hold(store):
+    snapshot = store.get()
+    shares_before = snapshot.shares.copy()
+    assert snapshot.holdings == {"AAPL": 10.0, "MSFT": 5.0} and snapshot.version == 0
+
+    updated = store.update_positions(DEFAULT_USER, {"AAPL": 12, "MSFT": 0, "NVDA": 3})
+    assert snapshot.holdings == {"AAPL": 10.0, "MSFT": 5.0}
+    assert snapshot.shares.tolist() == shares_before.tolist() and snapshot.version == 0
+    assert updated is not snapshot
+    assert updated.holdings == {"AAPL": 12.0, "NVDA": 3.0} and updated.version == 3
+    assert store.get() is updated
+
+
+def test_update_persists_atomically_and_keeps_other_fields(store):
+    store.update_positions(DEFAULT_USER, {"TSLA": 1})
+    with open(store.legacy_path) as f:
+        saved = json.load(f)
+    assert saved == {"total_value": 1234.5, "version": 1, "holdings": {"AAPL": 10.0, "MSFT": 5.0, "TSLA": 1.0}}
+    assert not os.path.exists(store.legacy_path + ".tmp")
+    # A fresh store (another process) reads the same portfolio back
+    reread = PortfolioStore(store.portfolio_dir, store.legacy_path).get()
+    assert reread.holdings == saved["holdings"] and reread.version == 1
+
+
+def test_get_is_cached_until_the_file_changes(store):
+    first = store.get()
+    assert store.get() is first
+    with open(store.legacy_path, "w") as f:
+        json.dump({"holdings": {"AMZN": 7, "GOOGL": 2, "META": 1}}, f)
+    changed = store.get()
+    assert changed is not first and changed.holdings == {"AMZN": 7.0, "GOOGL": 2.0, "META": 1.0}
+
+
+def test_users_get_separate_files(store):
+    assert store.get("alice").holdings == {}
+    store.update_positions("alice", {"AAPL": 1})
+    assert os.path.exists(os.path.join(store.portfolio_dir, "alice.json"))
+    assert store.get("alice").holdings == {"AAPL": 1.0}
+    assert store.get().holdings == {"AAPL": 10.0, "MSFT": 5.0}
+
+
+@pytest.mark.parametrize("user_id", ["../default", ".hidden", "a/b", "", "x" * 129])
+def test_invalid_user_ids_are_rejected(store, user_id):
+    with pytest.raises(ValueError):
+        store.path_for(user_id)
+
+
+def test_user_param_is_ignored_unless_opted_in(monkeypatch):
+    monkeypatch.delenv("PORTFOLIO_USER_PARAM", raising=False)
+    assert session_user({"user": "alice"}) == DEFAULT_USER
+    monkeypatch.setenv("PORTFOLIO_USER_PARAM", "0")
+    assert session_user({"user": "alice"}) == DEFAULT_USER
+
+    monkeypatch.setenv("PORTFOLIO_USER_PARAM", "1")
+    assert session_user({"user": "alice"}) == "alice"
+    assert session_user({}) == DEFAULT_USER
+    assert session_user({"user": ""}) == DEFAULT_USER
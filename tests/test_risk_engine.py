@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from agents.risk_engine import TRADING_DAYS, align_prices, align_returns, covariance, portfolio_risk
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(7)
+    mixing = np.array([[1.0, 0.3, 0.0], [0.0, 1.0, 0.5], [0.0, 0.0, 1.0]])
+    return rng.normal(0.0005, 0.01, (250, 3)) @ mixing
+
+
+def test_volatility_matches_explicit_covariance(returns):
+    shares, prices = np.array([10.0, 20.0, 5.0]), np.array([100.0, 50.0, 200.0])
+    risk = portfolio_risk(shares, prices, returns)
+    weights = shares * prices / (shares * prices).sum()
+    expected = float(np.sqrt(weights @ covariance(returns) @ weights))
+    assert risk["volatility_daily"] == pytest.approx(expected, rel=1e-10)
+    assert risk["volatility_annual"] == pytest.approx(expected * TRADING_DAYS ** 0.5, rel=1e-10)
+    assert risk["total_value"] == pytest.approx(3000.0)
+
+
+def test_risk_contributions_sum_to_one(returns):
+    risk = portfolio_risk(np.array([1.0, 2.0, 3.0]), np.array([10.0, 20.0, 30.0]), returns)
+    assert risk["risk_contributions"].sum() == pytest.approx(1.0)
+    assert risk["var_historical"] > 0 and risk["var_parametric"] > 0
+
+
+def test_empty_portfolio():
+    risk = portfolio_risk(np.array([]), np.array([]), np.zeros((0, 0)))
+    assert risk["total_value"] == 0
+    assert risk["volatility_daily"] is None and risk["var_historical"] is None
+    assert len(risk["risk_contributions"]) == 0
+
+
+def test_unpriced_holdings_are_excluded(returns):
+    prices = np.array([100.0, np.nan, 0.0])
+    risk = portfolio_risk(np.array([10.0, 10.0, 10.0]), prices, returns, betas=np.array([1.2, 2.0, 3.0]))
+    assert list(risk["missing_prices"]) == [1, 2]
+    assert list(risk["weights"]) == [1.0, 0.0, 0.0]
+    assert risk["portfolio_beta"] == pytest.approx(1.2)
+    assert risk["risk_contributions"][0] == pytest.approx(1.0)
+
+
+def test_all_unpriced():
+    risk = portfolio_risk(np.array([5.0]), np.array([np.nan]), np.zeros((10, 1)))
+    assert risk["total_value"] == 0 and risk["volatility_daily"] is None
+
+
+def test_weighted_harmonic_pe():
+    risk = portfolio_risk(np.array([1.0, 1.0]), np.array([100.0, 100.0]), np.zeros((0, 2)), pe_ratios=np.array([10.0, 30.0]))
+    assert risk["portfolio_pe"] == pytest.approx(15.0)
+
+
+def test_align_prices_forward_fills_gaps():
+    prices = align_prices([[("2024-01-01", 1.0), ("2024-01-03", 3.0)], [("2024-01-02", 10.0)]])
+    assert np.isnan(prices[0, 1])
+    assert list(prices[:, 0]) == [1.0, 1.0, 3.0]
+    assert list(prices[1:, 1]) == [10.0, 10.0]
+    returns = align_returns([[("2024-01-01", 1.0), ("2024-01-03", 3.0)], [("2024-01-02", 10.0)]])
+    assert returns.shape == (2, 2) and returns[1, 0] == pytest.approx(2.0)
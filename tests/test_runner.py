@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import sys
+import pytest
+
+for module in ("dotenv", "langgraph", "langchain_aws", "yfinance"):
+    pytest.importorskip(module)
+from benchmarks.fakes import FakeChatBedrock, FakeEncoder, FakeHTTP
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    """Runs in tmp_path against the benchmark fakes, with Alpha Vantage unthrottled and yfinance (network) disabled."""
+    shutil.copy(os.path.join(REPO_ROOT, "config.json"), tmp_path / "config.json")
+    monkeypatch.chdir(tmp_path)
+    for key, value in {"ALPHA_VANTAGE_KEY": "test", "NEWS_API_KEY": "test", "LLM_MODEL_ID": "test",
+                       "LLM_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(key, value)
+
+    import agents.api_agent as api_agent_module
+    import agents.language_agent as language_agent_module
+    import agents.market_cache as market_cache_module
+    import agents.news_agent as news_agent_module
+    import agents.retriever_agent as retriever_agent_module
+    import orchestrator.workflow as workflow_module
+    http, encoder = FakeHTTP(), FakeEncoder()
+    monkeypatch.setattr(api_agent_module, "requests", http)
+    monkeypatch.setattr(news_agent_module, "requests", http)
+    monkeypatch.setattr(language_agent_module, "ChatBedrock", FakeChatBedrock)
+    monkeypatch.setattr(workflow_module, "ChatBedrock", FakeChatBedrock)
+    monkeypatch.setattr(retriever_agent_module, "get_encoder", lambda backend=None: encoder)
+    monkeypatch.setitem(market_cache_module.PROVIDER_QUOTAS, "alpha_vantage", {"per_day": 10**6, "per_minute": 10**6})
+    monkeypatch.setitem(market_cache_module.PROVIDER_QUOTAS, "yfinance", {"per_day": 0, "per_minute": 0})
+    return tmp_path
+
+
+def run_runner(monkeypatch, workdir, lines):
+    from orchestrator import runner
+    input_path, output_path = workdir / "requests.jsonl", workdir / "results.jsonl"
+    input_path.write_text("\n".join(lines) + "\n")
+    monkeypatch.setattr(sys, "argv", ["runner", "--input", str(input_path), "--output", str(output_path),
+                                      "--parallel", "2"])
+    runner.main()
+    return [json.loads(line) for line in output_path.read_text().splitlines()]
+
+
+def test_batch_writes_one_record_per_request(scratch, monkeypatch):
+    results = run_runner(monkeypatch, scratch, [
+        json.dumps({"id": "price", "transcript": "What is the Apple stock price?"}),
+        json.dumps({"id": "news", "transcript": "Why is Tesla stock falling?"}),
+        json.dumps({"transcript": "What is the Nvidia stock price?"}),
+    ])
+    by_id = {result["id"]: result for result in results}
+    assert len(results) == 3 and len(by_id) == 3
+
+    price = by_id["price"]
+    assert price["status"] == "ok", price
+    assert price["companies"] == ["AAPL"] and "price" in price["intents"]
+    assert price["narrative"] and price["request_id"]
+    assert "intent_classifier" in price["timings"]["nodes_s"]
+    assert by_id["news"]["status"] == "ok" and by_id["news"]["companies"] == ["TSLA"]
+    unlabeled = next(result for result in results if result["id"] not in ("price", "news"))
+    assert unlabeled["id"] == unlabeled["request_id"] and unlabeled["companies"] == ["NVDA"]
+
+
+def test_bad_requests_fail_alone(scratch, monkeypatch):
+    from orchestrator import runner
+    invoke = runner.TimedGraph.invoke
+
+    def failing_invoke(self, state):
+        if state["transcript"] == "crash":
+            raise RuntimeError("graph crashed")
+        return invoke(self, state)
+
+    monkeypatch.setattr(runner.TimedGraph, "invoke", failing_invoke)
+    results = run_runner(monkeypatch, scratch, [
+        '{"id": "broken", "transcript": ',
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"id": "empty"}),
+        json.dumps({"id": "no-audio", "audio_path": "missing.wav"}),
+        json.dumps({"id": "crash", "transcript": "crash"}),
+        json.dumps({"id": "ok", "transcript": "What is the Apple stock price?"}),
+    ])
+    by_id = {result["id"]: result for result in results}
+    assert by_id["line-1"]["status"] == "error" and "Invalid JSON" in by_id["line-1"]["error"]
+    assert by_id["line-2"]["error"] == "Invalid JSON: Request must be a JSON object"
+    assert "'transcript' or an 'audio_path'" in by_id["empty"]["error"]
+    assert "Audio file not found" in by_id["no-audio"]["error"]
+    assert all("request_id" not in by_id[key] for key in ("line-1", "line-2", "empty", "no-audio"))
+    assert by_id["crash"]["status"] == "error" and by_id["crash"]["error"] == "graph crashed"
+    assert by_id["crash"]["request_id"]
+    assert by_id["ok"]["status"] == "ok"
@@ -0,0 +1,93 @@
+import json
+import numpy as np
+import pytest
+from agents.screener import DEFAULT_RULES, FIELDS, UniverseTable, load_rules, screen
+
+NAN = np.nan
+
+
+def make_table(rows):
+    tickers = list(rows)
+    columns = {field: np.full(len(tickers), NAN) for field in FIELDS}
+    for i, values in enumerate(rows.values()):
+        for field, value in values.items():
+            columns[field][i] = value
+    return UniverseTable(tickers, columns)
+
+
+@pytest.fixture
+def table():
+    return make_table({
+        "CHEAP": {"pe_ratio": 12, "beta": 0.9, "volatility": 0.2, "return_3m": 0.05},
+        "VALUE": {"pe_ratio": 18, "beta": 1.5, "volatility": 0.3, "return_3m": 0.02},
+        "HOT": {"pe_ratio": 80, "beta": 2.0, "volatility": 0.7, "return_3m": 0.4},
+        "BLANK": {},
+    })
+
+
+RULES = {
+    "min_score": 1,
+    "rules": [
+        {"field": "pe_ratio", "op": "<", "value": 25, "weight": 1, "label": "reasonable PE"},
+        {"field": "beta", "op": "<", "value": 1.2, "weight": 0.5, "label": "moderate beta"},
+    ],
+}
+
+
+def test_scores_and_ranking(table):
+    ranked = screen(table, RULES)
+    assert [r["ticker"] for r in ranked] == ["CHEAP", "VALUE"]
+    assert ranked[0]["score"] == 1.5
+    assert ranked[0]["matched"] == [("reasonable PE", "pe_ratio", 12.0), ("moderate beta", "beta", 0.9)]
+
+
+def test_nan_never_matches(table):
+    ranked = screen(table, {"min_score": 0.5, "rules": [{"field": "beta", "op": "<", "value": 10}]})
+    assert "BLANK" not in [r["ticker"] for r in ranked]
+
+
+def test_candidates_scope(table):
+    assert [r["ticker"] for r in screen(table, RULES, candidates=["VALUE", "HOT", "UNKNOWN"])] == ["VALUE"]
+    assert screen(table, RULES, candidates=[]) == []
+
+
+def test_exclude(table):
+    assert [r["ticker"] for r in screen(table, RULES, exclude=["CHEAP", "UNKNOWN"])] == ["VALUE"]
+
+
+def test_min_score(table):
+    assert [r["ticker"] for r in screen(table, {**RULES, "min_score": 1.5})] == ["CHEAP"]
+    assert screen(table, {**RULES, "min_score": 2}) == []
+
+
+def test_limit(table):
+    assert len(screen(table, RULES, limit=1)) == 1
+
+
+def test_with_overrides_patches_and_appends(table):
+    patched = table.with_overrides({"HOT": {"pe_ratio": 10, "beta": 1.0}, "NEW": {"pe_ratio": 5},
+                                    "BAD": {"error": "no data"}})
+    assert patched.tickers == ["CHEAP", "VALUE", "HOT", "BLANK", "NEW"]
+    assert [r["ticker"] for r in screen(patched, RULES, candidates=["HOT", "NEW"])] == ["HOT", "NEW"]
+    assert table.columns["pe_ratio"][table.row_of["HOT"]] == 80
+
+
+def test_override_merge(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"ticker_map": {}, "screening_rules": {
+        "buy": {"min_score": 3},
+        "dividend": {"scope": "universe", "rules": [{"field": "pe_ratio", "op": "<", "value": 15}]},
+    }}))
+    rules = load_rules(str(config))
+    assert rules["buy"]["min_score"] == 3
+    assert rules["buy"]["rules"] == DEFAULT_RULES["buy"]["rules"]
+    assert rules["buy"]["exclude_holdings"] is True
+    assert rules["sell"] == DEFAULT_RULES["sell"]
+    assert rules["dividend"]["scope"] == "universe"
+    assert DEFAULT_RULES["buy"]["min_score"] == 2
+
+
+def test_defaults_without_overrides(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"ticker_map": {}}))
+    assert load_rules(str(config)) == DEFAULT_RULES
@@ -0,0 +1,111 @@
+import threading
+import time
+import pytest
+import agents.speculation as speculation_module
+from agents.speculation import SpeculationRegistry, result
+
+
+def fetch(ticker, suffix=""):
+    return ticker + suffix
+
+
+@pytest.fixture
+def registry():
+    registry = SpeculationRegistry(max_workers=2)
+    yield registry
+    registry._pool.shutdown(wait=True)
+
+
+def test_hit_hands_over_the_running_fetches(registry):
+    registry.start("req-1", "market", ["AAPL", "MSFT", "AAPL"], fetch, "-quote")
+    taken = registry.take("req-1", "market", ["AAPL", "MSFT"])
+    assert {ticker: result(future, time.time() + 5) for ticker, future in taken.items()} == \
+        {"AAPL": "AAPL-quote", "MSFT": "MSFT-quote"}
+
+    metrics = registry.metrics()
+    assert (metrics["requests"], metrics["started"], metrics["hits"], metrics["misses"], metrics["wasted"]) == (1, 2, 2, 0, 0)
+    assert (metrics["hit_rate"], metrics["coverage"], metrics["pending"]) == (1.0, 1.0, 0)
+    # A request's speculation is taken once
+    assert registry.take("req-1", "market", ["AAPL"]) == {}
+
+
+def test_miss_and_unneeded_tickers(registry):
+    registry.start("req-1", "market", ["AAPL", "GOOGL"], fetch)
+    taken = registry.take("req-1", "market", ["AAPL", "TSLA"])
+    assert list(taken) == ["AAPL"]
+
+    metrics = registry.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["wasted"]) == (1, 1, 1)
+    assert (metrics["hit_rate"], metrics["coverage"]) == (0.5, 0.5)
+    # Without any speculation for the request there is nothing to take and nothing is counted
+    assert registry.take("req-2", "market", ["AAPL"]) == {}
+    assert registry.metrics()["misses"] == 1
+
+
+def test_unneeded_queued_fetches_are_cancelled():
+    registry = SpeculationRegistry(max_workers=1)
+    gate, calls = threading.Event(), []
+
+    def slow_fetch(ticker):
+        calls.append(ticker)
+        gate.wait(5)
+        return ticker
+
+    registry.start("req-1", "market", ["AAPL", "MSFT"], slow_fetch)
+    taken = registry.take("req-1", "market", ["AAPL"])
+    gate.set()
+    assert result(taken["AAPL"], time.time() + 5) == "AAPL"
+    registry._pool.shutdown(wait=True)
+    assert calls == ["AAPL"]
+    assert registry.metrics()["wasted"] == 1
+
+
+def test_wasted_speculation_is_discarded(registry):
+    registry.start("req-1", "market", ["AAPL", "MSFT"], fetch)
+    # The news branch ran instead: the market speculation is wasted
+    assert registry.take("req-1", "news", ["AAPL"]) == {}
+    registry.start("req-2", "news", ["TSLA"], fetch)
+    registry.discard("req-2")
+    registry.discard("unknown")
+
+    metrics = registry.metrics()
+    assert (metrics["hits"], metrics["wasted"], metrics["discarded_requests"], metrics["pending"]) == (0, 3, 2, 0)
+    assert metrics["hit_rate"] == 0.0 and metrics["coverage"] is None
+
+
+def test_restart_and_expiry_discard_earlier_speculation(registry, monkeypatch):
+    registry.start("req-1", "market", ["AAPL"], fetch)
+    registry.start("req-1", "market", ["MSFT"], fetch)
+    assert list(registry.take("req-1", "market", ["AAPL", "MSFT"])) == ["MSFT"]
+
+    monkeypatch.setattr(speculation_module, "SPECULATION_TTL_S", 0.0)
+    registry.start("stale", "market", ["NVDA"], fetch)
+    time.sleep(0.01)
+    registry.start("req-2", "market", ["AMZN"], fetch)
+    metrics = registry.metrics()
+    assert metrics["pending"] == 1 and metrics["discarded_requests"] == 2
+    assert registry.take("stale", "market", ["NVDA"]) == {}
+
+
+def test_empty_starts_are_ignored(registry):
+    registry.start("", "market", ["AAPL"], fetch)
+    registry.start("req-1", "market", [], fetch)
+    metrics = registry.metrics()
+    assert (metrics["requests"], metrics["started"]) == (0, 0)
+    assert metrics["hit_rate"] is None and metrics["coverage"] is None
+
+
+def test_result_falls_back_to_default(registry):
+    assert result(None, None, "default") == "default"
+
+    def fail(ticker):
+        raise RuntimeError("provider down")
+
+    registry.start("req-1", "market", ["AAPL"], fail)
+    assert result(registry.take("req-1", "market", ["AAPL"])["AAPL"], time.time() + 5, {}) == {}
+
+    gate = threading.Event()
+    registry.start("req-2", "market", ["MSFT"], lambda ticker: gate.wait(5))
+    future = registry.take("req-2", "market", ["MSFT"])["MSFT"]
+    assert result(future, time.time() + 0.05, "late") == "late"
+    gate.set()
@@ -0,0 +1,150 @@
+"""
+Background brief materializer: precomputes answers to the most common asks so the workflow can serve
+them right after intent classification (see brief_lookup in orchestrator/workflow.py).
+
+Each pass (re)builds, up to --max-builds:
+  - a portfolio brief per user (data/portfolio.json and data/portfolios/<user>.json),
+  - a "why is X moving" brief for companies moving at least BRIEF_NEWS_MOVE_PCT on the day,
+  - a price brief for every company in the worker universe (ticker_map, holdings, recently asked).
+A brief is rebuilt when it is missing, older than BRIEF_MAX_AGE_S, its price moved BRIEF_MOVE_PCT or
+more since it was built, or the portfolio changed. Builds run the normal workflow graph (quotes come
+from the market cache kept warm by workers/market_warmer.py) including TTS, and are only stored when
+no node had to degrade.
+
+Usage: python -m workers.brief_materializer [--once] [--tick 60] [--max-builds 10] [--no-audio]
+"""
+import argparse
+import os
+import shutil
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from agents.brief_store import BriefStore, brief_key, get_brief_store, quote_basis
+from agents.logging_utils import get_logger
+from agents.market_cache import get_market_cache
+from agents.portfolio_store import DEFAULT_USER, get_portfolio_store
+from orchestrator.executor import new_request_state
+from orchestrator.workflow import initial_state, workflow
+from workers.universe import load_universe
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = get_logger(__name__)
+
+QUERIES = {
+    "price": "What is the {name} stock price?",
+    "news": "Why is {name} stock moving today?",
+    "portfolio": "How is my portfolio doing?",
+}
+NEWS_MOVE_PCT = float(os.getenv("BRIEF_NEWS_MOVE_PCT", "2.0"))
+BUILD_BUDGET_S = float(os.getenv("BRIEF_BUILD_BUDGET_S", "60"))
+
+
+def portfolio_users() -> List[str]:
+    store = get_portfolio_store()
+    users = [DEFAULT_USER] if os.path.exists(store.legacy_path) else []
+    if os.path.isdir(store.portfolio_dir):
+        users += sorted(name[:-5] for name in os.listdir(store.portfolio_dir) if name.endswith(".json"))
+    return users
+
+
+def day_change_pct(quote: Dict[str, Any]) -> float:
+    try:
+        return abs(float(str(quote.get("change_percent", "0")).rstrip("%")))
+    except ValueError:
+        return 0.0
+
+
+def candidates() -> List[Tuple[str, str, str]]:
+    """(kind, subject, display name) of every brief worth keeping, portfolios first, then movers."""
+    universe = load_universe()
+    quotes = get_market_cache().get_many(list(universe), "quote")
+    portfolios = [("portfolio", user, user) for user in portfolio_users()]
+    movers = [("news", ticker, name) for ticker, name in universe.items()
+              if ticker in quotes and day_change_pct(quotes[ticker][0]) >= NEWS_MOVE_PCT]
+    prices = [("price", ticker, name) for ticker, name in universe.items()]
+    return portfolios + movers + prices
+
+
+def build(graph: Any, store: BriefStore, kind: str, subject: str, name: str, with_audio: bool) -> Optional[str]:
+    """
+    Runs the workflow for the brief's canonical query, with intents pre-set so intent classification
+    is skipped, and stores the result.
+    Output: Brief key, or None if the run degraded or failed.
+    """
+    portfolio = kind == "portfolio"
+    state = new_request_state(initial_state(
+        transcript=QUERIES[kind].format(name=name),
+        intents=["portfolio"] if portfolio else ["price"],
+        companies=[] if portfolio else [subject],
+        user_id=subject if portfolio else DEFAULT_USER,
+        skip_tts=not with_audio,
+        skip_briefs=True,
+    ), budget_s=BUILD_BUDGET_S)
+    try:
+        result = graph.invoke(state)
+        failed = (result.get("degradations") or not result.get("narrative")
+                  or (kind == "price" and "error" in result.get("market_data", {}).get(subject, {"error": True})))
+        if failed:
+            logger.warning("Brief_Materializer Not Stored", key=brief_key(kind, subject),
+                           degradations=result.get("degradations"), error=result.get("error"))
+            return None
+        holdings = (result.get("portfolio_data") or {}).get("holdings", {})
+        basis: Dict[str, Any] = {"quotes": quote_basis(list(holdings) if portfolio else [subject])}
+        if portfolio:
+            basis["holdings"] = holdings
+        payload = {field: result.get(field) for field in ("narrative", "analysis", "market_data", "market_fetched_at", "news_data")}
+        return store.put(kind, subject, payload, basis, result.get("audio_output") if with_audio else None)
+    finally:
+        shutil.rmtree(state["work_dir"], ignore_errors=True)
+
+
+def materialize_once(graph: Any, store: BriefStore, max_builds: int, with_audio: bool = True) -> Dict[str, int]:
+    """
+    Rebuilds missing or stale briefs, at most max_builds per pass.
+    Output: Counts of built, fresh, failed and deferred briefs.
+    """
+    stats = {"built": 0, "fresh": 0, "failed": 0, "deferred": 0}
+    for kind, subject, name in candidates():
+        key = brief_key(kind, subject)
+        brief = store.get(key)
+        holdings = get_portfolio_store().get(subject).holdings if kind == "portfolio" else None
+        reason = "missing" if brief is None else store.stale_reason(brief, holdings)
+        if not reason:
+            stats["fresh"] += 1
+            continue
+        if stats["built"] + stats["failed"] >= max_builds:
+            stats["deferred"] += 1
+            continue
+        try:
+            built = build(graph, store, kind, subject, name, with_audio)
+        except Exception as e:
+            logger.error("Brief_Materializer Error", key=key, error=str(e))
+            built = None
+        logger.info("Brief_Materializer Build", key=key, reason=reason, built=bool(built))
+        stats["built" if built else "failed"] += 1
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--tick", type=float, default=float(os.getenv("BRIEF_TICK_S", "60")),
+                        help="Seconds between passes")
+    parser.add_argument("--max-builds", type=int, default=int(os.getenv("BRIEF_MAX_BUILDS", "10")),
+                        help="Briefs built per pass (each runs the full pipeline)")
+    parser.add_argument("--no-audio", action="store_true", help="Store narratives only, without TTS")
+    args = parser.parse_args()
+
+    graph = workflow()
+    store = get_brief_store()
+    while True:
+        start = time.time()
+        stats = materialize_once(graph, store, args.max_builds, not args.no_audio)
+        logger.info("Brief_Materializer Pass", **stats, elapsed_s=round(time.time() - start, 1))
+        if args.once:
+            break
+        time.sleep(max(0.0, args.tick - (time.time() - start)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Background market data warmer: keeps quotes, fundamentals and daily history in the market cache
+fresh for every portfolio holding and ticker_map company, so api_agent mostly reads from cache.
+
+Refresh cadence follows each exchange's trading hours (see agents/market_hours.py): quotes every
+QUOTE_TTL_OPEN_S while the market is open and once after the close, history once per session and
+fundamentals daily. Provider calls go through the shared quota in agents/market_cache.py; by default
+the warmer uses only yfinance and leaves the small Alpha Vantage quota to query-time requests.
+
+Usage: python -m workers.market_warmer [--once] [--tick 60] [--use-alpha-vantage]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from agents.api_agent import MARKET_DATA_KINDS, fetch_market_data
+from agents.logging_utils import get_logger
+from agents.market_cache import MarketCache, get_market_cache
+from agents.market_hours import is_fresh, is_market_open
+from workers.universe import load_universe
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = get_logger(__name__)
+
+
+def stale_kinds(cache: MarketCache, ticker: str, now: float) -> List[str]:
+    kinds = []
+    for kind in MARKET_DATA_KINDS:
+        hit = cache.get(ticker, kind)
+        if not hit or not is_fresh(ticker, kind, hit[1], now):
+            kinds.append(kind)
+    return kinds
+
+
+def holdings() -> List[str]:
+    try:
+        with open(os.path.join("data", "portfolio.json"), "r") as f:
+            return list(json.load(f).get("holdings", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def warm_once(cache: MarketCache, api_key: Optional[str], max_refreshes: int) -> Dict[str, int]:
+    """
+    Refreshes stale data for up to max_refreshes tickers: holdings first, then tickers whose market is open.
+    Output: Counts of refreshed, fresh and failed tickers.
+    """
+    now = time.time()
+    held = set(holdings())
+    universe = sorted(load_universe(), key=lambda t: (t not in held, not is_market_open(t, now), t))
+    stats = {"refreshed": 0, "fresh": 0, "failed": 0, "deferred": 0}
+    for ticker in universe:
+        kinds = stale_kinds(cache, ticker, now)
+        if not kinds:
+            stats["fresh"] += 1
+            continue
+        if stats["refreshed"] + stats["failed"] >= max_refreshes:
+            stats["deferred"] += 1
+            continue
+        fetched = fetch_market_data(ticker, api_key, kinds, cache)
+        stats["refreshed" if fetched else "failed"] += 1
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--tick", type=float, default=float(os.getenv("WARMER_TICK_S", "60")),
+                        help="Seconds between passes")
+    parser.add_argument("--max-refreshes", type=int, default=int(os.getenv("WARMER_MAX_REFRESHES", "20")),
+                        help="Tickers refreshed per pass, to spread provider calls over time")
+    parser.add_argument("--use-alpha-vantage", action="store_true",
+                        help="Also spend the Alpha Vantage quota (yfinance only by default)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("ALPHA_VANTAGE_KEY") if args.use_alpha_vantage else None
+    cache = get_market_cache()
+    while True:
+        start = time.time()
+        stats = warm_once(cache, api_key, args.max_refreshes)
+        logger.info("Market_Warmer Pass", **stats, elapsed_s=round(time.time() - start, 1))
+        if args.once:
+            break
+        time.sleep(max(0.0, args.tick - (time.time() - start)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Model worker sidecar: one process owns the embedding model and serves every app process on the box
+over a Unix socket, so adding app workers does not add copies of torch and the model. App processes
+use it with EMBEDDING_BACKEND=remote (agents/embedding_backend.py, RemoteEncoder).
+
+Results of 64 KiB or more are written to a fresh shared-memory segment in /dev/shm that the client
+maps and unlinks, so the embeddings reach the agent as a NumPy view without a copy through the
+socket; smaller results are sent inline. Concurrent requests from all clients share the encoder's
+micro-batcher when EMBEDDING_BATCH_WAIT_MS > 0.
+
+Only the embedding model runs locally in this tree (intents come from Bedrock, STT from AssemblyAI);
+further local models would register another op in ModelWorker.ops.
+
+Usage: python -m workers.model_worker [--socket data/model_worker.sock] [--backend onnx]
+"""
+import argparse
+import itertools
+import mmap
+import os
+import socketserver
+import threading
+import time
+from typing import Dict, Any, Callable, Tuple
+import numpy as np
+from agents.embedding_backend import MODEL_WORKER_SOCKET, SHM_DIR, FrameError, get_encoder, read_frame, write_frame
+from agents.logging_utils import get_logger
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = get_logger(__name__)
+
+SHM_MIN_BYTES = 64 * 1024
+SHM_PREFIX = "model-worker-"
+ORPHAN_TTL_S = 60.0  # segments a client never picked up (it died mid-request) are removed after this
+
+_segment_ids = itertools.count()
+
+
+def export_array(array: np.ndarray) -> Tuple[Dict[str, Any], bytes]:
+    """Response header and inline payload for an array; large arrays go to a shared-memory segment instead."""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    header: Dict[str, Any] = {"shape": list(array.shape), "dtype": "float32"}
+    if array.nbytes < SHM_MIN_BYTES or not os.path.isdir(SHM_DIR):
+        return header, array.tobytes()
+    name = f"{SHM_PREFIX}{os.getpid()}-{next(_segment_ids)}"
+    fd = os.open(os.path.join(SHM_DIR, name), os.O_CREAT | os.O_EXCL | os.O_RDWR, 0o600)
+    try:
+        os.ftruncate(fd, array.nbytes)
+        with mmap.mmap(fd, array.nbytes) as segment:
+            segment.write(memoryview(array).cast("B"))
+    finally:
+        os.close(fd)
+    header.update({"shm": name, "nbytes": array.nbytes})
+    return header, b""
+
+
+def remove_orphans(max_age_s: float = ORPHAN_TTL_S) -> int:
+    """Deletes this worker's segments older than max_age_s. Output: number removed."""
+    removed = 0
+    cutoff = time.time() - max_age_s
+    prefix = f"{SHM_PREFIX}{os.getpid()}-"
+    for name in os.listdir(SHM_DIR) if os.path.isdir(SHM_DIR) else []:
+        path = os.path.join(SHM_DIR, name)
+        try:
+            if name.startswith(prefix) and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+class ModelWorker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server; one thread per client connection, requests on a connection are sequential."""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, encoder: Any):
+        self.encoder = encoder
+        self.counts = {"requests": 0, "texts": 0, "errors": 0, "connections": 0}
+        self._counts_lock = threading.Lock()
+        self.ops: Dict[str, Callable[[Dict[str, Any]], Tuple[Dict[str, Any], bytes]]] = {
+            "encode": self.encode,
+            "ping": lambda request: ({"backend": self.encoder.name, "pid": os.getpid(), **self.counts}, b""),
+        }
+        super().__init__(socket_path, ModelRequestHandler)
+
+    def encode(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        texts = request.get("texts") or []
+        with self._counts_lock:
+            self.counts["texts"] += len(texts)
+        return export_array(self.encoder.encode(texts))
+
+
+class ModelRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        server: ModelWorker = self.server
+        with server._counts_lock:
+            server.counts["connections"] += 1
+        while True:
+            try:
+                request, _ = read_frame(self.request)
+            except FrameError as e:
+                # Reply so the client fails fast, then drop the connection: its framing is lost
+                logger.warning("Model_Worker Bad Frame", error=str(e))
+                with server._counts_lock:
+                    server.counts["errors"] += 1
+                try:
+                    write_frame(self.request, {"error": f"Bad request frame: {e}"})
+                except OSError:
+                    pass
+                return
+            except (ConnectionError, OSError):
+                return
+            op = server.ops.get(request.get("op"))
+            try:
+                if op is None:
+                    raise ValueError(f"Unknown op: {request.get('op')}")
+                header, payload = op(request)
+            except Exception as e:
+                logger.error("Model_Worker Error", op=request.get("op"), error=str(e))
+                header, payload = {"error": str(e)}, b""
+                with server._counts_lock:
+                    server.counts["errors"] += 1
+            with server._counts_lock:
+                server.counts["requests"] += 1
+            try:
+                write_frame(self.request, header, payload)
+            except OSError:
+                return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.getenv("MODEL_WORKER_SOCKET", MODEL_WORKER_SOCKET))
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=os.getenv("MODEL_WORKER_BACKEND", "torch"),
+                        help="Local backend the worker loads (app processes set EMBEDDING_BACKEND=remote)")
+    args = parser.parse_args()
+
+    encoder = get_encoder(args.backend)
+    encoder.encode(["warm up"])
+    os.makedirs(os.path.dirname(args.socket) or ".", exist_ok=True)
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    server = ModelWorker(args.socket, encoder)
+    os.chmod(args.socket, 0o600)
+
+    def sweep() -> None:
+        while True:
+            time.sleep(ORPHAN_TTL_S)
+            removed = remove_orphans()
+            if removed:
+                logger.warning("Model_Worker Orphans Removed", segments=removed)
+
+    threading.Thread(target=sweep, name="model-worker-sweep", daemon=True).start()
+    logger.info("Model_Worker Serving", model=encoder.name, socket=args.socket)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
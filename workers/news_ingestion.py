@@ -0,0 +1,122 @@
+"""
+Background news ingestion: periodically pulls NewsAPI articles for every ticker_map company and
+portfolio holding into the local news store that news_agent reads at query time.
+
+Each ticker keeps a cursor (newest published_at seen), so every pull only asks for articles
+since the previous one instead of a fresh 30-day window. Pulls page back until they reach the cursor
+(at most NEWS_INGEST_MAX_PAGES pages), so bursts larger than one page are not skipped.
+Passes are spaced so the requests they make fit NEWS_API_DAILY_QUOTA (at least 30 minutes apart),
+unless --interval / NEWS_INGEST_INTERVAL_S fixes the spacing.
+
+Usage: python -m workers.news_ingestion [--once] [--interval 3600]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from agents.news_agent import build_query, fetch_news_since, get_news_api_key
+from agents.logging_utils import get_logger
+from agents.news_store import NewsStore, get_news_store
+from workers.universe import load_universe
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = get_logger(__name__)
+
+INITIAL_WINDOW_DAYS = 30
+MAX_PAGES = int(os.getenv("NEWS_INGEST_MAX_PAGES", "5"))
+DAILY_QUOTA = int(os.getenv("NEWS_API_DAILY_QUOTA", "100"))  # NewsAPI developer plan: 100 requests/day
+MIN_INTERVAL_S = 1800.0
+
+
+def ingest_ticker(store: NewsStore, ticker: str, name: str, api_key: str, min_interval: float) -> Dict[str, Any]:
+    """
+    Pulls articles published since the ticker's cursor and stores the new ones.
+    A pull that runs out of pages leaves the cursor where it was and records where it stopped; the next
+    pull fills that gap first, and only then does the cursor move to the newest article seen.
+    Skips tickers pulled less than min_interval seconds ago (e.g. after a restart).
+    """
+    cursor = store.get_cursor(ticker) or {}
+    if cursor.get("last_published_at") and time.time() - cursor["last_run_at"] < min_interval:
+        return {"ticker": ticker, "skipped": True, "requests": 0}
+
+    from_time: Optional[str] = cursor.get("last_published_at")
+    if not from_time:
+        from_time = (datetime.utcnow() - timedelta(days=INITIAL_WINDOW_DAYS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    resume_before, newest = cursor.get("resume_before"), cursor.get("resume_newest")
+    articles, complete, requests = fetch_news_since(build_query(ticker, name), api_key, from_time, MAX_PAGES,
+                                                    to_time=resume_before)
+    if not resume_before:
+        newest = max((a["published_at"] for a in articles), default=None)
+    inserted = store.upsert_articles(ticker, articles)
+    if complete:
+        store.set_cursor(ticker, newest)
+    else:
+        oldest = min(a["published_at"] for a in articles)
+        logger.warning("News_Ingestion Page Limit", ticker=ticker, max_pages=MAX_PAGES, gap_from=from_time,
+                       gap_to=oldest)
+        store.set_cursor(ticker, None, resume_before=oldest, resume_newest=newest)
+    return {"ticker": ticker, "fetched": len(articles), "inserted": inserted, "requests": requests, "complete": complete}
+
+
+def run_once(store: NewsStore, api_key: str, min_interval: float = 0, max_workers: int = 4) -> int:
+    """
+    Runs one ingestion pass over the whole universe with a small pool of concurrent requests.
+    Output: Number of NewsAPI requests made.
+    """
+    universe = load_universe()
+    start = time.time()
+
+    def work(item):
+        ticker, name = item
+        try:
+            return ingest_ticker(store, ticker, name, api_key, min_interval)
+        except Exception as e:
+            logger.error("News_Ingestion Error", ticker=ticker, error=str(e))
+            return {"ticker": ticker, "error": str(e), "requests": 1}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(work, universe.items()))
+    inserted = sum(r.get("inserted", 0) for r in results)
+    errors = sum(1 for r in results if "error" in r)
+    requests = sum(r["requests"] for r in results)
+    logger.info("News_Ingestion Pass", tickers=len(results), inserted=inserted, errors=errors, requests=requests,
+                elapsed_s=round(time.time() - start, 1))
+    return requests
+
+
+def quota_interval(requests_per_pass: int, daily_quota: int = DAILY_QUOTA, floor: float = MIN_INTERVAL_S) -> float:
+    """Seconds between passes so that passes of requests_per_pass requests stay within the daily quota."""
+    return max(floor, 86400 * requests_per_pass / max(1, daily_quota))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("NEWS_INGEST_INTERVAL_S", "0")) or None,
+                        help="Seconds between passes (default: derived from NEWS_API_DAILY_QUOTA and the requests a pass made)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retention-days", type=int, default=90)
+    args = parser.parse_args()
+
+    api_key = get_news_api_key()
+    if not api_key:
+        raise ValueError("NEWS_API_KEY not set in environment variables")
+    store = get_news_store()
+
+    interval = args.interval or MIN_INTERVAL_S
+    while True:
+        requests = run_once(store, api_key, min_interval=0 if args.once else interval * 0.9, max_workers=args.workers)
+        store.prune(args.retention_days)
+        if args.once:
+            break
+        interval = args.interval or quota_interval(requests)
+        logger.info("News_Ingestion Sleep", interval_s=round(interval))
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
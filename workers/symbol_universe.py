@@ -0,0 +1,64 @@
+"""
+Downloads the US listing universe (Nasdaq Trader symbol directories) into data/symbols/universe.csv
+for the entity resolver. Run occasionally (listings change slowly); the resolver reloads the file
+when it changes.
+
+Usage: python -m workers.symbol_universe [--output data/symbols/universe.csv]
+"""
+import argparse
+import csv
+import os
+from typing import Dict, List
+import requests
+from agents.entity_resolver import UNIVERSE_PATH
+from agents.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+LISTINGS = {
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt": "Symbol",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt": "ACT Symbol",
+}
+
+
+def parse_listing(text: str, symbol_field: str) -> List[Dict[str, str]]:
+    """Pipe-delimited symbol directory -> [{'symbol', 'name'}], skipping test issues and the trailer line."""
+    rows = []
+    reader = csv.DictReader(text.splitlines(), delimiter="|")
+    for row in reader:
+        symbol = (row.get(symbol_field) or "").strip()
+        if not symbol or symbol.startswith("File Creation Time") or row.get("Test Issue") == "Y":
+            continue
+        rows.append({"symbol": symbol.replace("$", "-"), "name": (row.get("Security Name") or "").strip()})
+    return rows
+
+
+def download(output: str = UNIVERSE_PATH, timeout: float = 30) -> int:
+    rows: Dict[str, Dict[str, str]] = {}
+    for url, symbol_field in LISTINGS.items():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        for row in parse_listing(response.text, symbol_field):
+            rows.setdefault(row["symbol"], row)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["symbol", "name", "aliases"])
+        writer.writeheader()
+        for row in rows.values():
+            writer.writerow({**row, "aliases": ""})
+    os.replace(tmp_path, output)
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=UNIVERSE_PATH)
+    args = parser.parse_args()
+    count = download(args.output)
+    logger.info("Symbol_Universe Written", symbols=count, path=args.output)
+
+
+if __name__ == "__main__":
+    main()
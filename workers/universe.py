@@ -0,0 +1,26 @@
+from typing import Dict
+import json
+import os
+from agents.market_cache import get_market_cache
+
+
+def load_universe(config_path: str = "config.json", portfolio_path: str = os.path.join("data", "portfolio.json")) -> Dict[str, str]:
+    """
+    Known ticker universe for background workers: every ticker_map company, portfolio holdings
+    and tickers users recently asked about.
+    Output: Dict of ticker -> display name (the ticker itself for holdings not in ticker_map).
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    universe = {ticker: name for name, ticker in config["ticker_map"].items()}
+
+    try:
+        with open(portfolio_path, "r") as f:
+            portfolio = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        portfolio = {}
+    for ticker in portfolio.get("holdings", {}):
+        universe.setdefault(ticker, ticker)
+    for ticker in get_market_cache().tracked_tickers():
+        universe.setdefault(ticker, ticker)
+    return universe